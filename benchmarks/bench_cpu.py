@@ -0,0 +1,188 @@
+"""
+Microbenchmarks of the client's CPU paths on synthetic large inputs, without network.
+
+Cases cover schema building of a 10k question poll, the ExportFilter / ExportPayload
+model_dump overrides, SearchPayload validation and a 50k poll search, date parsing and
+get_quota over 5k quotas, and LocalCrosstab distributions over 20k rows when numpy is
+installed. Requests are answered from memory by overriding the methods that
+would hit the network, so only the client's own work is timed.
+
+Results can be saved and compared to track regressions over time:
+
+    python benchmarks/bench_cpu.py --save baseline.json
+    python benchmarks/bench_cpu.py --compare baseline.json --max-regression 0.2   # exit 1 if >20% slower
+    python benchmarks/bench_cpu.py -k multiindex
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, Any, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from socapi import SocAPIClient, PollSchema, LocalCrosstab
+from socapi import utils
+from socapi._meta_parser import get_multiindex_from_questions
+from socapi.models import _client_model as cm
+from socapi.models import _download_models as dm
+from socapi.models import _searcher_models as srm
+
+QUESTION_TYPES = (1, 2, 3, 4, 7, 8, 9, 10)
+
+
+def make_questions(n_questions: int, per_block: int = 200, answers: int = 6) -> List[List[Dict[str, Any]]]:
+    blocks = []
+    for b in range(n_questions // per_block):
+        block = []
+        for q in range(per_block):
+            q_id = b * per_block + q + 1
+            block.append({
+                "id": q_id,
+                "block_id": b + 1,
+                "order": q,
+                "type_id": QUESTION_TYPES[q_id % len(QUESTION_TYPES)],
+                "answers": [
+                    {"id": q_id * 100 + a, "question_id": q_id, "order": a, "has_input": a == 0 and q_id % 4 == 0}
+                    for a in range(answers)
+                ],
+            })
+        blocks.append(block)
+    return blocks
+
+
+def make_search_pages(n_polls: int, page: int = 50) -> Dict[int, List[Dict[str, Any]]]:
+    # pages by offset, the client asks for page + 1 items per page
+    pages = {}
+    for offset in range(0, n_polls + 1, page):
+        pages[offset] = [
+            {"id": i, "name": f"poll {i}", "status_id": 1, "num": i, "created_at": "2024-01-01T00:00:00Z"}
+            for i in range(offset + 1, min(offset + page + 1, n_polls) + 1)
+        ]
+    return pages
+
+
+class OfflineClient(SocAPIClient):
+    """Answers the requests of the benchmarked methods from prepared data."""
+
+    async def _request(self, endpoint, method, payload=None, **kwargs):
+        data = self.__dict__["_offline"]
+        if endpoint == cm.Endpoints.SEARCH_POLS:
+            return data["search"][payload.get("offset", 0)]
+        raise NotImplementedError(endpoint)
+
+    async def _get_quota_values(self, poll_id: int):
+        return self.__dict__["_offline"]["quotas"]
+
+    async def get_sources(self, poll_id: int):
+        return self.__dict__["_offline"]["sources"]
+
+
+def make_client(n_polls: int, n_quotas: int) -> OfflineClient:
+    client = OfflineClient(platform="online-sociology", login=None, password=None, init_source=cm.InitSource.from_token)
+    client.set_auth("offline")
+    sources = [{"id": s, "name": f"source {s}"} for s in range(50)]
+    client.__dict__["_offline"] = {
+        "search": make_search_pages(n_polls),
+        "sources": sources,
+        "quotas": [
+            {"id": q, "name": f"quota {q}", "hits": q % 100, "quota": 100, "source_ids": [q % 50, (q + 7) % 50]}
+            for q in range(n_quotas)
+        ],
+    }
+    return client
+
+
+def cases(args) -> Dict[str, Callable[[], Any]]:
+    questions = make_questions(args.questions)
+    loop = asyncio.new_event_loop()
+    client = make_client(args.search_polls, args.quotas)
+
+    question_filters = [{"question_id": q, "answer_ids": [q * 100, q * 100 + 1]} for q in range(1, 21)]
+    export_filter = dm.ExportFilter(from_="2024-01-01_10:00:00", to="2024-06-30", questions=question_filters)
+    export_payload = dm.ExportPayload(poll_id=1, export_format="sav", filter=export_filter)
+    filter_payload = export_filter.model_dump()
+
+    found = {
+        f"multiindex_{args.questions}q": lambda: get_multiindex_from_questions(questions),
+        f"poll_schema_{args.questions}q": lambda: PollSchema.from_questions(questions),
+        "export_filter_validate": lambda: dm.ExportFilter(
+            from_="2024-01-01_10:00:00", to="2024-06-30", questions=question_filters
+        ),
+        "export_filter_dump": lambda: export_filter.model_dump(),
+        "export_payload_dump": lambda: export_payload.model_dump(),
+        "export_payload_batch_1k": lambda: [dm.export_payload(p, dm.ExportFileFormat.sav, filter_payload) for p in range(1000)],
+        "search_payload_validate": lambda: srm.SearchPayload(name="poll", num=None, status_id="active").model_dump(exclude_none=True),
+        f"search_{args.search_polls}_polls": lambda: loop.run_until_complete(client.search(name="poll")),
+        "parse_datetime": lambda: dm.parse_datetime("2024-01-01_10:00:00"),
+        "convert_to_iso8601": lambda: utils.convert_to_iso8601("01:02:2024"),
+        f"get_quota_{args.quotas}": lambda: loop.run_until_complete(client.get_quota(1)),
+    }
+
+    try:
+        import numpy as np
+    except ImportError:
+        return found
+    schema = PollSchema.from_questions(make_questions(200))
+    data = np.random.default_rng(0).integers(0, 3, size=(args.rows, len(schema))).astype(float)
+    crosstab = LocalCrosstab(data, schema)
+    # question 1 is single-column, question 3 multi-column
+    found[f"crosstab_single_{args.rows}"] = lambda: crosstab.distribution(1)
+    found[f"crosstab_multi_{args.rows}"] = lambda: crosstab.distribution(3)
+    return found
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return statistics.median(t / number for t in timer.repeat(repeat=repeat, number=number))
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.0f} ns"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", default=None, help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=10_000)
+    parser.add_argument("--search-polls", type=int, default=50_000)
+    parser.add_argument("--quotas", type=int, default=5_000)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--save", default=None, help="write the results as json")
+    parser.add_argument("--compare", default=None, help="json of a previous run to compare with")
+    parser.add_argument("--max-regression", type=float, default=None, help="fail if a case is slower by this fraction")
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    results, regressed = {}, []
+    for name, func in cases(args).items():
+        if args.k and args.k not in name:
+            continue
+        results[name] = seconds = measure(func, args.repeat)
+        line = f"{name:<30} {format_time(seconds)}"
+        if name in baseline:
+            change = seconds / baseline[name] - 1
+            line += f"  {change:+7.1%} vs {format_time(baseline[name]).strip()}"
+            if args.max_regression is not None and change > args.max_regression:
+                regressed.append(name)
+                line += "  REGRESSED"
+        print(line)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+    if regressed:
+        print(f"slower than allowed: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+End-to-end throughput and latency of the client against the local platform stand-in.
+
+Scenarios, each on a fresh mock server and client:
+  download  download_poll for each batch size: wall time, polls/s, MB/s, per poll latency
+            and the per stage breakdown of the download trace
+  search    search over --search-results polls, paged by the client
+  schema    map_question_ids_many over --schema-polls polls
+  apis      one call of each batch API on a shared server: build_questionnaire, iter_questions,
+            get_statistics_series, get_answer_distribution, get_quotas_table, watch_quotas,
+            scan_activity, SnapshotCollector, create_links, and a download batch recorded
+            with RecordingTransport and replayed with ReplayTransport
+
+    python benchmarks/bench_e2e.py [--polls 1,10,100] [--export-latency 0.2] [--file-size 65536]
+                                   [--scenarios download,search,schema,apis] [--json results.json]
+
+Large batches (1000 polls) take minutes: download_poll checks export progress once a second.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from socapi import SocAPIClient, DownloadTrace, MetricsCollector, ActivityState, SnapshotStore, SnapshotCollector
+from socapi import RecordingTransport, ReplayTransport
+from mock_socpanel import MockSocpanel, MockConfig, CREATE_ENDPOINTS
+
+
+async def make_client(server: MockSocpanel) -> tuple[SocAPIClient, MetricsCollector]:
+    client = await SocAPIClient.from_credentials("online-sociology", "bench", "bench", url_override=server.url)
+    return client, client.enable_metrics()
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def bench_download(n: int, config: MockConfig) -> dict:
+    async with MockSocpanel(config) as server:
+        client, metrics = await make_client(server)
+        trace = DownloadTrace()
+        with tempfile.TemporaryDirectory() as export_dir:
+            started = time.perf_counter()
+            await client.download_poll(list(range(1, n + 1)), export_dir=export_dir, trace=trace)
+            wall = time.perf_counter() - started
+
+    per_poll = [
+        max(s.end for s in spans) - min(s.start for s in spans)
+        for spans in trace.polls().values()
+    ]
+    received = sum(m.bytes_received for m in metrics.requests.values())
+    return {
+        "polls": n,
+        "wall": wall,
+        "polls_per_s": n / wall,
+        "mb_per_s": received / wall / 2 ** 20,
+        "poll_p50": percentile(per_poll, 0.5),
+        "poll_p90": percentile(per_poll, 0.9),
+        "poll_max": max(per_poll),
+        "stages": {name: {"mean": s.mean, "p90": s.p90, "total": s.total} for name, s in trace.breakdown().items()},
+        "requests": sum(m.requests for m in metrics.requests.values()),
+    }
+
+
+async def bench_search(results: int, config: MockConfig) -> dict:
+    config.search_results = results
+    async with MockSocpanel(config) as server:
+        client, metrics = await make_client(server)
+        started = time.perf_counter()
+        found = await client.search(name="poll")
+        wall = time.perf_counter() - started
+    pages = metrics.requests["Searching polls"].requests
+    return {"results": len(found), "wall": wall, "pages": pages, "page_mean": wall / pages}
+
+
+async def bench_schema(polls: int, config: MockConfig) -> dict:
+    async with MockSocpanel(config) as server:
+        client, metrics = await make_client(server)
+        started = time.perf_counter()
+        latencies = []
+        async for poll_id, columns in client.map_question_ids_many(range(1, polls + 1)):
+            if isinstance(columns, Exception):
+                raise columns
+            latencies.append(time.perf_counter() - started)
+        wall = time.perf_counter() - started
+    questions = config.blocks_per_poll * config.questions_per_block
+    return {
+        "polls": polls,
+        "questions_per_poll": questions,
+        "wall": wall,
+        "polls_per_s": polls / wall,
+        "first_result": latencies[0],
+        "requests": sum(m.requests for m in metrics.requests.values()),
+    }
+
+
+def questionnaire_plan(blocks: int, questions: int, answers: int) -> dict:
+    return {
+        "blocks": [{"key": f"b{b}", "title": f"block {b}"} for b in range(blocks)],
+        "questions": [
+            {
+                "key": f"b{b}q{q}", "title": f"question {q}", "type": "singlepunch", "block": f"b{b}",
+                "answers": [{"key": f"b{b}q{q}a{a}", "title": f"answer {a}"} for a in range(answers)],
+            }
+            for b in range(blocks) for q in range(questions)
+        ],
+    }
+
+
+async def bench_apis(polls: int, config: MockConfig) -> dict:
+    """Calls each batch API once, returns wall time, request count and result size per API."""
+    poll_ids = list(range(1, polls + 1))
+    results = {}
+
+    async with MockSocpanel(config) as server:
+        client, metrics = await make_client(server)
+
+        async def watch_initial() -> int:
+            expected = polls * config.quotas_per_poll
+            deltas = 0
+            async for _ in client.watch_quotas(poll_ids, interval=0.1):
+                deltas += 1
+                if deltas == expected:
+                    return deltas
+
+        async def streamed_questions() -> int:
+            return sum([1 async for _ in client.iter_questions(1, "poll")])
+
+        async def collect_snapshots(tmp: str) -> int:
+            store = SnapshotStore(Path(tmp, "snapshots.db"))
+            collector = SnapshotCollector(client, store, poll_ids)
+            await collector.collect_once()
+            store.close()
+            return len(poll_ids) - len({poll_id for _, poll_id in collector.errors})
+
+        async def scan_twice() -> tuple:
+            state = ActivityState()
+            first = await client.scan_activity(poll_ids, state)
+            second = await client.scan_activity(poll_ids, state)
+            return len(first.active), len(second.active)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            calls = {
+                "build_questionnaire": lambda: client.build_questionnaire(1, questionnaire_plan(5, 20, 5), CREATE_ENDPOINTS),
+                "iter_questions": streamed_questions,
+                "get_statistics_series": lambda: client.get_statistics_series(
+                    1, datetime.now(timezone.utc) - timedelta(days=7), bucket="hour"
+                ),
+                "get_answer_distribution": lambda: client.get_answer_distribution(
+                    1, [100000, 100001, 100002], source_ids=[100, 101, 102]
+                ),
+                "get_quotas_table": lambda: client.get_quotas_table(poll_ids),
+                "watch_quotas": watch_initial,
+                "scan_activity": scan_twice,
+                "snapshot_collector": lambda: collect_snapshots(tmp),
+                "create_links": lambda: client.create_links(1, 2000),
+            }
+            for name, call in calls.items():
+                metrics.reset()
+                started = time.perf_counter()
+                result = await call()
+                results[name] = {
+                    "wall": time.perf_counter() - started,
+                    "requests": sum(m.requests for m in metrics.requests.values()),
+                    "result": result_size(result),
+                }
+
+    # a download batch recorded live, then served from the recording
+    with tempfile.TemporaryDirectory() as tmp:
+        recording = Path(tmp, "session.jsonl")
+        async with MockSocpanel(config) as server:
+            recorder = RecordingTransport(recording)
+            client = await SocAPIClient.from_credentials(
+                "online-sociology", "bench", "bench", url_override=server.url, transport=recorder
+            )
+            started = time.perf_counter()
+            await client.download_poll(poll_ids[:10], export_dir=Path(tmp, "live"))
+            results["record_download"] = {"wall": time.perf_counter() - started, "result": len(recording.read_text().splitlines())}
+            recorder.close()
+
+        replayer = ReplayTransport(recording, speed=None)
+        client = await SocAPIClient.from_credentials(
+            "online-sociology", "bench", "bench", url_override="http://replay.invalid", transport=replayer
+        )
+        started = time.perf_counter()
+        await client.download_poll(poll_ids[:10], export_dir=Path(tmp, "replayed"))
+        results["replay_download"] = {"wall": time.perf_counter() - started, "result": replayer.served}
+
+    return results
+
+
+def result_size(result) -> int | list:
+    if isinstance(result, (int, tuple)):
+        return list(result) if isinstance(result, tuple) else result
+    for attr in ("ids", "counts", "results", "links", "quota_id"):
+        if hasattr(result, attr):
+            return len(getattr(result, attr))
+    return len(result)
+
+
+async def main(args) -> dict:
+    def config() -> MockConfig:
+        return MockConfig(export_latency=args.export_latency, file_size=args.file_size)
+
+    results = {}
+    scenarios = set(args.scenarios.split(","))
+
+    if "download" in scenarios:
+        results["download"] = []
+        print(f"{'polls':>6} {'wall s':>8} {'polls/s':>8} {'MB/s':>7} {'p50 s':>7} {'p90 s':>7} {'max s':>7}  slowest stage")
+        for n in (int(p) for p in args.polls.split(",")):
+            r = await bench_download(n, config())
+            results["download"].append(r)
+            slowest = max(r["stages"].items(), key=lambda item: item[1]["total"])[0]
+            print(
+                f"{n:>6} {r['wall']:>8.2f} {r['polls_per_s']:>8.2f} {r['mb_per_s']:>7.2f} "
+                f"{r['poll_p50']:>7.2f} {r['poll_p90']:>7.2f} {r['poll_max']:>7.2f}  {slowest}"
+            )
+
+    if "search" in scenarios:
+        r = results["search"] = await bench_search(args.search_results, config())
+        print(f"search   {r['results']} polls in {r['pages']} pages: {r['wall']:.3f} s, {r['page_mean'] * 1000:.1f} ms/page")
+
+    if "schema" in scenarios:
+        r = results["schema"] = await bench_schema(args.schema_polls, config())
+        print(
+            f"schema   {r['polls']} polls x {r['questions_per_poll']} questions: {r['wall']:.3f} s, "
+            f"{r['polls_per_s']:.1f} polls/s, first after {r['first_result'] * 1000:.1f} ms, {r['requests']} requests"
+        )
+
+    if "apis" in scenarios:
+        results["apis"] = await bench_apis(args.api_polls, config())
+        print(f"{'api':<24} {'wall s':>8} {'requests':>9}  result")
+        for name, r in results["apis"].items():
+            print(f"{name:<24} {r['wall']:>8.3f} {r.get('requests', '-'):>9}  {r['result']}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--polls", default="1,10,100")
+    parser.add_argument("--export-latency", type=float, default=0.2)
+    parser.add_argument("--file-size", type=int, default=64 * 1024)
+    parser.add_argument("--search-results", type=int, default=5000)
+    parser.add_argument("--schema-polls", type=int, default=200)
+    parser.add_argument("--api-polls", type=int, default=50)
+    parser.add_argument("--scenarios", default="download,search,schema,apis")
+    parser.add_argument("--json", default=None, help="write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
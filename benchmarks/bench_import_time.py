@@ -0,0 +1,81 @@
+"""
+Cold import time of socapi, measured with `python -X importtime` in fresh interpreters.
+
+Reports the median cumulative import time of each target statement and the heaviest
+modules it pulls in. With --max-ms the script exits with status 1 when a median exceeds
+the budget, so it can guard against import time regressions in CI.
+
+    python benchmarks/bench_import_time.py [--runs 7] [--top 10] [--max-ms 50]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+TARGETS = {
+    "import socapi": "import socapi",
+    "socapi.SocAPIClient": "import socapi; socapi.SocAPIClient",
+}
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    # lines look like "import time:  self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = max(cumulative.get(name.strip(), 0), int(cum))
+    return cumulative
+
+
+def measure(statement: str) -> tuple[float, dict[str, int]]:
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    # modules imported by the interpreter itself are not part of the package cost
+    baseline = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True, env=env)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    baseline_modules = set(parse_importtime(baseline.stderr))
+    modules = {m: t for m, t in parse_importtime(result.stderr).items() if m not in baseline_modules}
+    # top level entries only, nested imports are already part of their parent's cumulative time
+    top_level = [
+        line for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+        and not line.split("|")[2].startswith("  ")
+    ]
+    total = sum(int(line.split("|")[1]) for line in top_level if line.split("|")[2].strip() not in baseline_modules)
+    return total / 1000, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for label, statement in TARGETS.items():
+        runs = [measure(statement) for _ in range(args.runs)]
+        median = statistics.median(total for total, _ in runs)
+        print(f"{label:<25} median {median:8.1f} ms over {args.runs} runs")
+
+        heaviest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for module, cumulative in heaviest:
+            print(f"    {cumulative / 1000:8.1f} ms  {module}")
+
+        if args.max_ms is not None and median > args.max_ms:
+            print(f"    over budget of {args.max_ms} ms")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+CPU overhead per request of the client's internal request path, without network.
+
+aiohttp.request is replaced by an in-memory response, so the timings contain only
+argument handling, payload building and response decoding. Compares the former
+validate_call wrapped _request and per-call payload models with the current fast path.
+
+    python benchmarks/bench_request_overhead.py [-n 20000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from http import HTTPMethod
+from pathlib import Path
+
+from pydantic import validate_call
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import socapi
+from socapi import _statistic
+from socapi.models import _client_model as cm
+from socapi.models import _download_models as dm
+from socapi.models import _meta_parser_models as mpm
+from socapi.models import _stat_models as sm
+
+
+class FakeResponse:
+    status = 200
+    headers = {"Content-Type": "application/json"}
+
+    async def read(self):
+        return b'{"error":"","result":{"ended_count":1}}'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def fake_request(**kwargs):
+    return FakeResponse()
+
+
+def make_client() -> socapi.SocAPIClient:
+    client = socapi.SocAPIClient(
+        platform="online-sociology", login=None, password=None, init_source=cm.InitSource.from_token
+    )
+    client.set_auth("token")
+    return client
+
+
+def bench_sync(name: str, func, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        func()
+    per_call = (time.perf_counter() - started) / n * 1e6
+    print(f"{name:<45} {per_call:>9.2f} us")
+    return per_call
+
+
+async def bench_async(name: str, func, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        await func()
+    per_call = (time.perf_counter() - started) / n * 1e6
+    print(f"{name:<45} {per_call:>9.2f} us")
+    return per_call
+
+
+async def main(n: int) -> None:
+    import aiohttp
+    aiohttp.request = fake_request
+    client = make_client()
+    validated_request = validate_call(cm.ClientModel._request)
+
+    request_kwargs = dict(
+        method=HTTPMethod.POST,
+        endpoint=cm.Endpoints.STATISTIC,
+        payload={"id": 1},
+        headers=client.headers,
+        request_name=cm.RequestNames.STATISTIC,
+        extract_result=True,
+    )
+
+    print("request path")
+    before = await bench_async("_request with validate_call", lambda: validated_request(client, **request_kwargs), n)
+    after = await bench_async("_request fast path", lambda: client._request(**request_kwargs), n)
+    print(f"{'saved per request':<45} {before - after:>9.2f} us\n")
+
+    print("payload building")
+    bench_sync(
+        "QuestionsPayload model per call",
+        lambda: mpm.QuestionsPayload(parent_id=1, how="block").model_dump(exclude={"how"}, exclude_none=True),
+        n,
+    )
+    bench_sync("questions_payload cached", lambda: mpm.questions_payload(1, "block"), n)
+    bench_sync("BlockPayload model per call", lambda: mpm.BlockPayload(poll_id=1).model_dump(), n)
+    bench_sync("block_payload cached", lambda: mpm.block_payload(1), n)
+
+    questions = [dm.QuestionFilter(question_id=1, answer_ids=[2, 3])]
+    bench_sync(
+        "StatFilter model per call",
+        lambda: sm.StatFilter(from_="2025-01-01", questions=questions).model_dump(),
+        n,
+    )
+    bench_sync(
+        "stat_filter_payload cached",
+        lambda: _statistic.stat_filter_payload(time_from="2025-01-01", questions=questions),
+        n,
+    )
+
+    export_filter = dm.ExportFilter()
+    filter_payload = export_filter.model_dump()
+    bench_sync(
+        "ExportPayload model per poll",
+        lambda: dm.ExportPayload(poll_id=1, export_format=dm.ExportFileFormat.sav, filter=export_filter).model_dump(),
+        n,
+    )
+    bench_sync(
+        "export_payload with batch filter",
+        lambda: dm.export_payload(1, dm.ExportFileFormat.sav, filter_payload),
+        n,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().n))
@@ -0,0 +1,462 @@
+"""
+Local stand-in of the socpanel platform for offline benchmarks.
+
+Implements the endpoints of cm.Endpoints on one aiohttp server with synthetic, deterministic
+data: login/profile, the export start/progress/done cycle with a configurable export latency,
+statistics file downloads, quotas, sources, blocks/questions, search pages, statistics,
+conversions and personal links. Block/question/answer creation is served on the paths of
+CREATE_ENDPOINTS, the stand-in's own choice since the platform does not document them; created
+items are added to the poll structure served afterwards. Point a client at it with `url_override`:
+
+    async with MockSocpanel(MockConfig(export_latency=0.2)) as server:
+        client = await SocAPIClient.from_credentials("online-sociology", "user", "pass", url_override=server.url)
+        await client.download_poll([1, 2, 3])
+
+Run standalone to serve it for manual testing:
+
+    python benchmarks/mock_socpanel.py --port 8080
+
+Faults are injected per endpoint through MockConfig.faults, keyed by the endpoint path
+(cm.Endpoints value) with "*" as the default for all others:
+
+    MockConfig(faults={"*": Faults(error_rate=0.05), "statistics": Faults(truncate_rate=0.1)})
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid as uuid_lib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from socapi.models import _client_model as cm
+from socapi.models import _constructor_models as ccm
+
+TOKEN = "mock-session-token"
+# ids of items made through the create endpoints start above this
+CREATED_IDS = 10 ** 9
+# download fault chosen by the fault middleware. A typed key avoids aiohttp's NotAppKeyWarning,
+# aiohttp before 3.14 has no RequestKey and takes the plain string
+FAULT_KEY = web.RequestKey("fault", str) if hasattr(web, "RequestKey") else "fault"
+# pass as build_questionnaire(endpoints=...) against the stand-in
+CREATE_ENDPOINTS = ccm.CreateEndpoints(block="api/block/create", question="api/question/create", answer="api/answer/create")
+
+
+@dataclass
+class Faults:
+    """
+    Failure modes of one endpoint, each rate is the probability per request.
+    error_rate answers 500 (PlatformError), and starts a burst: the next `error_burst`
+    requests to the endpoint fail as well. unauthorized_rate answers 401 and rotates the
+    session token, so every client request in flight has to log in again (TokenError).
+    drop_rate closes the connection without an answer. Latency added before handling is
+    `latency` plus exponential jitter with mean `latency_jitter`, and `slow_latency` with
+    probability `slow_rate` for a heavy tail. Downloads only: truncate_rate cuts the body
+    halfway, stall_rate pauses it halfway for `stall` seconds.
+    """
+    error_rate: float = 0.0
+    error_burst: int = 0
+    unauthorized_rate: float = 0.0
+    drop_rate: float = 0.0
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 5.0
+    truncate_rate: float = 0.0
+    stall_rate: float = 0.0
+    stall: float = 10.0
+
+
+@dataclass
+class MockConfig:
+    # seconds from export start until progress reports it done, plus uniform jitter
+    export_latency: float = 0.5
+    export_jitter: float = 0.0
+    file_size: int = 256 * 1024
+    file_chunk: int = 64 * 1024
+    blocks_per_poll: int = 5
+    questions_per_block: int = 20
+    answers_per_question: int = 5
+    quotas_per_poll: int = 10
+    sources_per_poll: int = 3
+    # polls matched by any search, served in limit/offset pages
+    search_results: int = 500
+    # answer poll level question requests, per block requests are used otherwise
+    questions_by_poll: bool = True
+    # links left out of every personal links answer
+    links_short: int = 0
+    faults: Dict[str, Faults] = field(default_factory=dict)
+    seed: int = 0
+
+
+class MockSocpanel:
+
+    def __init__(self, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.hits: Counter = Counter()
+        # injected faults by kind and path
+        self.injected: Counter = Counter()
+        self.token = TOKEN
+        self._bursts: Counter = Counter()
+        self.exports: Dict[str, Dict[str, Any]] = {}
+        self.url: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._random = random.Random(self.config.seed)
+        self._blobs: Dict[int, bytes] = {}
+        # items made through the create endpoints, by parent id
+        self.created_blocks: Dict[int, List[Dict[str, Any]]] = {}
+        self.created_questions: Dict[int, List[Dict[str, Any]]] = {}
+        self._questions_by_id: Dict[int, Dict[str, Any]] = {}
+        self._next_id = CREATED_IDS
+
+        self.app = web.Application(middlewares=[self._count, self._inject])
+        routes = {
+            cm.Endpoints.LOGIN: self.login,
+            cm.Endpoints.USER_PROFILE: self.profile,
+            cm.Endpoints.EXPORT_START: self.export_start,
+            cm.Endpoints.EXPORT_PROGRESS: self.export_progress,
+            cm.Endpoints.EXPORT_DONE: self.export_done,
+            cm.Endpoints.QUOTAS: self.quotas,
+            cm.Endpoints.POLL_DESCRIPTION_SOURCES: self.poll_description,
+            cm.Endpoints.SEARCH_POLS: self.search,
+            cm.Endpoints.STATISTIC: self.statistic,
+            cm.Endpoints.CONVERSION: self.conversion,
+            cm.Endpoints.PERSONAL_LINKS: self.links,
+            cm.Endpoints.QUESTIONS_BY_POLL: self.questions_by_poll,
+            cm.Endpoints.QUESTIONS_BY_BLOCK: self.questions_by_block,
+            cm.Endpoints.BLOCKS_IN_POLL: self.blocks,
+            CREATE_ENDPOINTS.block: self.create_block,
+            CREATE_ENDPOINTS.question: self.create_question,
+            CREATE_ENDPOINTS.answer: self.create_answer,
+        }
+        for endpoint, handler in routes.items():
+            self.app.router.add_post(f"/{getattr(endpoint, 'value', endpoint)}", handler)
+        self.app.router.add_get(f"/{cm.Endpoints.DOWNLOAD_POLL.value}/{{name}}", self.download)
+
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockSocpanel":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler):
+        self.hits[request.path] += 1
+        return await handler(request)
+
+    def faults_for(self, path: str) -> Optional[Faults]:
+        faults = self.config.faults
+        if not faults:
+            return None
+        endpoint = path.strip("/")
+        if endpoint.startswith(cm.Endpoints.DOWNLOAD_POLL.value + "/"):
+            endpoint = cm.Endpoints.DOWNLOAD_POLL.value
+        return faults.get(endpoint, faults.get("*"))
+
+    def _roll(self, rate: float) -> bool:
+        return rate > 0 and self._random.random() < rate
+
+    @web.middleware
+    async def _inject(self, request: web.Request, handler):
+        faults = self.faults_for(request.path)
+        if faults is None:
+            return await handler(request)
+
+        delay = faults.latency
+        if faults.latency_jitter:
+            delay += self._random.expovariate(1 / faults.latency_jitter)
+        if self._roll(faults.slow_rate):
+            delay += faults.slow_latency
+        if delay:
+            await asyncio.sleep(delay)
+
+        path = request.path
+        if self._bursts[path] > 0 or self._roll(faults.error_rate):
+            if self._bursts[path] > 0:
+                self._bursts[path] -= 1
+            else:
+                self._bursts[path] = faults.error_burst
+            self.injected["error", path] += 1
+            raise web.HTTPInternalServerError()
+        if self._roll(faults.unauthorized_rate):
+            self.injected["unauthorized", path] += 1
+            self.token = uuid_lib.uuid4().hex
+            raise web.HTTPUnauthorized()
+        if self._roll(faults.drop_rate):
+            self.injected["drop", path] += 1
+            request.transport.abort()
+            raise asyncio.CancelledError()
+
+        if self._roll(faults.truncate_rate):
+            request[FAULT_KEY] = "truncate"
+        elif self._roll(faults.stall_rate):
+            request[FAULT_KEY] = "stall"
+        return await handler(request)
+
+    @staticmethod
+    def result(value: Any) -> web.Response:
+        return web.json_response({"result": value, "error": ""})
+
+    def authorized(self, request: web.Request) -> None:
+        if request.headers.get("Authorization") != self.token:
+            raise web.HTTPUnauthorized()
+
+    async def payload(self, request: web.Request) -> Dict[str, Any]:
+        self.authorized(request)
+        return await request.json() if request.can_read_body else {}
+
+
+    # auth
+    async def login(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get("login") or not body.get("password"):
+            raise web.HTTPLocked()
+        return self.result({"session_token": self.token})
+
+    async def profile(self, request: web.Request) -> web.Response:
+        await self.payload(request)
+        return self.result({"id": 1, "login": "mock", "meta": [1]})
+
+
+    # export cycle
+    async def export_start(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        latency = self.config.export_latency + self._random.uniform(0, self.config.export_jitter)
+        export_uuid = uuid_lib.uuid4().hex
+        self.exports[export_uuid] = {
+            "uuid": export_uuid,
+            "params": {"poll_id": body["poll_id"]},
+            "ready_at": time.monotonic() + latency,
+        }
+        return self.result({"uuid": export_uuid})
+
+    async def export_progress(self, request: web.Request) -> web.Response:
+        await self.payload(request)
+        now = time.monotonic()
+        return self.result([
+            {
+                "uuid": e["uuid"],
+                "params": e["params"],
+                "status": "done" if now >= e["ready_at"] else "in_progress",
+            }
+            for e in self.exports.values()
+        ])
+
+    async def export_done(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        self.exports.pop(body.get("uuid"), None)
+        return self.result(True)
+
+    async def download(self, request: web.Request) -> web.StreamResponse:
+        export_uuid = request.match_info["name"].rsplit(".", 1)[0]
+        if export_uuid not in self.exports:
+            raise web.HTTPNotFound()
+
+        size = self.config.file_size
+        response = web.StreamResponse(headers={"Content-Type": "application/octet-stream"})
+        response.content_length = size
+        await response.prepare(request)
+        fault = request.get(FAULT_KEY)
+        if fault is None:
+            await self._write(response, size)
+            await response.write_eof()
+            return response
+
+        await self._write(response, size // 2)
+        self.injected[fault, f"/{cm.Endpoints.DOWNLOAD_POLL.value}"] += 1
+        if fault == "truncate":
+            request.transport.abort()
+            return response
+        await asyncio.sleep(self.faults_for(request.path).stall)
+        await self._write(response, size - size // 2)
+        await response.write_eof()
+        return response
+
+    async def _write(self, response: web.StreamResponse, size: int) -> None:
+        chunk = self._blob(self.config.file_chunk)
+        while size > 0:
+            part = chunk[:size]
+            await response.write(part)
+            size -= len(part)
+
+    def _blob(self, size: int) -> bytes:
+        if size not in self._blobs:
+            self._blobs[size] = self._random.randbytes(size)
+        return self._blobs[size]
+
+
+    # poll metadata
+    def sources(self, poll_id: int) -> List[Dict[str, Any]]:
+        return [
+            {"id": poll_id * 100 + i, "name": f"source {i}"}
+            for i in range(self.config.sources_per_poll)
+        ]
+
+    async def poll_description(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        poll_id = body["id"]
+        return self.result({"id": poll_id, "name": f"poll {poll_id}", "sources": self.sources(poll_id)})
+
+    async def quotas(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        poll_id = body["poll_id"]
+        sources = [s["id"] for s in self.sources(poll_id)]
+        return self.result([
+            {
+                "id": poll_id * 1000 + i,
+                "name": f"quota {i}",
+                "hits": (poll_id + i) % 50,
+                "quota": 50,
+                "source_ids": sources[:1 + i % len(sources)] if sources else [],
+            }
+            for i in range(self.config.quotas_per_poll)
+        ])
+
+    def block_ids(self, poll_id: int) -> List[int]:
+        generated = [poll_id * 100 + b for b in range(self.config.blocks_per_poll)]
+        return generated + [b["id"] for b in self.created_blocks.get(poll_id, [])]
+
+    async def blocks(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        poll_id = body["poll_id"]
+        return self.result([
+            {"id": poll_id * 100 + i, "poll_id": poll_id, "order": i, "title": f"block {i}"}
+            for i in range(self.config.blocks_per_poll)
+        ] + self.created_blocks.get(poll_id, []))
+
+    def questions(self, block_id: int) -> List[Dict[str, Any]]:
+        if block_id > CREATED_IDS:
+            return self.created_questions.get(block_id, [])
+        types = (1, 2, 4, 7, 3)
+        questions = []
+        for q in range(self.config.questions_per_block):
+            q_id = block_id * 1000 + q
+            questions.append({
+                "id": q_id,
+                "block_id": block_id,
+                "order": q,
+                "type_id": types[q % len(types)],
+                "title": f"question {q_id}",
+                "answers": [
+                    {"id": q_id * 100 + a, "question_id": q_id, "order": a, "has_input": a == 0 and q % 3 == 0}
+                    for a in range(self.config.answers_per_question)
+                ],
+            })
+        return questions + self.created_questions.get(block_id, [])
+
+    async def questions_by_poll(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        if not self.config.questions_by_poll:
+            return self.result(None)
+        return self.result([q for b_id in self.block_ids(body["parent_id"]) for q in self.questions(b_id)])
+
+    async def questions_by_block(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        return self.result(self.questions(body["parent_id"]))
+
+
+    # construction, parents must exist, as on the platform
+    def new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def has_block(self, block_id: Optional[int]) -> bool:
+        if not isinstance(block_id, int):
+            return False
+        return block_id in self.block_ids(block_id // 100) or any(
+            b["id"] == block_id for blocks in self.created_blocks.values() for b in blocks
+        )
+
+    async def create_block(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        block = {**body, "id": self.new_id()}
+        self.created_blocks.setdefault(body["poll_id"], []).append(block)
+        return self.result({"id": block["id"]})
+
+    async def create_question(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        if not self.has_block(body.get("block_id")):
+            raise web.HTTPBadRequest()
+        question = {**body, "id": self.new_id(), "answers": []}
+        self.created_questions.setdefault(body["block_id"], []).append(question)
+        self._questions_by_id[question["id"]] = question
+        return self.result({"id": question["id"]})
+
+    async def create_answer(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        question = self._questions_by_id.get(body.get("question_id"))
+        if question is None:
+            raise web.HTTPBadRequest()
+        answer = {**body, "id": self.new_id()}
+        question["answers"].append(answer)
+        return self.result({"id": answer["id"]})
+
+
+    # search and statistics
+    async def search(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        offset, limit = body.get("offset") or 0, body.get("limit") or 51
+        end = min(offset + limit, self.config.search_results)
+        return self.result([
+            {"id": i, "name": f"poll {i}", "status_id": 1, "num": i}
+            for i in range(offset + 1, end + 1)
+        ])
+
+    async def statistic(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        poll_id = body.get("id", 0)
+        return self.result({
+            "ended_count": poll_id * 3 % 97,
+            "started_count": poll_id * 5 % 131,
+            "disqualified_count": poll_id % 7,
+        })
+
+    async def conversion(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        poll_id = body.get("id") or body.get("poll_id") or 0
+        return self.result({"poll_id": poll_id, "conversion": (poll_id % 100) / 100})
+
+    async def links(self, request: web.Request) -> web.Response:
+        body = await self.payload(request)
+        poll_id, count = body["poll_id"], max(body["link_count"] - self.config.links_short, 0)
+        return self.result([f"https://mock.local/p/{poll_id}/{uuid_lib.uuid4().hex}" for _ in range(count)])
+
+
+async def serve(port: int, config: MockConfig) -> None:
+    server = MockSocpanel(config)
+    await server.start(port=port)
+    print(f"mock socpanel on {server.url}, token {TOKEN!r}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--export-latency", type=float, default=0.5)
+    parser.add_argument("--file-size", type=int, default=256 * 1024)
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, MockConfig(export_latency=args.export_latency, file_size=args.file_size)))
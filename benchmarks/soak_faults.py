@@ -0,0 +1,160 @@
+"""
+Soak runs of the client against the platform stand-in with injected faults.
+
+Every profile runs on a fresh mock server with its own fault configuration:
+  download  download_poll of --polls polls, bounded by --timeout
+  fan-out   get_statistics_many and map_question_ids_many over --fanout polls
+and reports the completion rate, failed and hung work, retries, re-logins, request tail
+latency and per poll latency. Exits with status 1 when a download batch hangs or a profile
+completes less than --min-completion of its work (95% by default, the fault rates of the
+profiles leave about 97% completed).
+
+    python benchmarks/soak_faults.py [--profiles errors,auth,drops] [--polls 50] [--fanout 200]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from socapi import SocAPIClient, DownloadTrace, expeptions
+from socapi._metrics import LatencyHistogram
+from socapi.models import _client_model as cm
+from mock_socpanel import MockSocpanel, MockConfig, Faults
+
+DOWNLOAD = cm.Endpoints.DOWNLOAD_POLL.value
+PROGRESS = cm.Endpoints.EXPORT_PROGRESS.value
+
+PROFILES = {
+    "baseline": {},
+    # 500 bursts on every endpoint, retried as PlatformError
+    "errors": {"*": Faults(error_rate=0.05, error_burst=1)},
+    # sessions revoked mid batch, every request in flight logs in again
+    "auth": {"*": Faults(unauthorized_rate=0.03)},
+    # slow export progress and a heavy latency tail everywhere
+    "slow": {
+        "*": Faults(latency_jitter=0.02, slow_rate=0.01, slow_latency=1.0),
+        PROGRESS: Faults(latency=0.5, latency_jitter=0.5),
+    },
+    # connections closed without an answer
+    "drops": {"*": Faults(drop_rate=0.02)},
+    # downloads cut halfway or stalled
+    "transfers": {DOWNLOAD: Faults(truncate_rate=0.1, stall_rate=0.1, stall=2.0)},
+    "mixed": {
+        "*": Faults(error_rate=0.02, error_burst=2, unauthorized_rate=0.005, drop_rate=0.01, latency_jitter=0.01),
+        DOWNLOAD: Faults(error_rate=0.02, truncate_rate=0.05, stall_rate=0.05, stall=2.0),
+    },
+}
+
+
+def merged_histogram(metrics) -> LatencyHistogram:
+    merged = LatencyHistogram()
+    for m in metrics.requests.values():
+        for i, n in enumerate(m.latency.counts):
+            merged.counts[i] += n
+        merged.count += m.latency.count
+        merged.sum += m.latency.sum
+        merged.max = max(merged.max, m.latency.max)
+    return merged
+
+
+async def soak_download(client: SocAPIClient, polls: int, file_size: int, timeout: float) -> dict:
+    trace = DownloadTrace()
+    failed, hung = set(), False
+    with tempfile.TemporaryDirectory() as export_dir:
+        try:
+            await asyncio.wait_for(
+                client.download_poll(list(range(1, polls + 1)), export_dir=export_dir, trace=trace),
+                timeout,
+            )
+        except expeptions.FailedDownloadPolls as e:
+            failed = set(e.failed_ids)
+        except asyncio.TimeoutError:
+            hung = True
+        complete = sum(
+            1 for p in range(1, polls + 1)
+            if (f := Path(export_dir, f"poll_{p}.sav")).exists() and f.stat().st_size == file_size
+        )
+
+    per_poll = sorted(
+        max(s.end or s.start for s in spans) - min(s.start for s in spans)
+        for spans in trace.polls().values()
+    )
+    return {
+        "complete": complete,
+        "failed": len(failed),
+        "hung": hung,
+        "poll_p99": per_poll[min(len(per_poll) - 1, int(len(per_poll) * 0.99))] if per_poll else None,
+    }
+
+
+async def soak_fanout(client: SocAPIClient, polls: int) -> dict:
+    stats = await client.get_statistics_many(range(1, polls + 1))
+    mapped, errors = 0, 0
+    async for _, columns in client.map_question_ids_many(range(1, polls + 1)):
+        if isinstance(columns, Exception):
+            errors += 1
+        else:
+            mapped += 1
+    return {"complete": len(stats.results) + mapped, "failed": len(stats.errors) + errors, "total": 2 * polls}
+
+
+async def run_profile(name: str, args) -> dict:
+    config = MockConfig(export_latency=args.export_latency, file_size=args.file_size, faults=PROFILES[name])
+    async with MockSocpanel(config) as server:
+        client = await SocAPIClient.from_credentials("online-sociology", "soak", "soak", url_override=server.url)
+        metrics = client.enable_metrics()
+
+        started = time.perf_counter()
+        download = await soak_download(client, args.polls, args.file_size, args.timeout)
+        fanout = await soak_fanout(client, args.fanout)
+        wall = time.perf_counter() - started
+
+        latency = merged_histogram(metrics)
+        return {
+            "profile": name,
+            "download": download,
+            "fanout": fanout,
+            "completion": (download["complete"] + fanout["complete"]) / (args.polls + fanout["total"]),
+            "retries": sum(m.retries for m in metrics.requests.values()),
+            "errors": sum(m.errors for m in metrics.requests.values()),
+            "relogins": server.hits[f"/{cm.Endpoints.LOGIN.value}"] - 1,
+            "injected": sum(server.injected.values()),
+            "p50": latency.quantile(0.5),
+            "p99": latency.quantile(0.99),
+            "wall": wall,
+        }
+
+
+async def main(args) -> int:
+    print(
+        f"{'profile':<10} {'done %':>7} {'dl ok':>6} {'dl fail':>7} {'hung':>5} {'fan ok':>7} {'faults':>7} "
+        f"{'retries':>7} {'errors':>7} {'relogin':>7} {'p50 ms':>7} {'p99 ms':>7} {'poll p99':>8} {'wall s':>7}"
+    )
+    failed = False
+    for name in args.profiles.split(","):
+        r = await run_profile(name, args)
+        d, f = r["download"], r["fanout"]
+        poll_p99 = f"{d['poll_p99']:.2f}" if d["poll_p99"] is not None else "-"
+        print(
+            f"{name:<10} {r['completion'] * 100:>7.1f} {d['complete']:>6} {d['failed']:>7} {str(d['hung']):>5} "
+            f"{f['complete']:>7} {r['injected']:>7} {r['retries']:>7} {r['errors']:>7} {r['relogins']:>7} "
+            f"{(r['p50'] or 0) * 1000:>7.1f} {(r['p99'] or 0) * 1000:>7.1f} {poll_p99:>8} {r['wall']:>7.1f}"
+        )
+        failed |= d["hung"] or r["completion"] < args.min_completion
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--fanout", type=int, default=200)
+    parser.add_argument("--export-latency", type=float, default=0.2)
+    parser.add_argument("--file-size", type=int, default=64 * 1024)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds before a download batch counts as hung")
+    parser.add_argument("--min-completion", type=float, default=0.95)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,42 +1,68 @@
-import asyncio
-from http import HTTPMethod
+from typing import TYPE_CHECKING
+import importlib
 
-from pydantic import validate_call
+from . import expeptions
 
-from . import utils
+# public names and the submodules defining them, imported on first access so that
+# `import socapi` stays cheap and does not pull aiohttp, pydantic or numpy
+_LAZY_ATTRS = {
+    "SocAPIClient": "._client",
+    "Downloader": "._downloader",
+    "Statistic": "._statistic",
+    "Searcher": "._searcher",
+    "Links": "._links",
+    "MetaParser": "._meta_parser",
+    "Constructor": "._constructor",
+    "PollSchema": "._schema",
+    "SchemaCache": "._schema_cache",
+    "LocalCrosstab": "._crosstab",
+    "ActivityState": "._activity",
+    "SnapshotStore": "._snapshots",
+    "SnapshotCollector": "._snapshots",
+    "MetricsCollector": "._metrics",
+    "RequestEvent": ".models._metrics_models",
+    "DownloadTrace": "._tracing",
+    "DownloadProgress": "._progress",
+    "LoopLagMonitor": "._loop_monitor",
+    "RecordingTransport": "._transport",
+    "ReplayTransport": "._transport",
+}
+_LAZY_MODULES = {"utils"}
 
-from ._downloader import Downloader
-from ._statistic import Statistic
-from ._searcher import Searcher
-from ._links import Links
-from ._meta_parser import MetaParser
+__all__ = ["expeptions", *_LAZY_MODULES, *_LAZY_ATTRS]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    if name in _LAZY_MODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-from .models import _client_model as cm
-from . import expeptions
 
-import sys
-if sys.platform == "win32":
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-
-class SocAPIClient(cm.ClientModel, Downloader, Statistic, Searcher, Links, MetaParser):
-
-    @validate_call
-    @cm.validate_login
-    async def has_completes(self, poll_id:int) -> bool:
-
-        payload = {
-            "is_poll_complete": True,
-            "is_poll_in_progress": True,
-            "domain_ids": [1],
-            "id": poll_id
-        }
-        r = await self._request(
-            method=HTTPMethod.POST,
-            endpoint=cm.Endpoints.STATISTIC,
-            payload=payload,
-            request_name=cm.RequestNames.EMPTY_POLL,
-            headers=self.headers,
-            extract_result=True
-        )
-
-        return r["ended_count"] > 0
\ No newline at end of file
+if TYPE_CHECKING:
+    from . import utils
+    from ._client import SocAPIClient
+    from ._downloader import Downloader
+    from ._statistic import Statistic
+    from ._searcher import Searcher
+    from ._links import Links
+    from ._meta_parser import MetaParser
+    from ._constructor import Constructor
+    from ._schema import PollSchema
+    from ._schema_cache import SchemaCache
+    from ._crosstab import LocalCrosstab
+    from ._activity import ActivityState
+    from ._snapshots import SnapshotStore, SnapshotCollector
+    from ._metrics import MetricsCollector
+    from .models._metrics_models import RequestEvent
+    from ._tracing import DownloadTrace
+    from ._progress import DownloadProgress
+    from ._loop_monitor import LoopLagMonitor
+    from ._transport import RecordingTransport, ReplayTransport
@@ -0,0 +1,55 @@
+from typing import Dict, Any, Optional, Iterable, Sequence
+from pathlib import Path
+import json
+import time
+
+from . import utils
+from .models import _stat_models as sm
+
+
+def extract_counters(statistics: Dict[str, Any], counters: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    if counters is not None:
+        return {c: statistics.get(c) or 0 for c in counters}
+    # every integer *_count field of the statistics response
+    return {k: v for k, v in statistics.items() if k.endswith("_count") and isinstance(v, int)}
+
+
+def counters_delta(poll_id: int, previous: Optional[Dict[str, int]], current: Dict[str, int]) -> Optional[sm.ActivityDelta]:
+    previous = previous or {}
+    deltas = {k: v - previous.get(k, 0) for k, v in current.items() if v != previous.get(k, 0)}
+    if not deltas:
+        return None
+    return sm.ActivityDelta(poll_id=poll_id, counters=current, deltas=deltas, first_seen=not previous)
+
+
+class ActivityState:
+    """Last seen statistic counters per poll, persisted as one json file."""
+
+    def __init__(self, path: Optional[str | Path] = None):
+        self.path = Path(path) if path is not None else None
+        self.polls: Dict[int, Dict[str, Any]] = {}
+
+        if self.path is not None and self.path.exists():
+            raw = json.loads(self.path.read_text())
+            self.polls = {int(k): v for k, v in raw.items()}
+
+
+    def counters(self, poll_id: int) -> Optional[Dict[str, int]]:
+        entry = self.polls.get(poll_id)
+        return entry["counters"] if entry is not None else None
+
+
+    def commit(self, deltas: Iterable[sm.ActivityDelta]) -> None:
+        now = time.time()
+        for d in deltas:
+            self.polls[d.poll_id] = {"counters": d.counters, "seen_at": now}
+        self.save()
+
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        utils.create_sub_dirs(self.path)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.polls))
+        tmp_path.replace(self.path)
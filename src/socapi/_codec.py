@@ -0,0 +1,156 @@
+from typing import Any, Callable, List, Optional
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """Standard library json, used when no faster codec is installed."""
+    name = "json"
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+
+def default_codec() -> JsonCodec:
+    return OrjsonCodec() if orjson is not None else JsonCodec()
+
+
+QUOTE, BACKSLASH = ord('"'), ord("\\")
+OPENING, CLOSING = b"{[", b"}]"
+COMMA, COLON = ord(","), ord(":")
+WHITESPACE = b" \t\r\n"
+
+
+class JsonArrayItems:
+    """
+    Incremental parser for the array under a top-level key of a json object,
+    e.g. {"error": "", "result": [{...}, {...}]}.
+
+    Bytes are fed in chunks as they arrive, every complete item is decoded on its own,
+    and consumed bytes are dropped, so the whole document is never held in memory.
+    """
+
+    def __init__(self, loads: Callable[[bytes], Any], key: str = "result"):
+        self.loads = loads
+        self.key = key.encode()
+        self.found = False
+        self.done = False
+
+        self._buf = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._last_string: Optional[bytes] = None
+        self._pending_key: Optional[bytes] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._item_is_scalar = False
+
+
+    def _in_items(self) -> bool:
+        return self._array_depth is not None and self._depth == self._array_depth
+
+
+    def feed(self, data: bytes) -> List[Any]:
+        self._buf += data
+        buf = self._buf
+        items = []
+
+        i = self._pos
+        while i < len(buf) and not self.done:
+            c = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == BACKSLASH:
+                    self._escape = True
+                elif c == QUOTE:
+                    self._in_string = False
+                    if self._in_items() and self._item_start == self._string_start:
+                        items.append(self.loads(bytes(buf[self._item_start:i + 1])))
+                        self._item_start = None
+                    elif self._depth == 1:
+                        self._last_string = bytes(buf[self._string_start + 1:i])
+                    self._string_start = None
+
+            elif c == QUOTE:
+                self._in_string = True
+                self._string_start = i
+                if self._in_items() and self._item_start is None:
+                    self._item_start, self._item_is_scalar = i, False
+
+            elif c in OPENING:
+                if self._in_items() and self._item_start is None:
+                    self._item_start, self._item_is_scalar = i, False
+                if self._array_depth is None and self._depth == 1 and c == OPENING[1] and self._pending_key == self.key:
+                    self._array_depth = self._depth + 1
+                    self.found = True
+                self._depth += 1
+
+            elif c in CLOSING:
+                if self._in_items() and self._item_start is not None and self._item_is_scalar:
+                    items.append(self.loads(bytes(buf[self._item_start:i])))
+                    self._item_start = None
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if self._in_items() and self._item_start is not None:
+                        items.append(self.loads(bytes(buf[self._item_start:i + 1])))
+                        self._item_start = None
+                    elif self._depth == self._array_depth - 1:
+                        self.done = True
+
+            elif c == COMMA:
+                if self._in_items() and self._item_start is not None and self._item_is_scalar:
+                    items.append(self.loads(bytes(buf[self._item_start:i])))
+                    self._item_start = None
+                if self._depth == 1:
+                    self._pending_key = None
+
+            elif c == COLON:
+                if self._depth == 1:
+                    self._pending_key = self._last_string
+
+            elif c not in WHITESPACE:
+                if self._in_items() and self._item_start is None:
+                    self._item_start, self._item_is_scalar = i, True
+
+            i += 1
+
+        # drop consumed bytes, keep the unfinished item or key string
+        starts = [s for s in (self._item_start, self._string_start) if s is not None]
+        keep = min(starts) if starts else i
+        del buf[:keep]
+        self._pos = i - keep
+        if self._item_start is not None:
+            self._item_start -= keep
+        if self._string_start is not None:
+            self._string_start -= keep
+
+        return items
+
+
+    def close(self) -> None:
+        if not self.found:
+            raise ValueError(f"Response has no list under {self.key.decode()!r}")
+        if not self.done:
+            raise ValueError("Response ended before the list was complete")
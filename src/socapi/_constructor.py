@@ -1,11 +1,36 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Dict, Any, Union, Callable, Optional
 
 if TYPE_CHECKING:
     from __init__ import SocAPIClient
 
 import asyncio
+from http import HTTPMethod
 
 from . import utils
+from . import expeptions
+from .models import _client_model as cm
+from .models import _constructor_models as ccm
+
+
+class OrderIndex:
+    """Next free block and question orders of a poll, computed once instead of find_last_item scans."""
+
+    def __init__(self, blocks: List[Dict[str, Any]], questions: List[List[Dict[str, Any]]]):
+        self._last_block = max((b.get("order") or 0 for b in blocks), default=0)
+        self._last_question: Dict[Union[int, str], int] = {
+            b["id"]: max((q.get("order") or 0 for q in block_questions), default=0)
+            for b, block_questions in zip(blocks, questions)
+        }
+
+
+    def next_block(self) -> int:
+        self._last_block += 1
+        return self._last_block
+
+
+    def next_question(self, block: Union[int, str]) -> int:
+        self._last_question[block] = self._last_question.get(block, 0) + 1
+        return self._last_question[block]
 
 
 class Constructor:
@@ -13,9 +38,10 @@ class Constructor:
     A class to handle creating and modifying poll questions from a socpanel API.
 
     Expects the main class to define:
-    - self._headers: headers for requests.
+    - self.headers: headers for requests.
     - self._login(): method to login in panel.
     - self._request(): method to send generic requests.
+    - self._fetch_poll_structure(): method to read blocks and questions of a poll.
 
     Attributes:
     -----------
@@ -24,8 +50,121 @@ class Constructor:
 
     Methods:
     --------
-
+    build_questionnaire(poll_id, plan, endpoints, limit):
+        Experimental. Creates blocks, questions and answers of a declarative plan, returns server ids by local keys.
     """
 
+    @cm.validate_login
+    async def _create_item(
+            self: "SocAPIClient",
+            endpoint: str,
+            request_name: cm.RequestNames,
+            payload: Dict[str, Any],
+            id_key: str,
+    ) -> int:
+        r = await self._request(
+            method=HTTPMethod.POST,
+            endpoint=endpoint,
+            payload=payload,
+            headers=self.headers,
+            request_name=request_name,
+            extract_result=True,
+        )
+        if not isinstance(r, dict) or id_key not in r:
+            raise ValueError(f"{cm.RequestNames(request_name).value}: no {id_key!r} in the result {r!r}")
+        return r[id_key]
+
+
+    async def build_questionnaire(
+            self: "SocAPIClient",
+            poll_id: int,
+            plan: Union[ccm.ConstructionPlan, Dict[str, Any]],
+            endpoints: Union[ccm.CreateEndpoints, Dict[str, str]],
+            limit: int = cm.MAX_CONCURRENT_CONSTRUCT_REQUESTS,
+    ) -> ccm.ConstructionResult:
+        """
+        Create the blocks, questions and answers of `plan` in one pass.
+
+        Experimental: the create requests are not part of the documented API, so their paths
+        and the key of the new id come from the caller as `endpoints`. Payloads use the field
+        names of the read requests (poll_id, block_id, question_id, type_id, order).
+
+        Orders are assigned up front from one read of the poll structure: new blocks go after
+        the last block, new questions after the last question of their block, in plan order.
+        Items are then submitted concurrently (at most `limit` requests at once), each one
+        as soon as its parent exists. Items whose parent failed are reported with
+        DependencyFailedError.
+        """
+        plan = ccm.ConstructionPlan.model_validate(plan)
+        endpoints = ccm.CreateEndpoints.model_validate(endpoints)
+
+        blocks, questions = await self._fetch_poll_structure(poll_id)
+        index = OrderIndex(blocks, questions)
+
+        semaphore = asyncio.Semaphore(limit)
+        loop = asyncio.get_running_loop()
+        created: Dict[str, asyncio.Future] = {}
+
+        async def create(
+                key: str,
+                parent: Optional[Union[int, str]],
+                endpoint: str,
+                request_name: cm.RequestNames,
+                make_payload: Callable[[Optional[int]], Dict[str, Any]],
+        ):
+            future = created[key]
+            try:
+                parent_id = parent
+                if isinstance(parent, str):
+                    try:
+                        parent_id = await asyncio.shield(created[parent])
+                    except Exception:
+                        raise expeptions.DependencyFailedError(key, parent)
+
+                async with semaphore:
+                    future.set_result(await self._create_item(
+                        endpoint, request_name, make_payload(parent_id), endpoints.id_key
+                    ))
+            except Exception as e:
+                future.set_exception(e)
+
+        jobs = []
+
+        for b in plan.blocks:
+            created[b.key] = loop.create_future()
+            payload = {**b.model_dump(exclude={"key"}, exclude_none=True), "poll_id": poll_id, "order": index.next_block()}
+            jobs.append(create(
+                b.key, None, endpoints.block, cm.RequestNames.BLOCK_CREATE,
+                lambda _, payload=payload: payload,
+            ))
+
+        for q in plan.questions:
+            created[q.key] = loop.create_future()
+            payload = {
+                **q.model_dump(exclude={"key", "type", "block", "answers"}),
+                "type_id": q.type_id,
+                "order": index.next_question(q.block),
+            }
+            jobs.append(create(
+                q.key, q.block, endpoints.question, cm.RequestNames.QUESTION_CREATE,
+                lambda block_id, payload=payload: {**payload, "block_id": block_id},
+            ))
+
+            for order, a in enumerate(q.answers, start=1):
+                created[a.key] = loop.create_future()
+                payload = {**a.model_dump(exclude={"key"}), "order": order}
+                jobs.append(create(
+                    a.key, q.key, endpoints.answer, cm.RequestNames.ANSWER_CREATE,
+                    lambda question_id, payload=payload: {**payload, "question_id": question_id},
+                ))
+
+        await asyncio.gather(*jobs)
 
+        result = ccm.ConstructionResult()
+        for key, future in created.items():
+            if future.exception() is not None:
+                result.errors[key] = future.exception()
+            else:
+                result.ids[key] = future.result()
 
+        return result
@@ -0,0 +1,272 @@
+from typing import List, Dict, Any, Optional, Union, Iterable, Mapping, Hashable, Sequence, BinaryIO
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+import tempfile
+
+# numpy is optional and heavy to import, loaded with the first LocalCrosstab
+np = None
+
+from ._schema import PollSchema, NO_ID
+from .models import _meta_parser_models as mpm
+from .models import _download_models as dm
+
+DATE_COLUMN = "date_created"
+
+
+def _require_numpy() -> None:
+    global np
+    if np is not None:
+        return
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Local crosstabs require numpy, install socapi[local]")
+    np = numpy
+
+
+def read_poll_file(source: Union[str, Path, bytes, BinaryIO], export_format: Optional[str] = None):
+    """Read a downloaded .sav/.xlsx export (path, bytes or binary buffer) into a pandas DataFrame."""
+    import pandas as pd
+
+    if isinstance(source, (str, Path)):
+        export_format = export_format or Path(source).suffix.lstrip(".").lower()
+    elif export_format is None:
+        raise ValueError("export_format is required when reading from a buffer")
+
+    if isinstance(source, bytes):
+        import io
+        source = io.BytesIO(source)
+
+    match export_format:
+        case "xlsx" | "xls":
+            return pd.read_excel(source)
+        case "sav" | "zsav":
+            if isinstance(source, (str, Path)):
+                return pd.read_spss(source, convert_categoricals=False)
+            # spss readers only accept paths
+            with tempfile.NamedTemporaryFile(suffix=f".{export_format}") as f:
+                f.write(source.read())
+                f.flush()
+                return pd.read_spss(f.name, convert_categoricals=False)
+        case _:
+            raise ValueError(f"Unsupported export format: {export_format!r}")
+
+
+@dataclass
+class LocalDistribution:
+    question_id: int
+    # answer ids, or raw codes when the schema does not know the answers of a single column question
+    answer_ids: "np.ndarray"
+    counts: "np.ndarray"
+    weighted: "np.ndarray"
+    base: int
+    weighted_base: float
+
+    @property
+    def shares(self) -> "np.ndarray":
+        if not self.weighted_base:
+            return np.zeros(len(self.weighted))
+        return self.weighted / self.weighted_base
+
+
+    def to_dict(self) -> Dict[int, int]:
+        return dict(zip(self.answer_ids.tolist(), self.counts.tolist()))
+
+
+class LocalCrosstab:
+    """
+    Distributions computed locally from a downloaded poll instead of filtered statistic requests.
+
+    Data columns are matched to schema columns by position, i.e. the export must have the
+    layout returned by map_question_ids. Multi-column questions (multipunch, one_in_row,
+    mult_in_row) count an answer as chosen when its column is non-empty and non-zero.
+    Single-column questions compare the column value with the answer code: answer ids by
+    default, or `answer_codes` ({answer_id: code}) when the export uses other codes.
+    """
+
+    def __init__(
+            self,
+            data: Any,
+            schema: Union[PollSchema, Sequence[tuple]],
+            weights: Optional[Sequence[float]] = None,
+            answer_codes: Optional[Mapping[int, float]] = None,
+    ):
+        _require_numpy()
+
+        self.schema = schema if isinstance(schema, PollSchema) else PollSchema(schema)
+        self._data = data
+        self._columns: Dict[int, "np.ndarray"] = {}
+        self.answer_codes = dict(answer_codes or {})
+
+        width = data.shape[1]
+        if width != len(self.schema):
+            raise ValueError(f"Data has {width} columns, schema expects {len(self.schema)}")
+
+        self.n = data.shape[0]
+        self.weights = np.ones(self.n) if weights is None else np.asarray(weights, dtype=float)
+        if len(self.weights) != self.n:
+            raise ValueError("weights must have one value per respondent")
+
+
+    @classmethod
+    def from_file(
+            cls,
+            source: Union[str, Path, bytes, BinaryIO],
+            schema: Union[PollSchema, Sequence[tuple]],
+            export_format: Optional[str] = None,
+            **kwargs: Any,
+    ) -> "LocalCrosstab":
+        return cls(read_poll_file(source, export_format), schema, **kwargs)
+
+
+    def _column(self, pos: int) -> "np.ndarray":
+        if pos not in self._columns:
+            if hasattr(self._data, "iloc"):
+                import pandas as pd
+                values = pd.to_numeric(self._data.iloc[:, pos], errors="coerce").to_numpy(dtype=float)
+            else:
+                values = np.asarray(self._data[:, pos], dtype=float)
+            self._columns[pos] = values
+        return self._columns[pos]
+
+
+    def _dates(self) -> "np.ndarray":
+        pos = next((p for p, name in self.schema.technical_columns().items() if name == DATE_COLUMN), None)
+        if pos is None:
+            raise KeyError(f"Schema has no {DATE_COLUMN} column")
+        if hasattr(self._data, "iloc"):
+            import pandas as pd
+            dates = pd.to_datetime(self._data.iloc[:, pos], errors="coerce")
+            if dates.dt.tz is not None:
+                dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+            return dates.to_numpy(dtype="datetime64[ns]")
+        return np.asarray(self._data[:, pos], dtype="datetime64[ns]")
+
+
+    def _is_multicolumn(self, question_id: int) -> bool:
+        return any(
+            self.schema.answer_ids[p] != NO_ID and self.schema.answer_types[p] == mpm.AnswerTypes.data.value
+            for p in self.schema.columns_for_question(question_id)
+        )
+
+
+    def _data_column(self, question_id: int, answer_id: Optional[int] = None) -> int:
+        for pos in self.schema.columns_for_question(question_id):
+            if self.schema.answer_types[pos] != mpm.AnswerTypes.data.value:
+                continue
+            if answer_id is None or self.schema.answer_ids[pos] == answer_id:
+                return pos
+        raise KeyError(f"No data column for question {question_id}, answer {answer_id}")
+
+
+    def chosen(self, question_id: int, answer_id: int) -> "np.ndarray":
+        if self._is_multicolumn(question_id):
+            values = self._column(self._data_column(question_id, answer_id))
+            return ~np.isnan(values) & (values != 0)
+
+        values = self._column(self._data_column(question_id))
+        return values == self.answer_codes.get(answer_id, answer_id)
+
+
+    def answered(self, question_id: int) -> "np.ndarray":
+        if self._is_multicolumn(question_id):
+            columns = [
+                self._column(p) for p in self.schema.columns_for_question(question_id)
+                if self.schema.answer_types[p] == mpm.AnswerTypes.data.value
+            ]
+            stacked = np.vstack(columns)
+            return (~np.isnan(stacked) & (stacked != 0)).any(axis=0)
+
+        return ~np.isnan(self._column(self._data_column(question_id)))
+
+
+    def mask(
+            self,
+            questions: Optional[Iterable[dm.QuestionFilter]] = None,
+            time_from: Optional[Union[str, datetime]] = None,
+            time_to: Optional[Union[str, datetime]] = None,
+    ) -> "np.ndarray":
+        """
+        Respondent mask equivalent to the questions/from/to parts of ExportFilter:
+        each question filter matches any of its answers, filters are combined with AND.
+        """
+        result = np.ones(self.n, dtype=bool)
+
+        for q in questions or ():
+            q = q if isinstance(q, dm.QuestionFilter) else dm.QuestionFilter(**q)
+            chosen_any = np.zeros(self.n, dtype=bool)
+            for answer_id in q.answer_ids:
+                chosen_any |= self.chosen(q.question_id, answer_id)
+            result &= chosen_any
+
+        if time_from is not None or time_to is not None:
+            dates = self._dates()
+            if time_from is not None:
+                result &= dates >= _as_datetime64(time_from)
+            if time_to is not None:
+                result &= dates <= _as_datetime64(time_to)
+
+        return result
+
+
+    def filter_mask(self, filter_: dm.ExportFilter) -> "np.ndarray":
+        # is_poll_complete, utm_source etc. are not in the export data, apply them when downloading
+        return self.mask(filter_.questions, filter_.from_, filter_.to)
+
+
+    def distribution(self, question_id: int, where: Optional["np.ndarray"] = None) -> LocalDistribution:
+        where = np.ones(self.n, dtype=bool) if where is None else where
+        answers = self.schema.answers_of(question_id)
+
+        if not self._is_multicolumn(question_id) and not answers:
+            return self._code_distribution(question_id, where)
+
+        chosen = np.vstack([self.chosen(question_id, a) for a in answers]) & where
+        base = self.answered(question_id) & where
+
+        return LocalDistribution(
+            question_id=question_id,
+            answer_ids=np.asarray(answers, dtype=np.int64),
+            counts=chosen.sum(axis=1),
+            weighted=chosen @ self.weights,
+            base=int(base.sum()),
+            weighted_base=float(self.weights[base].sum()),
+        )
+
+
+    def _code_distribution(self, question_id: int, where: "np.ndarray") -> LocalDistribution:
+        values = self._column(self._data_column(question_id))
+        base = ~np.isnan(values) & where
+        codes, inverse = np.unique(values[base], return_inverse=True)
+
+        return LocalDistribution(
+            question_id=question_id,
+            answer_ids=codes.astype(np.int64),
+            counts=np.bincount(inverse, minlength=len(codes)),
+            weighted=np.bincount(inverse, weights=self.weights[base], minlength=len(codes)),
+            base=int(base.sum()),
+            weighted_base=float(self.weights[base].sum()),
+        )
+
+
+    def cell_counts(
+            self,
+            cells: Mapping[Hashable, Iterable[dm.QuestionFilter]],
+            where: Optional["np.ndarray"] = None,
+    ) -> Dict[Hashable, tuple[int, float]]:
+        """Quota style counts: each cell is the AND of its question filters, returns (count, weighted)."""
+        where = np.ones(self.n, dtype=bool) if where is None else where
+        result = {}
+        for key, conditions in cells.items():
+            cell = self.mask(conditions) & where
+            result[key] = int(cell.sum()), float(self.weights[cell].sum())
+        return result
+
+
+def _as_datetime64(value: Union[str, datetime]) -> "np.datetime64":
+    if isinstance(value, str):
+        value = dm.parse_datetime(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, "ns")
@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from __init__ import SocAPIClient
 
-from typing import List, Literal, Union, get_args, Iterable, Dict, Optional, Any, Sequence, Set
+from typing import List, Literal, Union, get_args, Iterable, Dict, Optional, Any, Sequence, Set, Callable
 import asyncio
 import warnings
 from http import HTTPMethod
@@ -12,6 +12,9 @@ import inspect
 
 from . import expeptions
 from . import utils
+from . import _tracing
+from . import _progress
+from . import _loop_monitor
 from .models import _download_models as dm
 from .models import _client_model as cm
 
@@ -82,15 +85,20 @@ async def process_progress_status(
         uuid = s["uuid"]
         poll_id = s["params"]["poll_id"]
 
+        # exports of other batches or of polls still being submitted have no event
+        ready = ready_events.get(poll_id)
+        if ready is None:
+            continue
+
         if not poll_id in poll_uuids:
             poll_uuids[poll_id] = uuid
 
         match s["status"]:
             case dm.ExportStatuses.done:
-                ready_events[poll_id].set()
+                ready.set()
             case dm.ExportStatuses.error:
                 failed_poll_ids.add(poll_id)
-                ready_events[poll_id].set()
+                ready.set()
             case _:
                 continue
 
@@ -107,46 +115,78 @@ class Downloader:
             id_queue: asyncio.Queue,
 
             export_format: dm.ExportFileFormat,
-            filter_params: dm.ExportFilter,
+            filter_params: Dict[str, Any],
 
             ready_events: Dict[int, asyncio.Event],
             poll_uuids: Dict[int, str],
             download_paths: Dict[int, Path],
             failed_poll_ids: Set[int],
+            trace: Union["_tracing.DownloadTrace", "_tracing._NoTrace"] = _tracing.NO_TRACE,
+            progress: Union["_progress.DownloadProgress", "_progress._NoProgress"] = _progress.NO_PROGRESS,
     ):
         while True:
             poll_id = await id_queue.get()
-
             try:
-                await self._export_poll_data(
-                    poll_id=poll_id,
-                    export_format=export_format,
-                    filter_=filter_params,
+                await self._process_poll(
+                    name, poll_id, export_format, filter_params,
+                    ready_events, poll_uuids, download_paths, failed_poll_ids, trace, progress,
                 )
             except Exception as e:
+                # a failed poll must not take its worker down, the batch would never join
+                failed_poll_ids.add(poll_id)
+                progress.set_state(poll_id, dm.PollState.failed)
+            finally:
+                ready_events.pop(poll_id, None)
                 id_queue.task_done()
-                continue
 
-            # Wait for the signal that this ID is ready to download
-            event = asyncio.Event()
-            ready_events[poll_id] = event
 
+    async def _process_poll(
+            self,
+            name: str,
+            poll_id: int,
+            export_format: dm.ExportFileFormat,
+            filter_params: Dict[str, Any],
+            ready_events: Dict[int, asyncio.Event],
+            poll_uuids: Dict[int, str],
+            download_paths: Dict[int, Path],
+            failed_poll_ids: Set[int],
+            trace: Union["_tracing.DownloadTrace", "_tracing._NoTrace"],
+            progress: Union["_progress.DownloadProgress", "_progress._NoProgress"],
+    ) -> None:
+        progress.set_state(poll_id, dm.PollState.exporting)
+        with trace.span("export", poll_id, worker=name):
+            await self._export_poll_data(
+                poll_id=poll_id,
+                export_format=export_format,
+                filter_=filter_params,
+            )
+
+        # Wait for the signal that this ID is ready to download
+        event = asyncio.Event()
+        ready_events[poll_id] = event
+
+        progress.set_state(poll_id, dm.PollState.waiting)
+        with trace.span("wait", poll_id):
             await event.wait()  # Wait for status_check to signal it's ready
 
+        uuid = poll_uuids[poll_id]
+        try:
             if poll_id not in failed_poll_ids:
-                server_filename = cm.FileInput(name=f"{poll_uuids[poll_id]}.{export_format.name}")
+                server_filename = cm.FileInput(name=f"{uuid}.{export_format.name}")
                 export_path = download_paths[poll_id]
 
-                await self._download_poll(
-                    server_filename=server_filename,
-                    export_path=export_path,
-                )
-
-            # release task from export
-            await self._done_export(uuid=poll_uuids[poll_id])
-
-            ready_events.pop(poll_id, None)
-            id_queue.task_done()
+                progress.set_state(poll_id, dm.PollState.transferring)
+                with trace.span("transfer", poll_id, uuid=uuid):
+                    await self._download_poll(
+                        server_filename=server_filename,
+                        export_path=export_path,
+                        on_chunk=progress.chunk_callback(poll_id),
+                    )
+        finally:
+            # release task from export, also when the transfer failed
+            with trace.span("done", poll_id, uuid=uuid, failed=poll_id in failed_poll_ids):
+                await self._done_export(uuid=uuid)
+        progress.set_state(poll_id, dm.PollState.failed if poll_id in failed_poll_ids else dm.PollState.done)
 
 
     @cm.validate_login
@@ -154,19 +194,15 @@ class Downloader:
             self: "SocAPIClient",
             poll_id: int,
             export_format: dm.ExportFileFormat,
-            filter_: dm.ExportFilter,
+            filter_: Union[dm.ExportFilter, Dict[str, Any]],
     ):
-
-        p = dm.ExportPayload(
-            poll_id=poll_id,
-            export_format=export_format,
-            filter=filter_,
-        )
+        if isinstance(filter_, dm.ExportFilter):
+            filter_ = filter_.model_dump()
 
         await self._request(
             method=HTTPMethod.POST,
             endpoint=cm.Endpoints.EXPORT_START,
-            payload=p.model_dump(),
+            payload=dm.export_payload(poll_id, export_format, filter_),
             headers=self.headers,
             request_name=cm.RequestNames.EXPORT_START
         )
@@ -184,10 +220,15 @@ class Downloader:
         return r
 
 
-    async def _status_checker(self, ready_events, poll_uuids, failed_poll_ids) -> None:
+    async def _status_checker(self, ready_events, poll_uuids, failed_poll_ids, trace=_tracing.NO_TRACE) -> None:
         while True:
             await asyncio.sleep(1)
-            statuses: List[Dict] = await self._check_export_progress()
+            try:
+                with trace.span("progress", waiting=len(ready_events)):
+                    statuses: List[Dict] = await self._check_export_progress()
+            except Exception as e:
+                # a failed check is retried on the next tick instead of stalling every worker
+                continue
             await process_progress_status(
                 statuses=statuses,
                 ready_events=ready_events,
@@ -199,13 +240,15 @@ class Downloader:
     async def _download_poll(
             self: "SocAPIClient",
             server_filename: cm.FileInput,
-            export_path: Path
+            export_path: Path,
+            on_chunk: Optional[Callable[[int, Optional[int]], Any]] = None,
     ) -> None:
         await self._download_request(
             endpoint=cm.Endpoints.DOWNLOAD_POLL,
             server_filename=server_filename,
             dest_path=export_path,
             request_name=cm.RequestNames.DOWNLOAD_POLL,
+            on_chunk=on_chunk,
         )
 
 
@@ -238,8 +281,17 @@ class Downloader:
             counters_ids: Optional[List[int]] = None,
             domain_ids: Optional[List[int]] = None,
 
-
-    ):
+            # diagnostics
+            trace: Union[bool, str, Path, "_tracing.DownloadTrace", None] = None,
+            progress: Union["_progress.DownloadProgress", Callable[[dm.ProgressEvent], Any], None] = None,
+    ) -> Optional["_tracing.DownloadTrace"]:
+        """
+        trace: True or a DownloadTrace records per poll stage spans, a path additionally writes
+        them as a chrome trace json file. The trace is returned, and written even if the batch fails.
+
+        progress: a DownloadProgress, or a callable receiving its ProgressEvents, for poll state
+        transitions, bytes received and batch throughput / ETA.
+        """
         # validations
         export_format = dm.ExportFileFormat[export_format]
 
@@ -248,17 +300,20 @@ class Downloader:
 
         export_dir = validate_path(export_dir)
 
-        filter_params = dm.ExportFilter(
-            is_poll_complete=is_poll_complete,
-            is_poll_in_progress=is_poll_in_progress,
-            questions=questions,
-            utm_source=utm_source,
-            counters_ids=counters_ids,
-            from_=time_from, # it is ok
-            to=time_to,
-            is_disqualified=is_disqualified,
-            domain_ids=domain_ids
-        )
+        with _loop_monitor.blocking_section("export filter"):
+            filter_params = dm.ExportFilter(
+                is_poll_complete=is_poll_complete,
+                is_poll_in_progress=is_poll_in_progress,
+                questions=questions,
+                utm_source=utm_source,
+                counters_ids=counters_ids,
+                from_=time_from, # it is ok
+                to=time_to,
+                is_disqualified=is_disqualified,
+                domain_ids=domain_ids
+            )
+            # same filter for every poll of the batch
+            filter_payload = filter_params.model_dump()
 
         # Queue setup
         poll_id_queue = asyncio.Queue()
@@ -270,31 +325,60 @@ class Downloader:
 
         for id_ in poll_ids: await poll_id_queue.put(id_)
 
-        workers = [
-            asyncio.create_task(self._poll_download_worker(
-                    name=f"worker-{i}",
-                    id_queue=poll_id_queue,
-                    export_format=export_format,
-                    filter_params=filter_params,
-                    ready_events=ready_events,
-                    poll_uuids=poll_uuids,
-                    download_paths=download_paths,
-                    failed_poll_ids=failed_poll_ids
+        trace_path = None
+        if isinstance(trace, (str, Path)):
+            trace_path, trace = trace, _tracing.DownloadTrace()
+        elif trace is True:
+            trace = _tracing.DownloadTrace()
+        if trace:
+            self.add_hook(trace)
+
+        if progress is None:
+            progress = _progress.NO_PROGRESS
+        elif not isinstance(progress, _progress.DownloadProgress):
+            progress = _progress.DownloadProgress(callback=progress)
+        progress.start(poll_ids)
+
+        # workers and the status checker inherit the operation for loop lag attribution
+        with _loop_monitor.operation("download_poll"):
+            workers = [
+                asyncio.create_task(self._poll_download_worker(
+                        name=f"worker-{i}",
+                        id_queue=poll_id_queue,
+                        export_format=export_format,
+                        filter_params=filter_payload,
+                        ready_events=ready_events,
+                        poll_uuids=poll_uuids,
+                        download_paths=download_paths,
+                        failed_poll_ids=failed_poll_ids,
+                        trace=trace or _tracing.NO_TRACE,
+                        progress=progress,
+                    )
                 )
-            )
-            for i in range(cm.MAX_CONCURRENT_DOWNLOAD_REQUESTS)
-        ]
+                for i in range(cm.MAX_CONCURRENT_DOWNLOAD_REQUESTS)
+            ]
 
-        # Start status checker
-        status_task = asyncio.create_task(self._status_checker(ready_events, poll_uuids, failed_poll_ids))
-
-        # Wait for queue to be processed
-        await poll_id_queue.join()
+            # Start status checker
+            status_task = asyncio.create_task(
+                self._status_checker(ready_events, poll_uuids, failed_poll_ids, trace or _tracing.NO_TRACE)
+            )
 
-        # Cancel workers and status task
-        for w in workers:
-            w.cancel()
-        status_task.cancel()
+            try:
+                # Wait for queue to be processed
+                await poll_id_queue.join()
+            finally:
+                # Cancel workers and status task
+                for w in workers:
+                    w.cancel()
+                status_task.cancel()
+                progress.close()
+
+                if trace:
+                    self.remove_hook(trace)
+                    if trace_path is not None:
+                        trace.to_json(trace_path)
 
         if failed_poll_ids:
-            raise expeptions.FailedDownloadPolls(failed_poll_ids)
\ No newline at end of file
+            raise expeptions.FailedDownloadPolls(failed_poll_ids)
+
+        return trace or None
\ No newline at end of file
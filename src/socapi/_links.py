@@ -1,17 +1,27 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, List, AsyncIterator, Callable, Any, Union
+from pathlib import Path
 
 if TYPE_CHECKING:
     from __init__ import SocAPIClient
 
+import asyncio
+import inspect
 from http import HTTPMethod
 from .models import _client_model as cm
+from .models import _links_models as lm
 from . import expeptions
+from . import utils
 
 # class LinksPayload(BaseModel):
 #     poll_id: int
 #     link_count: Optional[int] = 1
 
 
+def split_link_count(link_count: int, chunk_size: int) -> List[int]:
+    full, rest = divmod(link_count, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
 class Links:
 
     @cm.validate_login
@@ -20,22 +30,125 @@ class Links:
             poll_id: int,
             link_count: Optional[int] = 1,
     ):
+        try:
+            return await self._post_links(poll_id, link_count)
+        except expeptions.PlatformError as ex:
+            return
+
 
+    async def _post_links(
+            self: "SocAPIClient",
+            poll_id: int,
+            link_count: int,
+            attempts: int = cm.RETRIES_NUM,
+    ) -> List[str]:
         links_payload = {
             "poll_id": poll_id,
             "link_count": link_count
         }
 
+        r = await self._request(
+            method=HTTPMethod.POST,
+            endpoint=cm.Endpoints.PERSONAL_LINKS,
+            request_name=cm.RequestNames.PERSONAL_LINKS,
+            headers=self.headers,
+            payload=links_payload,
+            attempts=attempts,
+            extract_result=True,
+        )
 
+        return lm.extract_links(r)
 
+
+    @cm.validate_login
+    async def _create_links_chunk(
+            self: "SocAPIClient",
+            poll_id: int,
+            index: int,
+            link_count: int,
+            attempts: int,
+    ) -> lm.LinksChunk:
         try:
-            await self._request(
-                method=HTTPMethod.POST,
-                endpoint=cm.Endpoints.PERSONAL_LINKS,
-                request_name=cm.RequestNames.PERSONAL_LINKS,
-                headers=self.headers,
-                payload=links_payload,
-            )
-        except expeptions.PlatformError as ex:
-            return
-        return
+            links = await self._post_links(poll_id, link_count, attempts)
+        except (expeptions.PlatformError, expeptions.MaxRetriesExceededError) as e:
+            return lm.LinksChunk(index=index, requested=link_count, error=e)
+
+        chunk = lm.LinksChunk(index=index, requested=link_count, links=links)
+        if len(links) != link_count:
+            chunk.error = expeptions.ShortLinksChunkError(link_count, len(links))
+        return chunk
+
+
+    async def iter_links(
+            self: "SocAPIClient",
+            poll_id: int,
+            link_count: int,
+            chunk_size: int = cm.MAX_LINKS_PER_REQUEST,
+            limit: int = cm.MAX_CONCURRENT_LINK_REQUESTS,
+            attempts: int = cm.RETRIES_NUM,
+    ) -> AsyncIterator[lm.LinksChunk]:
+        """
+        Create `link_count` personal links in chunks of at most `chunk_size`, yielding each
+        chunk as it completes. Failed chunks are yielded with their error set, chunks answered
+        with another number of links than requested with ShortLinksChunkError and the links
+        that did arrive.
+
+        Note that a chunk retried after a platform error may have been partly created.
+        """
+        chunks = split_link_count(link_count, chunk_size)
+        requests = [(i, self._create_links_chunk(poll_id, i, n, attempts)) for i, n in enumerate(chunks)]
+
+        async for i, chunk in utils.iter_completed(requests, limit):
+            if isinstance(chunk, Exception):
+                chunk = lm.LinksChunk(index=i, requested=chunks[i], error=chunk)
+            yield chunk
+
+
+    async def create_links(
+            self: "SocAPIClient",
+            poll_id: int,
+            link_count: int,
+            dest_path: Optional[Union[str, Path]] = None,
+            consumer: Optional[Callable[[List[str]], Any]] = None,
+            keep_links: bool = True,
+            chunk_size: int = cm.MAX_LINKS_PER_REQUEST,
+            limit: int = cm.MAX_CONCURRENT_LINK_REQUESTS,
+            attempts: int = cm.RETRIES_NUM,
+    ) -> lm.LinksBatch:
+        """
+        Bulk version of create_link.
+
+        Links of every finished chunk are appended to `dest_path` (one per line) and/or passed
+        to `consumer` (sync or async callable) as they arrive. Set keep_links=False to not
+        hold all links in the returned batch. Failed and short chunks are reported in
+        failed_chunks, links of short chunks are still delivered and counted in created.
+        """
+        batch = lm.LinksBatch(poll_id=poll_id, requested=link_count)
+
+        dest = None
+        if dest_path is not None:
+            dest_path = Path(dest_path)
+            utils.create_sub_dirs(dest_path)
+            dest = open(dest_path, "a")
+
+        try:
+            async for chunk in self.iter_links(poll_id, link_count, chunk_size, limit, attempts):
+                if not chunk.ok:
+                    batch.failed_chunks[chunk.index] = chunk
+                if not chunk.links:
+                    continue
+
+                batch.created += len(chunk.links)
+                if keep_links:
+                    batch.links.extend(chunk.links)
+                if dest is not None:
+                    await asyncio.to_thread(dest.writelines, [f"{link}\n" for link in chunk.links])
+                if consumer is not None:
+                    consumed = consumer(chunk.links)
+                    if inspect.isawaitable(consumed):
+                        await consumed
+        finally:
+            if dest is not None:
+                dest.close()
+
+        return batch
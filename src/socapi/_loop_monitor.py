@@ -0,0 +1,162 @@
+from typing import Dict, Optional, Deque, Tuple, Iterator, ContextManager
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import asyncio
+import time
+
+from .models import _metrics_models as mm
+from ._metrics import LatencyHistogram, MetricsCollector
+
+# outermost client operation of the current task
+_operation: ContextVar[Optional[str]] = ContextVar("socapi_operation", default=None)
+# client operations in flight over all tasks
+_active: Dict[str, int] = {}
+# running monitor, timed sections are only recorded while there is one
+_monitor: Optional["LoopLagMonitor"] = None
+
+
+def current_operation() -> Optional[str]:
+    return _operation.get()
+
+
+@contextmanager
+def operation(name: str) -> Iterator[None]:
+    """Marks the client operation running in this task, nested operations keep the outer name."""
+    if _operation.get() is not None:
+        yield
+        return
+    token = _operation.set(name)
+    _active[name] = _active.get(name, 0) + 1
+    try:
+        yield
+    finally:
+        _active[name] -= 1
+        if not _active[name]:
+            del _active[name]
+        _operation.reset(token)
+
+
+def active_monitor() -> Optional["LoopLagMonitor"]:
+    return _monitor
+
+
+class _Section:
+    __slots__ = ("monitor", "name", "start")
+
+    def __init__(self, monitor: "LoopLagMonitor", name: str):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.monitor.section(self.name, self.start)
+
+
+_NO_SECTION = nullcontext()
+
+
+def blocking_section(name: str) -> ContextManager[None]:
+    """Times synchronous work that runs on the loop, for attribution of loop lag."""
+    # called on hot paths: a shared no-op context while no monitor is running
+    monitor = _monitor
+    if monitor is None:
+        return _NO_SECTION
+    return _Section(monitor, name)
+
+
+class LoopLagMonitor:
+    """
+    Opt-in sampler of event loop scheduling delay. Every `interval` seconds it measures how late
+    its own wake-up was; a delay over `threshold` is a blocked interval, attributed to the timed
+    sections of the client that ran in it, or else to the client operations in flight.
+    Lag and blocked time are also reported to `metrics` when given.
+
+        async with LoopLagMonitor(metrics=client.enable_metrics()) as monitor:
+            await client.download_poll(poll_ids)
+        monitor.summary()
+    """
+
+    def __init__(
+            self,
+            metrics: Optional[MetricsCollector] = None,
+            interval: float = 0.05,
+            threshold: float = 0.1,
+            keep: int = 1000,
+    ):
+        self.metrics = metrics
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = LatencyHistogram()
+        self.blocked: Deque[mm.BlockedInterval] = deque(maxlen=keep)
+        # (name, start, end) of recent timed sections
+        self._sections: Deque[Tuple[str, float, float]] = deque(maxlen=256)
+        self._task: Optional[asyncio.Task] = None
+
+    def section(self, name: str, start: float) -> None:
+        end = time.perf_counter()
+        # short sections can not explain a stall
+        if end - start >= self.threshold / 10:
+            operation = _operation.get()
+            self._sections.append((f"{operation}:{name}" if operation else name, start, end))
+
+    def start(self) -> None:
+        global _monitor
+        if _monitor is not None and _monitor is not self:
+            raise RuntimeError("another LoopLagMonitor is running")
+        _monitor = self
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        global _monitor
+        if _monitor is self:
+            _monitor = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(now - expected, 0.0)
+            self.lag.observe(lag)
+            if self.metrics is not None:
+                self.metrics.observe_loop_lag(lag)
+            if lag >= self.threshold:
+                self._record(expected, now, lag)
+
+    def _record(self, window_start: float, window_end: float, lag: float) -> None:
+        sections: Dict[str, float] = {}
+        for name, start, end in self._sections:
+            overlap = min(end, window_end) - max(start, window_start)
+            if overlap > 0:
+                sections[name] = sections.get(name, 0.0) + overlap
+        interval = mm.BlockedInterval(at=window_start, lag=lag, sections=sections, operations=tuple(_active))
+        self.blocked.append(interval)
+        if self.metrics is not None:
+            self.metrics.observe_blocking(interval.source, lag)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Blocked intervals by source, worst total first."""
+        by_source: Dict[str, Dict[str, float]] = {}
+        for interval in self.blocked:
+            entry = by_source.setdefault(interval.source, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += interval.lag
+            entry["max"] = max(entry["max"], interval.lag)
+        return dict(sorted(by_source.items(), key=lambda item: item[1]["total"], reverse=True))
@@ -3,12 +3,19 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from __init__ import SocAPIClient
 
-from typing import List, Literal, Union, Dict, Any, AnyStr
+from typing import List, Literal, Union, Dict, Any, AnyStr, Optional, Iterable, AsyncIterator
 from http import HTTPMethod
 import asyncio
+import time
+
+from . import expeptions
+from . import utils
+from . import _loop_monitor
 
 from .models import _meta_parser_models as mpm
 from .models import _client_model as cm
+from ._schema import PollSchema, iter_poll_columns
+from ._schema_cache import SchemaCache, block_fingerprint, build_cached_schema, diff_cached_schemas
 
 class MetaParser:
 
@@ -18,12 +25,10 @@ class MetaParser:
         poll_id: int,
         includes: Union[Literal["all"], List[mpm.BlockIncludeField]] = "all"
     ):
-        p = mpm.BlockPayload(poll_id=poll_id, includes=includes)
-
         r = await self._request(
             method=HTTPMethod.POST,
             endpoint=cm.Endpoints.BLOCKS_IN_POLL,
-            payload=p.model_dump(),
+            payload=mpm.block_payload(poll_id, includes),
             headers=self.headers,
             request_name=cm.RequestNames.BLOCKS_IN_POLL,
             extract_result=True,
@@ -39,13 +44,13 @@ class MetaParser:
         how: Literal["poll", "block"] | mpm.QuestionExportHow,
         includes: Union[Literal["all"], List[mpm.QuestionIncludeField]] = "all",
     ):
-        p = mpm.QuestionsPayload(parent_id=parent_id, how=how, includes=includes)
-        endpoint = mpm.QuestionEndpoints.get(p.how).value
+        payload = mpm.questions_payload(parent_id, how, includes)
+        endpoint = mpm.QuestionEndpoints[mpm.QuestionExportHow(how)]
 
         r = await self._request(
             method=HTTPMethod.POST,
             endpoint=endpoint,
-            payload=p.model_dump(exclude={"how"}, exclude_none=True),
+            payload=payload,
             headers=self.headers,
             request_name=cm.RequestNames.GET_QUESTIONS,
             extract_result = True,
@@ -54,6 +59,31 @@ class MetaParser:
         return r
 
 
+    async def iter_questions(
+        self: "SocAPIClient",
+        parent_id: int,
+        how: Literal["poll", "block"] | mpm.QuestionExportHow,
+        includes: Union[Literal["all"], List[mpm.QuestionIncludeField]] = "all",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        # streaming get_questions for big questionnaires, questions are decoded one by one
+        request = dict(
+            method=HTTPMethod.POST,
+            endpoint=mpm.QuestionEndpoints[mpm.QuestionExportHow(how)],
+            payload=mpm.questions_payload(parent_id, how, includes),
+            request_name=cm.RequestNames.GET_QUESTIONS,
+        )
+
+        token = self.token
+        try:
+            async for question in self._request_iter(headers=self.headers, **request):
+                yield question
+        except expeptions.TokenError:
+            # raised on the status line, before anything was yielded
+            await self._relogin(token)
+            async for question in self._request_iter(headers=self.headers, **request):
+                yield question
+
+
     @cm.validate_login
     async def get_metadata(self: "SocAPIClient", poll_id: int):
         result = await self._request(
@@ -84,68 +114,225 @@ class MetaParser:
 
 
 
-    async def map_question_ids(self: "SocAPIClient", poll_id: int) -> List[tuple[int, Any]]:
-        blocks = await self.get_blocks(poll_id=poll_id)
-        block_order_to_id = {b.get("order"): b.get("id") for b in blocks}
-
-        get_block_questions_tasks = [
-            self.get_questions(parent_id=block_order_to_id.get(o), how="block") for o in range(1, len(blocks)+1)
-        ]
-
-        ordered_questions = await asyncio.gather(*get_block_questions_tasks)
-
-        mapped_questions = get_multiindex_from_questions(ordered_questions)
-
-        return mapped_questions
-
+    async def _fetch_poll_structure(
+            self: "SocAPIClient",
+            poll_id: int,
+            limiter: Optional[utils.FairLimiter] = None,
+    ) -> tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+        blocks, questions = await asyncio.gather(
+            utils.run_in_slot(self.get_blocks(poll_id=poll_id), limiter, poll_id),
+            utils.run_in_slot(self._try_get_poll_questions(poll_id), limiter, poll_id),
+        )
+        blocks = sort_by_order(blocks)
+        block_ids = [b["id"] for b in blocks]
 
+        # one request for the whole poll if the platform answers it, per-block otherwise
+        grouped = group_questions_by_block(questions, block_ids)
+        if grouped is not None:
+            return blocks, grouped
 
-def get_multiindex_from_questions(questions: List[List[Dict[str, Any]]])-> List[tuple[int, Any]]:
+        return blocks, await self._fetch_block_questions(poll_id, block_ids, limiter)
 
-    def convert_technical_columns():
-        return [
-            ("CollectorNM", None, mpm.AnswerTypes.tech.value),
-            ("respondent_id", None, mpm.AnswerTypes.tech.value),
-            ("collector_id", None, mpm.AnswerTypes.tech.value),
-            ("date_created", None, mpm.AnswerTypes.tech.value),
-            ("date_modified", None, mpm.AnswerTypes.tech.value),
-            ("survey_time", None, mpm.AnswerTypes.tech.value),
-            ("ip_address", None, mpm.AnswerTypes.tech.value),
-        ]
 
-    def process_multicolumn_answer(answer: dict[str, Any], input_fields: list[tuple[int, Any, int]]):
-        if answer["has_input"]:
-            input_fields.append((answer["question_id"], answer["id"], mpm.AnswerTypes.input.value))
+    async def _fetch_block_questions(
+            self: "SocAPIClient",
+            poll_id: int,
+            block_ids: List[int],
+            limiter: Optional[utils.FairLimiter] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        requests = (self.get_questions(parent_id=b_id, how="block") for b_id in block_ids)
 
-        return answer["question_id"], answer["id"], mpm.AnswerTypes.data.value
+        if limiter is None:
+            return await utils.gather_limited(requests, limit=cm.MAX_CONCURRENT_SCHEMA_REQUESTS)
+        return await asyncio.gather(*(utils.run_in_slot(r, limiter, poll_id) for r in requests))
 
-    def process_oe(question):
-        return [(question["id"], None, mpm.AnswerTypes.input.value)]
 
+    async def _fetch_poll_questions(
+            self: "SocAPIClient",
+            poll_id: int,
+            limiter: Optional[utils.FairLimiter] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        _, ordered_questions = await self._fetch_poll_structure(poll_id, limiter)
+        return ordered_questions
 
-    def process_single_column_question(question: dict[str, Any], input_fields: list[tuple[int, Any, int]]):
-        for answer in question["answers"]:
-            if answer["has_input"]:
-                input_fields.append((answer["question_id"], answer["id"], mpm.AnswerTypes.input.value))
 
-        return question["id"], None, mpm.AnswerTypes.data.value
+    @cm.validate_login
+    async def _try_get_poll_questions(self: "SocAPIClient", poll_id: int) -> Optional[List[Dict[str, Any]]]:
+        # one attempt only, the per-block requests are the fallback rather than retries
+        try:
+            return await self._request(
+                method=HTTPMethod.POST,
+                endpoint=mpm.QuestionEndpoints[mpm.QuestionExportHow.poll],
+                payload=mpm.questions_payload(poll_id, "poll", "all"),
+                headers=self.headers,
+                request_name=cm.RequestNames.GET_QUESTIONS,
+                attempts=1,
+                extract_result=True,
+            )
+        except (expeptions.PlatformError, ValueError):
+            return None
+
+
+    async def sync_poll_schema(
+            self: "SocAPIClient",
+            poll_id: int,
+            cache: SchemaCache,
+            revalidate: Literal["none", "blocks", "full"] = "blocks",
+            max_age: Optional[float] = cm.SCHEMA_CACHE_MAX_AGE,
+            limiter: Optional[utils.FairLimiter] = None,
+    ) -> tuple[mpm.CachedSchema, mpm.SchemaDiff]:
+        """
+        Load poll structure from cache and bring it up to date.
+
+        revalidate="blocks" fetches only the block list and refetches the questions of new or
+        edited blocks, a warm entry costs one request. Edits inside an unchanged block are not
+        seen until the next full check. revalidate="full" refetches all questions, "none" uses
+        the cached entry as is. Entries not checked in full for max_age seconds are always
+        revalidated in full.
+        """
+        cached = await asyncio.to_thread(cache.load, poll_id)
+
+        if cached is not None and max_age is not None and time.time() - cached.validated_at > max_age:
+            revalidate = "full"
+
+        if cached is not None and revalidate == "none":
+            return cached, mpm.SchemaDiff()
+
+        if cached is None or revalidate == "full":
+            blocks, ordered_questions = await self._fetch_poll_structure(poll_id, limiter)
+            questions = {b["id"]: q for b, q in zip(blocks, ordered_questions)}
+        else:
+            blocks = sort_by_order(await utils.run_in_slot(self.get_blocks(poll_id=poll_id), limiter, poll_id))
+            stale_ids = [
+                b["id"] for b in blocks
+                if cached.block_fingerprints.get(b["id"]) != block_fingerprint(b) or b["id"] not in cached.questions
+            ]
+            refetched = await self._fetch_block_questions(poll_id, stale_ids, limiter)
+            questions = {b["id"]: cached.questions.get(b["id"]) for b in blocks}
+            questions.update(zip(stale_ids, refetched))
+
+        fresh = build_cached_schema(poll_id, blocks, questions)
+        diff = diff_cached_schemas(cached, fresh)
+
+        if cached is not None and revalidate == "blocks":
+            # unchanged blocks were not checked, keep the time of the last full check
+            fresh.validated_at = cached.validated_at
+
+        if diff or cached is None or revalidate == "full":
+            await asyncio.to_thread(cache.store, fresh)
+
+        return fresh, diff
+
+
+    async def map_question_ids(
+            self: "SocAPIClient",
+            poll_id: int,
+            cache: Optional[SchemaCache] = None,
+            revalidate: Literal["none", "blocks", "full"] = "blocks",
+            max_age: Optional[float] = cm.SCHEMA_CACHE_MAX_AGE,
+    ) -> List[tuple[int, Any]]:
+        ordered_questions = await self._get_ordered_questions(poll_id, cache, revalidate=revalidate, max_age=max_age)
 
+        mapped_questions = get_multiindex_from_questions(ordered_questions)
 
-    def convert_question_to_index(question_data: dict[str, Any]):
-        input_fields = []
+        return mapped_questions
 
-        match question_data["type_id"]:
-            case mpm.QuestionTypes.multipunch.type_id | mpm.QuestionTypes.one_in_row.type_id | mpm.QuestionTypes.mult_in_row.type_id:
-                processed_answers = [process_multicolumn_answer(a, input_fields) for a in question_data["answers"]]
-                return processed_answers + input_fields
 
-            case mpm.QuestionTypes.oe.type_id:
-                return process_oe(question_data)
+    async def get_poll_schema(
+            self: "SocAPIClient",
+            poll_id: int,
+            cache: Optional[SchemaCache] = None,
+            revalidate: Literal["none", "blocks", "full"] = "blocks",
+            max_age: Optional[float] = cm.SCHEMA_CACHE_MAX_AGE,
+    ) -> PollSchema:
+        if cache is None:
+            ordered_questions = await self._fetch_poll_questions(poll_id)
+            with _loop_monitor.blocking_section("poll schema"):
+                return PollSchema.from_questions(ordered_questions)
+
+        # with a cache the structure is fingerprinted, the schema is built again only when it changed
+        entry, _ = await self.sync_poll_schema(poll_id, cache, revalidate, max_age)
+        structure = tuple((b["id"], entry.question_fingerprints.get(b["id"])) for b in entry.blocks)
+        built = self._poll_schemas.get(poll_id)
+        if built is None or built[0] != structure:
+            with _loop_monitor.blocking_section("poll schema"):
+                built = self._poll_schemas[poll_id] = structure, PollSchema.from_questions(entry.ordered_questions)
+        return built[1]
+
+
+    async def map_question_ids_many(
+            self: "SocAPIClient",
+            poll_ids: Iterable[int],
+            cache: Optional[SchemaCache] = None,
+            limit: int = cm.MAX_CONCURRENT_SCHEMA_REQUESTS,
+            revalidate: Literal["none", "blocks", "full"] = "blocks",
+            max_age: Optional[float] = cm.SCHEMA_CACHE_MAX_AGE,
+    ) -> AsyncIterator[tuple[int, Union[List[tuple[int, Any]], Exception]]]:
+        """
+        Map question ids for many polls, yielding (poll_id, columns) as each poll completes.
+
+        Requests of all polls share one limiter that serves polls round-robin. A failed poll
+        yields its exception in place of columns and does not stop the others.
+        """
+        limiter = utils.FairLimiter(limit)
+
+        async def map_one(poll_id: int):
+            try:
+                ordered_questions = await self._get_ordered_questions(
+                    poll_id, cache, limiter, revalidate=revalidate, max_age=max_age
+                )
+                return poll_id, get_multiindex_from_questions(ordered_questions)
+            except Exception as e:
+                return poll_id, e
+
+        tasks = [asyncio.create_task(map_one(p)) for p in dict.fromkeys(poll_ids)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+    async def _get_ordered_questions(
+            self: "SocAPIClient",
+            poll_id: int,
+            cache: Optional[SchemaCache] = None,
+            limiter: Optional[utils.FairLimiter] = None,
+            revalidate: Literal["none", "blocks", "full"] = "blocks",
+            max_age: Optional[float] = cm.SCHEMA_CACHE_MAX_AGE,
+    ) -> List[List[Dict[str, Any]]]:
+        if cache is None:
+            return await self._fetch_poll_questions(poll_id, limiter)
+
+        entry, _ = await self.sync_poll_schema(poll_id, cache, revalidate, max_age, limiter)
+        return entry.ordered_questions
+
+
+
+def sort_by_order(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # orders may have gaps, only their relative position matters
+    return sorted(items, key=lambda i: i.get("order") or 0)
+
+
+def group_questions_by_block(
+        questions: Optional[List[Dict[str, Any]]],
+        block_ids: List[int]
+) -> Optional[List[List[Dict[str, Any]]]]:
+    if questions is None or (not questions and block_ids):
+        return None
+
+    grouped = {b_id: [] for b_id in block_ids}
+    for question in questions:
+        block = grouped.get(question.get("block_id"))
+        if block is None:
+            return None
+        block.append(question)
+
+    return [sort_by_order(grouped[b_id]) for b_id in block_ids]
 
-            case _ :
-                processed_question = process_single_column_question(question_data, input_fields)
-                return [processed_question] + input_fields
 
-    res = convert_technical_columns() + [item for block in questions for question in block for item in convert_question_to_index(question)]
 
-    return res
+def get_multiindex_from_questions(questions: List[List[Dict[str, Any]]])-> List[tuple[int, Any]]:
+    with _loop_monitor.blocking_section("multiindex"):
+        return list(iter_poll_columns(questions))
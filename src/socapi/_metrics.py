@@ -0,0 +1,194 @@
+from typing import Dict, Any, Optional, Sequence
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+import json
+
+from .models import _metrics_models as mm
+
+
+class LatencyHistogram:
+    """Fixed bucket histogram, counts kept in an array so observing is a bisect and an increment."""
+
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds: Sequence[float] = mm.LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = array("Q", bytes(8 * len(self.bounds)))
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        # upper bound of the bucket holding the q-th observation, the max for the open bucket
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": {str(b): n for b, n in zip(self.bounds, self.counts)},
+        }
+
+
+class RequestMetrics:
+    __slots__ = (
+        "requests", "ok", "retries", "errors", "in_flight",
+        "bytes_sent", "bytes_received", "statuses", "latency", "wait",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.ok = 0
+        self.retries = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.statuses: Dict[int, int] = {}
+        self.latency = LatencyHistogram()
+        self.wait = LatencyHistogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "ok": self.ok,
+            "retries": self.retries,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "latency": self.latency.to_dict(),
+            "wait": self.wait.to_dict(),
+        }
+
+
+class MetricsCollector:
+    """
+    In-memory request metrics per RequestNames value: attempt counters, bytes, status codes,
+    latency and semaphore wait histograms. The collector is itself a request hook:
+
+        metrics = client.enable_metrics()   # or client.add_hook(MetricsCollector())
+        ...
+        metrics.dump("metrics.json")
+    """
+
+    def __init__(self):
+        self.requests: Dict[str, RequestMetrics] = {}
+        # filled by a LoopLagMonitor: scheduling delay samples, blocked time per source
+        self.loop_lag = LatencyHistogram()
+        self.blocking: Dict[str, LatencyHistogram] = {}
+
+    def __call__(self, event: mm.RequestEvent) -> None:
+        m = self.requests.get(event.request_name)
+        if m is None:
+            m = self.requests[event.request_name] = RequestMetrics()
+
+        if event.kind == "start":
+            m.requests += 1
+            m.in_flight += 1
+            m.wait.observe(event.wait)
+            return
+
+        m.in_flight -= 1
+        m.latency.observe(event.elapsed)
+        m.bytes_sent += event.bytes_sent
+        m.bytes_received += event.bytes_received
+        if event.status is not None:
+            m.statuses[event.status] = m.statuses.get(event.status, 0) + 1
+
+        if event.kind == "end":
+            m.ok += 1
+        elif event.kind == "retry":
+            m.retries += 1
+        else:
+            m.errors += 1
+
+    def observe_loop_lag(self, lag: float) -> None:
+        self.loop_lag.observe(lag)
+
+    def observe_blocking(self, source: str, seconds: float) -> None:
+        h = self.blocking.get(source)
+        if h is None:
+            h = self.blocking[source] = LatencyHistogram()
+        h.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: m.to_dict() for name, m in sorted(self.requests.items())}
+
+    def loop_snapshot(self) -> Dict[str, Any]:
+        return {
+            "lag": self.loop_lag.to_dict(),
+            "blocking": {source: h.to_dict() for source, h in sorted(self.blocking.items())},
+        }
+
+    def top(self, n: int = 10) -> list[tuple[str, float]]:
+        """Request names by total time spent on the wire, the endpoints dominating wall time first."""
+        totals = [(name, m.latency.sum) for name, m in self.requests.items()]
+        return sorted(totals, key=lambda item: item[1], reverse=True)[:n]
+
+    def dump(self, path: Optional[str | Path] = None) -> str:
+        data = {"requests": self.snapshot()}
+        if self.loop_lag.count:
+            data["loop"] = self.loop_snapshot()
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+        if path is not None:
+            Path(path).write_text(text, encoding="utf-8")
+        return text
+
+    def to_prometheus(self, prefix: str = "socapi") -> str:
+        """Prometheus text exposition of the collected metrics."""
+        lines = []
+        counters = ("requests", "ok", "retries", "errors", "bytes_sent", "bytes_received")
+        for counter in counters:
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            for name, m in sorted(self.requests.items()):
+                lines.append(f'{prefix}_{counter}_total{{request="{name}"}} {getattr(m, counter)}')
+
+        lines.append(f"# TYPE {prefix}_in_flight gauge")
+        for name, m in sorted(self.requests.items()):
+            lines.append(f'{prefix}_in_flight{{request="{name}"}} {m.in_flight}')
+
+        histograms = [("latency", "request", self.requests), ("wait", "request", self.requests)]
+        if self.loop_lag.count:
+            histograms.append(("loop_lag", "loop", {"event_loop": self.loop_lag}))
+            histograms.append(("blocking", "source", self.blocking))
+
+        for histogram, label, series in histograms:
+            metric = f"{prefix}_{histogram}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for name, m in sorted(series.items()):
+                h = m if isinstance(m, LatencyHistogram) else getattr(m, histogram)
+                cumulative = 0
+                for bound, n in zip(h.bounds, h.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{{label}="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {h.sum}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        self.requests.clear()
+        self.loop_lag = LatencyHistogram()
+        self.blocking.clear()
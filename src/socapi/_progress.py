@@ -0,0 +1,137 @@
+from typing import Dict, Optional, Callable, Any, Iterable, AsyncIterator
+import asyncio
+import time
+import warnings
+
+from .models import _download_models as dm
+
+TERMINAL_STATES = (dm.PollState.done, dm.PollState.failed)
+
+
+class DownloadProgress:
+    """
+    Progress of a download_poll batch, delivered to a callback, as an async event stream, or both.
+    State transitions are always reported. Byte and batch events are coalesced to at most one
+    per `min_interval` seconds, so reporting stays cheap with large files and batches.
+
+        progress = DownloadProgress()
+        task = asyncio.create_task(client.download_poll(poll_ids, progress=progress))
+        async for event in progress:
+            ...
+
+    Comparing the share of polls in "waiting" with "transferring" in batch events tells
+    whether a batch is export-bound or network-bound.
+    """
+
+    def __init__(self, callback: Optional[Callable[[dm.ProgressEvent], Any]] = None, min_interval: float = 0.5):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.states: Dict[int, dm.PollState] = {}
+        self.received: Dict[int, int] = {}
+        self.bytes_total = 0
+        self.finished = 0
+        self._started = time.monotonic()
+        self._last_bytes: Dict[int, float] = {}
+        self._last_batch = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._closed = False
+
+    def start(self, poll_ids: Iterable[int]) -> None:
+        self._started = time.monotonic()
+        for poll_id in poll_ids:
+            self.states[poll_id] = dm.PollState.queued
+        self._batch(force=True)
+
+    def set_state(self, poll_id: int, state: dm.PollState) -> None:
+        if state in TERMINAL_STATES and self.states.get(poll_id) not in TERMINAL_STATES:
+            self.finished += 1
+        self.states[poll_id] = state
+        self._emit(dm.ProgressEvent(kind="state", elapsed=self._elapsed(), poll_id=poll_id, state=state))
+        self._batch(force=state in TERMINAL_STATES and self.finished == len(self.states))
+
+    def on_bytes(self, poll_id: int, received: int, content_length: Optional[int]) -> None:
+        self.bytes_total += received - self.received.get(poll_id, 0)
+        self.received[poll_id] = received
+
+        now = time.monotonic()
+        # the last chunk is always reported
+        if now - self._last_bytes.get(poll_id, 0.0) < self.min_interval and received != content_length:
+            return
+        self._last_bytes[poll_id] = now
+        self._emit(dm.ProgressEvent(
+            kind="bytes", elapsed=now - self._started, poll_id=poll_id,
+            bytes_received=received, content_length=content_length,
+        ))
+        self._batch()
+
+    def chunk_callback(self, poll_id: int) -> Callable[[int, Optional[int]], None]:
+        return lambda received, content_length: self.on_bytes(poll_id, received, content_length)
+
+    def close(self) -> None:
+        self._batch(force=True)
+        self._closed = True
+        if self._queue is not None:
+            self._queue.put_nowait(None)
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def _batch(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_batch < self.min_interval:
+            return
+        self._last_batch = now
+
+        elapsed = now - self._started
+        counts: Dict[str, int] = {}
+        for state in self.states.values():
+            counts[state.value] = counts.get(state.value, 0) + 1
+        finished = self.finished
+        eta = None
+        if finished and elapsed > 0:
+            eta = (len(self.states) - finished) / (finished / elapsed)
+
+        self._emit(dm.ProgressEvent(
+            kind="batch",
+            elapsed=elapsed,
+            bytes_received=self.bytes_total,
+            polls_total=len(self.states),
+            polls_finished=finished,
+            polls_failed=counts.get(dm.PollState.failed.value, 0),
+            states=counts,
+            throughput=self.bytes_total / elapsed if elapsed > 0 else 0.0,
+            eta=eta,
+        ))
+
+    def _emit(self, event: dm.ProgressEvent) -> None:
+        if self._queue is not None:
+            self._queue.put_nowait(event)
+        if self.callback is not None:
+            try:
+                self.callback(event)
+            except Exception as e:
+                warnings.warn(f"progress callback {self.callback!r} failed: {e!r}", RuntimeWarning)
+
+    def __aiter__(self) -> AsyncIterator[dm.ProgressEvent]:
+        # events are queued from the first iteration on, start iterating before awaiting the batch
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            if self._closed:
+                self._queue.put_nowait(None)
+        return self._stream()
+
+    async def _stream(self) -> AsyncIterator[dm.ProgressEvent]:
+        while (event := await self._queue.get()) is not None:
+            yield event
+
+
+class _NoProgress:
+    """Stands in for DownloadProgress when progress reporting is off."""
+
+    def start(self, poll_ids): pass
+    def set_state(self, poll_id, state): pass
+    def chunk_callback(self, poll_id): return None
+    def close(self): pass
+
+
+NO_PROGRESS = _NoProgress()
@@ -0,0 +1,208 @@
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
+from array import array
+
+from .models import _meta_parser_models as mpm
+
+TECHNICAL_COLUMNS = (
+    "CollectorNM",
+    "respondent_id",
+    "collector_id",
+    "date_created",
+    "date_modified",
+    "survey_time",
+    "ip_address",
+)
+
+# placeholder id for technical columns and question level columns in the id arrays
+NO_ID = -1
+
+MULTICOLUMN_TYPE_IDS = {
+    mpm.QuestionTypes.multipunch.type_id,
+    mpm.QuestionTypes.one_in_row.type_id,
+    mpm.QuestionTypes.mult_in_row.type_id,
+}
+
+QUESTION_TYPES_BY_ID = {t.type_id: t for t in mpm.QuestionTypes}
+
+# enum member access is slow, the column loops run once per column of a poll
+_DATA = mpm.AnswerTypes.data.value
+_INPUT = mpm.AnswerTypes.input.value
+_TECH = mpm.AnswerTypes.tech.value
+_OE_TYPE_ID = mpm.QuestionTypes.oe.type_id
+
+Column = Tuple[Union[int, str], Optional[int], int]
+
+
+def iter_question_columns(question: Dict[str, Any]) -> Iterator[Column]:
+    input_fields = []
+
+    if question["type_id"] in MULTICOLUMN_TYPE_IDS:
+        for answer in question["answers"]:
+            yield answer["question_id"], answer["id"], _DATA
+            if answer["has_input"]:
+                input_fields.append((answer["question_id"], answer["id"], _INPUT))
+
+    elif question["type_id"] == _OE_TYPE_ID:
+        yield question["id"], None, _INPUT
+
+    else:
+        yield question["id"], None, _DATA
+        for answer in question["answers"]:
+            if answer["has_input"]:
+                input_fields.append((answer["question_id"], answer["id"], _INPUT))
+
+    yield from input_fields
+
+
+def iter_poll_columns(questions: Iterable[Iterable[Dict[str, Any]]]) -> Iterator[Column]:
+    for name in TECHNICAL_COLUMNS:
+        yield name, None, _TECH
+
+    for block in questions:
+        for question in block:
+            yield from iter_question_columns(question)
+
+
+class PollSchema:
+    """
+    Column layout of a poll export, built once from block/question data.
+
+    Columns are kept as three parallel arrays (question id, answer id, answer type code)
+    in export order. Technical columns and question level columns hold NO_ID in place of
+    the missing id. Lookups by question or answer id go through hash indexes.
+    """
+
+    __slots__ = (
+        "question_ids",
+        "answer_ids",
+        "answer_types",
+        "_technical",
+        "_question_columns",
+        "_answer_columns",
+        "_question_types",
+        "_question_answers",
+    )
+
+    def __init__(
+            self,
+            columns: Iterable[Column],
+            question_types: Optional[Dict[int, int]] = None,
+            question_answers: Optional[Dict[int, Tuple[int, ...]]] = None,
+    ):
+        self.question_ids = array("q")
+        self.answer_ids = array("q")
+        self.answer_types = array("b")
+        self._technical: Dict[int, str] = {}
+        self._question_columns: Dict[int, range] = {}
+        self._answer_columns: Dict[int, Tuple[int, ...]] = {}
+        self._question_types: Dict[int, int] = dict(question_types or {})
+        self._question_answers: Dict[int, Tuple[int, ...]] = dict(question_answers or {})
+
+        # positions are collected in one pass, ranges and tuples are built once at the end
+        question_bounds: Dict[int, List[int]] = {}
+        answer_columns: Dict[int, List[int]] = {}
+        question_ids, answer_ids, answer_types = [], [], []
+
+        for pos, (question_id, answer_id, answer_type) in enumerate(columns):
+            if answer_type == _TECH:
+                self._technical[pos] = question_id
+                question_id = NO_ID
+            else:
+                bounds = question_bounds.get(question_id)
+                if bounds is None:
+                    question_bounds[question_id] = [pos, pos]
+                else:
+                    bounds[1] = pos
+
+            if answer_id is None:
+                answer_id = NO_ID
+            else:
+                positions = answer_columns.get(answer_id)
+                if positions is None:
+                    answer_columns[answer_id] = [pos]
+                else:
+                    positions.append(pos)
+
+            question_ids.append(question_id)
+            answer_ids.append(answer_id)
+            answer_types.append(answer_type)
+
+        self.question_ids.extend(question_ids)
+        self.answer_ids.extend(answer_ids)
+        self.answer_types.extend(answer_types)
+        self._question_columns = {q: range(first, last + 1) for q, (first, last) in question_bounds.items()}
+        self._answer_columns = {a: tuple(positions) for a, positions in answer_columns.items()}
+
+
+    @classmethod
+    def from_questions(cls, questions: List[List[Dict[str, Any]]]) -> "PollSchema":
+        question_types, question_answers = {}, {}
+        for block in questions:
+            for q in block:
+                question_types[q["id"]] = q["type_id"]
+                question_answers[q["id"]] = tuple([a["id"] for a in q["answers"]])
+        return cls(iter_poll_columns(questions), question_types, question_answers)
+
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+
+    def __contains__(self, question_id: int) -> bool:
+        return question_id in self._question_columns
+
+
+    @property
+    def question_order(self) -> Tuple[int, ...]:
+        return tuple(self._question_columns)
+
+
+    def column(self, pos: int) -> Column:
+        if pos in self._technical:
+            return self._technical[pos], None, self.answer_types[pos]
+        answer_id = self.answer_ids[pos]
+        return self.question_ids[pos], None if answer_id == NO_ID else answer_id, self.answer_types[pos]
+
+
+    def columns_for_question(self, question_id: int) -> range:
+        return self._question_columns.get(question_id, range(0))
+
+
+    def columns_for_answer(self, answer_id: int) -> Tuple[int, ...]:
+        return self._answer_columns.get(answer_id, ())
+
+
+    def answers_of(self, question_id: int) -> Tuple[int, ...]:
+        if question_id in self._question_answers:
+            return self._question_answers[question_id]
+
+        # answer ids of data columns in column order. Input columns of single column questions
+        # carry only the answers with a text field, the full list is unknown then
+        answers = (
+            self.answer_ids[pos] for pos in self.columns_for_question(question_id)
+            if self.answer_types[pos] == mpm.AnswerTypes.data.value
+        )
+        return tuple(dict.fromkeys(a for a in answers if a != NO_ID))
+
+
+    def question_type(self, question_id: int) -> Optional[mpm.QuestionTypes]:
+        return QUESTION_TYPES_BY_ID.get(self._question_types.get(question_id))
+
+
+    def technical_columns(self) -> Dict[int, str]:
+        return dict(self._technical)
+
+
+    def to_tuples(self) -> List[Column]:
+        return [self.column(pos) for pos in range(len(self))]
+
+
+    def to_multiindex(self, names: Tuple[str, str, str] = ("question_id", "answer_id", "answer_type")):
+        import pandas as pd
+
+        question_level = list(self.question_ids)
+        for pos, name in self._technical.items():
+            question_level[pos] = name
+        answer_level = [None if a == NO_ID else a for a in self.answer_ids]
+
+        return pd.MultiIndex.from_arrays([question_level, answer_level, list(self.answer_types)], names=names)
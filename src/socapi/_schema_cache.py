@@ -0,0 +1,139 @@
+from typing import List, Dict, Any, Optional, Iterable
+from pathlib import Path
+import hashlib
+import json
+import time
+
+from . import utils
+from .models import _meta_parser_models as mpm
+
+BLOCK_FINGERPRINT_FIELDS = ("id", "order", "name", "title")
+ANSWER_FINGERPRINT_FIELDS = ("id", "question_id", "has_input")
+
+
+def _digest(structure: Any) -> str:
+    return hashlib.sha1(json.dumps(structure, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def block_fingerprint(block: Dict[str, Any]) -> str:
+    return _digest([block.get(f) for f in BLOCK_FINGERPRINT_FIELDS])
+
+
+def question_structure(question: Dict[str, Any]) -> list:
+    return [
+        question.get("id"),
+        question.get("type_id"),
+        question.get("order"),
+        [[a.get(f) for f in ANSWER_FINGERPRINT_FIELDS] for a in question.get("answers") or []],
+        [question_structure(c) for c in question.get("children") or []],
+    ]
+
+
+def questions_fingerprint(questions: Iterable[Dict[str, Any]]) -> str:
+    return _digest([question_structure(q) for q in questions])
+
+
+def build_cached_schema(
+        poll_id: int,
+        blocks: List[Dict[str, Any]],
+        questions: Dict[int, List[Dict[str, Any]]],
+) -> mpm.CachedSchema:
+    return mpm.CachedSchema(
+        poll_id=poll_id,
+        blocks=blocks,
+        questions=questions,
+        block_fingerprints={b["id"]: block_fingerprint(b) for b in blocks},
+        question_fingerprints={b_id: questions_fingerprint(qs) for b_id, qs in questions.items()},
+        validated_at=time.time(),
+    )
+
+
+def diff_cached_schemas(old: Optional[mpm.CachedSchema], new: mpm.CachedSchema) -> mpm.SchemaDiff:
+    if old is None:
+        return mpm.SchemaDiff(
+            added_blocks=[b["id"] for b in new.blocks],
+            added_questions=[q["id"] for block in new.ordered_questions for q in block],
+        )
+
+    old_blocks = [b["id"] for b in old.blocks]
+    new_blocks = [b["id"] for b in new.blocks]
+    old_block_set, new_block_set = set(old_blocks), set(new_blocks)
+    kept_old = [b for b in old_blocks if b in new_block_set]
+    kept_new = [b for b in new_blocks if b in old_block_set]
+
+    # blocks with equal question fingerprints hold the same questions on both sides
+    changed_blocks = {
+        b_id for b_id in old_block_set | new_block_set
+        if old.question_fingerprints.get(b_id) != new.question_fingerprints.get(b_id)
+    }
+    old_questions = _question_digests(old, changed_blocks)
+    new_questions = _question_digests(new, changed_blocks)
+
+    return mpm.SchemaDiff(
+        added_blocks=[b for b in new_blocks if b not in old_block_set],
+        removed_blocks=[b for b in old_blocks if b not in new_block_set],
+        moved_blocks=[n for o, n in zip(kept_old, kept_new) if o != n],
+        added_questions=[q for q in new_questions if q not in old_questions],
+        removed_questions=[q for q in old_questions if q not in new_questions],
+        changed_questions=[q for q, fp in new_questions.items() if q in old_questions and old_questions[q] != fp],
+    )
+
+
+def _question_digests(schema: mpm.CachedSchema, block_ids: set) -> Dict[int, str]:
+    # the block is part of the digest, a question moved to another block counts as changed
+    return {
+        q["id"]: _digest([b["id"], question_structure(q)])
+        for b in schema.blocks if b["id"] in block_ids
+        for q in schema.questions.get(b["id"], [])
+    }
+
+
+class SchemaCache:
+    """
+    On-disk store of poll structures, one json file per poll.
+
+    Entries are kept in memory after the first read, so repeated loads in one process
+    do not touch the disk.
+    """
+
+    def __init__(self, cache_dir: str | Path):
+        self.cache_dir = Path(cache_dir)
+        self._entries: Dict[int, mpm.CachedSchema] = {}
+
+
+    def path(self, poll_id: int) -> Path:
+        return self.cache_dir / f"poll_{poll_id}.schema.json"
+
+
+    def load(self, poll_id: int) -> Optional[mpm.CachedSchema]:
+        if poll_id in self._entries:
+            return self._entries[poll_id]
+
+        path = self.path(poll_id)
+        if not path.exists():
+            return None
+
+        try:
+            entry = mpm.CachedSchema.model_validate_json(path.read_bytes())
+        except ValueError:
+            # unreadable entry is treated as a miss and overwritten on the next store
+            return None
+
+        self._entries[poll_id] = entry
+        return entry
+
+
+    def store(self, entry: mpm.CachedSchema) -> None:
+        path = self.path(entry.poll_id)
+        utils.create_sub_dirs(path)
+
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(entry.model_dump_json())
+        tmp_path.replace(path)
+
+        self._entries[entry.poll_id] = entry
+
+
+    def invalidate(self, poll_id: int) -> None:
+        self._entries.pop(poll_id, None)
+        self.path(poll_id).unlink(missing_ok=True)
@@ -0,0 +1,181 @@
+from typing import TYPE_CHECKING, Dict, Any, Optional, Iterable, List, Literal, Tuple
+from pathlib import Path
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+if TYPE_CHECKING:
+    from __init__ import SocAPIClient
+
+from . import utils
+from .models import _stat_models as sm
+
+SnapshotKind = Literal["statistics", "conversions"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statistics (taken_at REAL NOT NULL, poll_id INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS conversions (taken_at REAL NOT NULL, poll_id INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS quotas (
+    taken_at REAL NOT NULL,
+    poll_id INTEGER NOT NULL,
+    quota_id INTEGER NOT NULL,
+    name TEXT,
+    hits INTEGER,
+    quota INTEGER,
+    "left" INTEGER,
+    source_ids TEXT
+);
+CREATE INDEX IF NOT EXISTS statistics_poll ON statistics (poll_id, taken_at);
+CREATE INDEX IF NOT EXISTS conversions_poll ON conversions (poll_id, taken_at);
+CREATE INDEX IF NOT EXISTS quotas_poll ON quotas (poll_id, taken_at);
+"""
+
+QUOTA_FIELDS = ("taken_at", "poll_id", "quota_id", "name", "hits", "quota", "left", "source_ids")
+
+
+class SnapshotStore:
+    """
+    Append-only SQLite store of statistics, conversions and quota snapshots.
+
+    Reads never touch the network. Methods are blocking, SnapshotCollector calls them
+    from worker threads.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        utils.create_sub_dirs(self.path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+    def append(self, kind: SnapshotKind, taken_at: float, results: Dict[int, Any]) -> None:
+        rows = [(taken_at, poll_id, json.dumps(data)) for poll_id, data in results.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT INTO {kind} VALUES (?, ?, ?)", rows)
+
+
+    def append_quotas(self, taken_at: float, table: sm.QuotaTable) -> None:
+        rows = zip(
+            [taken_at] * len(table),
+            table.poll_id, table.quota_id, table.name, table.hits, table.quota, table.left,
+            (json.dumps(s) for s in table.source_ids),
+        )
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO quotas VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+    def latest(self, kind: SnapshotKind, poll_id: int) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT taken_at, data FROM {kind} WHERE poll_id = ? ORDER BY taken_at DESC LIMIT 1",
+                (poll_id,),
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+
+    def history(
+            self,
+            kind: SnapshotKind,
+            poll_id: int,
+            since: Optional[float] = None,
+            until: Optional[float] = None,
+    ) -> List[Tuple[float, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT taken_at, data FROM {kind} WHERE poll_id = ? AND taken_at >= ? AND taken_at <= ? "
+                "ORDER BY taken_at",
+                (poll_id, since or 0, until or float("inf")),
+            ).fetchall()
+        return [(taken_at, json.loads(data)) for taken_at, data in rows]
+
+
+    def latest_quotas(self, poll_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM quotas WHERE poll_id = ? AND taken_at = "
+                "(SELECT MAX(taken_at) FROM quotas WHERE poll_id = ?) ORDER BY quota_id",
+                (poll_id, poll_id),
+            ).fetchall()
+        return [_quota_row(r) for r in rows]
+
+
+    def quota_history(
+            self,
+            poll_id: int,
+            quota_id: Optional[int] = None,
+            since: Optional[float] = None,
+            until: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM quotas WHERE poll_id = ? AND taken_at >= ? AND taken_at <= ?"
+        params = [poll_id, since or 0, until or float("inf")]
+        if quota_id is not None:
+            query += " AND quota_id = ?"
+            params.append(quota_id)
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY taken_at, quota_id", params).fetchall()
+        return [_quota_row(r) for r in rows]
+
+
+def _quota_row(row: tuple) -> Dict[str, Any]:
+    record = dict(zip(QUOTA_FIELDS, row))
+    record["source_ids"] = json.loads(record["source_ids"])
+    return record
+
+
+class SnapshotCollector:
+    """Periodically snapshots statistics, conversions and quotas of a set of polls into a SnapshotStore."""
+
+    def __init__(
+            self,
+            client: "SocAPIClient",
+            store: SnapshotStore,
+            poll_ids: Iterable[int],
+            interval: float = 300,
+            kinds: Iterable[Literal["statistics", "conversions", "quotas"]] = ("statistics", "conversions", "quotas"),
+    ):
+        self.client = client
+        self.store = store
+        self.poll_ids = list(dict.fromkeys(poll_ids))
+        self.interval = interval
+        self.kinds = set(kinds)
+        self.errors: Dict[Tuple[str, int], Exception] = {}
+
+
+    async def collect_once(self) -> float:
+        taken_at = time.time()
+        fetches = {}
+        if "statistics" in self.kinds:
+            fetches["statistics"] = self.client.get_statistics_many(self.poll_ids)
+        if "conversions" in self.kinds:
+            fetches["conversions"] = self.client.get_conversions_many(self.poll_ids)
+        if "quotas" in self.kinds:
+            fetches["quotas"] = self.client.get_quotas_table(self.poll_ids)
+
+        results = dict(zip(fetches, await asyncio.gather(*fetches.values())))
+
+        self.errors = {}
+        for kind, result in results.items():
+            self.errors.update({(kind, poll_id): e for poll_id, e in result.errors.items()})
+            if kind == "quotas":
+                await asyncio.to_thread(self.store.append_quotas, taken_at, result)
+            else:
+                await asyncio.to_thread(self.store.append, kind, taken_at, result.results)
+
+        return taken_at
+
+
+    async def run(self) -> None:
+        while True:
+            started = time.monotonic()
+            await self.collect_once()
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
@@ -1,19 +1,158 @@
-from typing import TYPE_CHECKING, Optional, List
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Iterable, Hashable, AsyncIterator, Tuple, Union
+from typing import Callable, Sequence, Literal
 
 if TYPE_CHECKING:
     from __init__ import SocAPIClient
 
 import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from array import array
 from http import HTTPMethod
 
+from pydantic import BaseModel
+
 from . import utils
+from . import _loop_monitor
 
 
 from .models import _client_model as cm
 from .models import _download_models as dm
 from .models import _stat_models as sm
+from ._schema_cache import SchemaCache
+from ._activity import ActivityState, counters_delta, extract_counters
+
+def make_stat_filter(
+        time_from: Optional[str] = None,
+        time_to: Optional[str] = None,
+        is_poll_complete: Optional[bool] = True,
+        is_poll_in_progress: Optional[bool] = True,
+        is_disqualified: Optional[bool] = None,
+        questions: Optional[List[dm.QuestionFilter]] = None,
+        utm_source: Optional[List[int]] = None,
+        counters_ids: Optional[List[int]] = None,
+        domain_ids: Optional[List[int]] = None,
+) -> sm.StatFilter:
+    return sm.StatFilter(
+        is_poll_complete=is_poll_complete,
+        is_poll_in_progress=is_poll_in_progress,
+        questions=questions,
+        utm_source=utm_source,
+        counters_ids=counters_ids,
+        from_=time_from,  # it is ok
+        to=time_to,
+        is_disqualified=is_disqualified,
+        domain_ids=domain_ids
+    )
+
+
+def answer_filter_payload(
+        base_payload: Dict[str, Any],
+        question_id: int,
+        answer_id: int,
+        source_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    payload = dict(base_payload)
+    payload["questions"] = base_payload.get("questions", []) + [{"question_id": question_id, "answer_ids": [answer_id]}]
+    if source_id is not None:
+        payload["utm_source"] = [source_id]
+    return payload
+
+
+def diff_quota_snapshot(
+        poll_id: int,
+        previous: Optional[Dict[int, Tuple[int, int]]],
+        quotas: List[Dict[str, Any]],
+) -> Tuple[Dict[int, Tuple[int, int]], List[sm.QuotaDelta]]:
+    snapshot = {q["id"]: (q["hits"], q["quota"]) for q in quotas}
+    names = {q["id"]: q["name"] for q in quotas}
+    previous = previous or {}
+    deltas = []
+
+    for quota_id, (hits, quota) in snapshot.items():
+        old = previous.get(quota_id)
+        if old == (hits, quota):
+            continue
+        old_hits, old_quota = old if old is not None else (0, 0)
+        deltas.append(sm.QuotaDelta(
+            poll_id=poll_id,
+            quota_id=quota_id,
+            name=names[quota_id],
+            hits=hits,
+            quota=quota,
+            hits_delta=hits - old_hits,
+            quota_delta=quota - old_quota,
+            is_new=old is None,
+            closed=old is not None and old_hits < old_quota and hits >= quota,
+        ))
+
+    for quota_id, (hits, quota) in previous.items():
+        if quota_id not in snapshot:
+            deltas.append(sm.QuotaDelta(
+                poll_id=poll_id, quota_id=quota_id, name="", hits=0, quota=0,
+                hits_delta=-hits, quota_delta=-quota, is_removed=True,
+            ))
+
+    return snapshot, deltas
+
+
+def _filter_key_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unsupported filter value: {value!r}")
+
+
+@lru_cache(maxsize=256)
+def _cached_filter_payload(key: str) -> Dict[str, Any]:
+    return make_stat_filter(**json.loads(key)).model_dump()
+
+
+def stat_filter_payload(**filter_args: Any) -> Dict[str, Any]:
+    # validated once per distinct filter, the returned dict is shared and must not be mutated
+    key = json.dumps(filter_args, sort_keys=True, default=_filter_key_default)
+    return _cached_filter_payload(key)
+
+
+SERIES_BUCKETS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+
+def to_utc_datetime(value: Union[str, datetime]) -> datetime:
+    if isinstance(value, str):
+        return dm.parse_datetime(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+# a monday midnight, buckets of any step line up with it
+SERIES_ORIGIN = datetime(1970, 1, 5, tzinfo=cm.PLATFORM_TIMEZONE)
+
+
+def iter_windows(
+        start: datetime,
+        end: datetime,
+        step: timedelta,
+        origin: datetime = SERIES_ORIGIN,
+) -> Iterable[Tuple[datetime, datetime, datetime]]:
+    """
+    (bucket start, window start, window end) of the buckets of a grid of `step` from `origin`
+    that overlap start..end. Windows are the buckets, the first and last clipped to start and end.
+    """
+    bucket_start = (origin + (start - origin) // step * step).astimezone(start.tzinfo)
+    while bucket_start < end:
+        yield bucket_start, max(bucket_start, start), min(bucket_start + step, end)
+        bucket_start += step
+
 
 class Statistic:
+    @cm.validate_login
     async def _get_quota_values(self: "SocAPIClient", poll_id: int):
         r = await self._request(
             method=HTTPMethod.POST,
@@ -27,30 +166,202 @@ class Statistic:
         return r
 
 
-    @cm.validate_login
     async def get_quota(self: "SocAPIClient", poll_id: int):
 
-        quotas, sources = await asyncio.gather(
-            self._get_quota_values(poll_id),
-            self.get_sources(poll_id)
-        )
+        with _loop_monitor.operation("get_quota"):
+            quotas, sources = await asyncio.gather(
+                self._get_quota_values(poll_id),
+                self.get_sources(poll_id)
+            )
 
-        sources_labels = {source["id"] : source["name"] for source in sources}
+            with _loop_monitor.blocking_section("quota dict"):
+                sources_labels = {source["id"] : source["name"] for source in sources}
 
-        quota_dict = {
-            quota["id"]: {
-                "name":quota["name"],
-                "hits": quota["hits"],
-                "quota": quota["quota"],
-                "left": quota["quota"] - quota["hits"],
-                "sources": quota["source_ids"],
-                "sources_labels": [sources_labels[s] for s in quota["source_ids"]],
-            } for quota in quotas
-            }
+                quota_dict = {
+                    quota["id"]: {
+                        "name":quota["name"],
+                        "hits": quota["hits"],
+                        "quota": quota["quota"],
+                        "left": quota["quota"] - quota["hits"],
+                        "sources": quota["source_ids"],
+                        "sources_labels": [sources_labels[s] for s in quota["source_ids"]],
+                    } for quota in quotas
+                    }
 
         return quota_dict
 
 
+    async def get_statistics_series(
+            self: "SocAPIClient",
+            poll_id: int,
+            start: Union[str, datetime],
+            end: Optional[Union[str, datetime]] = None,
+            bucket: Union[Literal["hour", "day", "week"], timedelta] = "day",
+            count_field: str = "ended_count",
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+            **common_filter: Any,
+    ) -> sm.StatisticsSeries:
+        """
+        `count_field` of statistics per time bucket from start to end (now by default).
+
+        Buckets start at multiples of `bucket` in platform time (hours, midnights, mondays),
+        only the first and last are clipped to start and end. Each bucket is one windowed
+        statistics request, all run concurrently. Buckets that ended in the past are cached on
+        the client, so a refresh, also of a sliding range, only requests the bucket that is
+        still open and the clipped first one. Buckets starting in the future are zero.
+        """
+        step = SERIES_BUCKETS[bucket] if isinstance(bucket, str) else bucket
+        now = datetime.now(timezone.utc)
+        start = to_utc_datetime(start)
+        end = to_utc_datetime(end) if end is not None else now
+
+        base_filter = make_stat_filter(**common_filter)
+        windows = list(iter_windows(start, end, step))
+
+        def fetch(bucket_start: datetime, window_start: datetime, window_end: datetime):
+            # windows are closed on the left and open on the right
+            payload = base_filter.model_copy(update={
+                "from_": window_start,
+                "to": window_end - timedelta(milliseconds=1),
+            }).model_dump()
+
+            # judged by the natural end, the last window is clipped to `end` and would look closed
+            if bucket_start + step > now:
+                return self._post_statistics(poll_id, payload)
+            key = (poll_id, json.dumps(payload, sort_keys=True))
+            return self._closed_window_memo.get(key, lambda: self._post_statistics(poll_id, payload))
+
+        series = sm.StatisticsSeries(
+            poll_id=poll_id,
+            bucket_starts=array("d", (w[0].timestamp() for w in windows)),
+            counts=array("q", [0]) * len(windows),
+        )
+
+        requests = [(i, fetch(*w)) for i, w in enumerate(windows) if w[1] < now]
+        async for i, result in utils.iter_completed(requests, limit):
+            if isinstance(result, Exception):
+                series.errors[series.bucket_starts[i]] = result
+                series.counts[i] = sm.MISSING_COUNT
+            else:
+                series.counts[i] = result[count_field]
+
+        return series
+
+
+    async def _get_cached_sources(self: "SocAPIClient", poll_id: int):
+        # for the multi-poll table only, get_quota keeps reading sources fresh
+        return await self._stat_memo.get(("sources", poll_id), lambda: self.get_sources(poll_id))
+
+
+    async def get_quotas_table(
+            self: "SocAPIClient",
+            poll_ids: Iterable[int],
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+    ) -> sm.QuotaTable:
+        poll_ids = list(dict.fromkeys(poll_ids))
+
+        async def fetch(poll_id: int):
+            return await asyncio.gather(self._get_quota_values(poll_id), self._get_cached_sources(poll_id))
+
+        fetched = {}
+        async for poll_id, result in utils.iter_completed([(p, fetch(p)) for p in poll_ids], limit):
+            fetched[poll_id] = result
+
+        # rows follow the order of poll_ids, not of completion
+        table = sm.QuotaTable()
+        for poll_id in poll_ids:
+            result = fetched[poll_id]
+            if isinstance(result, Exception):
+                table.errors[poll_id] = result
+                continue
+            quotas, sources = result
+            table.extend(poll_id, quotas, {source["id"]: source["name"] for source in sources})
+
+        return table
+
+
+    async def scan_activity(
+            self: "SocAPIClient",
+            poll_ids: Iterable[int],
+            state: ActivityState,
+            counters: Optional[Sequence[str]] = None,
+            commit: bool = True,
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+    ) -> sm.ActivityScan:
+        """
+        Check many polls at once and return only those whose statistic counters moved since
+        the last commit to `state`. Counters default to every *_count field (ended_count etc.).
+
+        With commit=False the state is left untouched, so the caller can commit the returned
+        deltas once the follow-up work (e.g. download_poll) succeeded.
+        """
+        scan = sm.ActivityScan()
+
+        async for poll_id, result in self.iter_statistics_many(poll_ids, limit=limit):
+            scan.checked += 1
+            if isinstance(result, Exception):
+                scan.errors[poll_id] = result
+                continue
+            delta = counters_delta(poll_id, state.counters(poll_id), extract_counters(result, counters))
+            if delta is not None:
+                scan.active[poll_id] = delta
+
+        if commit and scan.active:
+            await asyncio.to_thread(state.commit, scan.active.values())
+
+        return scan
+
+
+    async def watch_quotas(
+            self: "SocAPIClient",
+            poll_ids: Iterable[int],
+            interval: float = 60,
+            max_interval: Optional[float] = None,
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+            emit_initial: bool = True,
+            on_error: Optional[Callable[[int, Exception], Any]] = None,
+    ) -> AsyncIterator[sm.QuotaDelta]:
+        """
+        Poll quotas of many polls forever, yielding only cells that changed since the last check.
+
+        Each poll is checked every `interval` seconds while it fills. After a check without
+        changes its interval doubles, up to `max_interval` (QUOTA_WATCH_MAX_BACKOFF * interval
+        by default), and drops back to `interval` on the next change. The first snapshot of a
+        poll is yielded in full (is_new) unless emit_initial is False. Failed checks are
+        passed to on_error and retried on the next tick.
+        """
+        max_interval = max_interval or interval * cm.QUOTA_WATCH_MAX_BACKOFF
+        semaphore = asyncio.Semaphore(limit)
+        deltas: asyncio.Queue = asyncio.Queue()
+
+        async def watch_one(poll_id: int):
+            snapshot = None
+            wait = interval
+            while True:
+                try:
+                    async with semaphore:
+                        quotas = await self._get_quota_values(poll_id)
+                except Exception as e:
+                    if on_error is not None:
+                        on_error(poll_id, e)
+                else:
+                    first = snapshot is None
+                    snapshot, changed = diff_quota_snapshot(poll_id, snapshot, quotas)
+                    if changed and (emit_initial or not first):
+                        for delta in changed:
+                            deltas.put_nowait(delta)
+                    wait = interval if first or changed else min(wait * 2, max_interval)
+                await asyncio.sleep(wait)
+
+        tasks = [asyncio.create_task(watch_one(p)) for p in dict.fromkeys(poll_ids)]
+        try:
+            while True:
+                yield await deltas.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
     @cm.validate_login
     async def get_conversions(self: "SocAPIClient", poll_id: int):
 
@@ -74,7 +385,6 @@ class Statistic:
         return r
 
 
-    @cm.validate_login
     async def get_statistics(
             self: "SocAPIClient",
             poll_id: int,
@@ -91,21 +401,26 @@ class Statistic:
             domain_ids: Optional[List[int]] = None,
     ):
 
-        filter_params = sm.StatFilter(
+        filter_payload = stat_filter_payload(
+            time_from=time_from,
+            time_to=time_to,
             is_poll_complete=is_poll_complete,
             is_poll_in_progress=is_poll_in_progress,
+            is_disqualified=is_disqualified,
             questions=questions,
             utm_source=utm_source,
             counters_ids=counters_ids,
-            from_=time_from,  # it is ok
-            to=time_to,
-            is_disqualified=is_disqualified,
-            domain_ids=domain_ids
+            domain_ids=domain_ids,
         )
 
+        return await self._post_statistics(poll_id, filter_payload)
+
+
+    @cm.validate_login
+    async def _post_statistics(self: "SocAPIClient", poll_id: int, filter_payload: Dict[str, Any]):
         statistic_payload = {
             "id": poll_id,
-            **filter_params.model_dump()
+            **filter_payload
         }
 
         r = await self._request(
@@ -119,6 +434,135 @@ class Statistic:
         return r
 
 
+    async def iter_statistics_many(
+            self: "SocAPIClient",
+            poll_ids: Iterable[int],
+            filters: Optional[Dict[Hashable, Dict[str, Any]]] = None,
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+            **common_filter: Any,
+    ) -> AsyncIterator[Tuple[Hashable, Any]]:
+        """
+        Statistics for many polls, yielded as (key, result) in completion order.
+
+        Keyword filters of get_statistics apply to every request. With `filters`, each poll is
+        queried once per named filter set (merged over the common filters) and keys are
+        (poll_id, filter_name); otherwise keys are poll ids. A failed request yields its
+        exception in place of the result.
+        """
+        poll_ids = list(dict.fromkeys(poll_ids))
+
+        if filters is None:
+            payload = stat_filter_payload(**common_filter)
+            requests = [(p, self._post_statistics(p, payload)) for p in poll_ids]
+        else:
+            payloads = {name: stat_filter_payload(**{**common_filter, **f}) for name, f in filters.items()}
+            requests = [
+                ((p, name), self._post_statistics(p, payload))
+                for p in poll_ids for name, payload in payloads.items()
+            ]
+
+        async for item in utils.iter_completed(requests, limit):
+            yield item
+
+
+    async def get_statistics_many(
+            self: "SocAPIClient",
+            poll_ids: Iterable[int],
+            filters: Optional[Dict[Hashable, Dict[str, Any]]] = None,
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+            **common_filter: Any,
+    ) -> sm.BatchResult:
+        return await sm.BatchResult.collect(
+            self.iter_statistics_many(poll_ids, filters=filters, limit=limit, **common_filter)
+        )
+
+
+    async def _get_memoized_statistics(self: "SocAPIClient", poll_id: int, filter_payload: Dict[str, Any]):
+        key = (poll_id, json.dumps(filter_payload, sort_keys=True))
+        return await self._stat_memo.get(key, lambda: self._post_statistics(poll_id, filter_payload))
+
+
+    async def get_answer_distribution(
+            self: "SocAPIClient",
+            poll_id: int,
+            question_ids: Union[int, Iterable[int]],
+            source_ids: Optional[Iterable[int]] = None,
+            count_field: str = "ended_count",
+            cache: Optional[SchemaCache] = None,
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+            **common_filter: Any,
+    ) -> sm.AnswerDistribution:
+        """
+        Count `count_field` of statistics for every answer of the given questions,
+        optionally split by source (utm_source).
+
+        Answers are taken from the poll schema, filtered requests run concurrently and
+        identical requests are shared through the client's statistics memo. Failed cells
+        are left at MISSING_COUNT and reported in `errors`.
+        """
+        question_ids = [question_ids] if isinstance(question_ids, int) else list(dict.fromkeys(question_ids))
+        sources = list(source_ids) if source_ids is not None else [None]
+
+        schema = await self.get_poll_schema(poll_id, cache=cache)
+        unknown = [q for q in question_ids if q not in schema]
+        if unknown:
+            raise ValueError(f"Questions not found in poll {poll_id}: {unknown}")
+
+        base_payload = stat_filter_payload(**common_filter)
+
+        offsets = array("q", [0])
+        answer_ids = array("q")
+        requests = []
+        for question_id in question_ids:
+            for answer_id in schema.answers_of(question_id):
+                for source_id in sources:
+                    payload = answer_filter_payload(base_payload, question_id, answer_id, source_id)
+                    requests.append((
+                        (len(answer_ids), source_id, question_id, answer_id),
+                        self._get_memoized_statistics(poll_id, payload)
+                    ))
+                answer_ids.append(answer_id)
+            offsets.append(len(answer_ids))
+
+        source_pos = {s: col for col, s in enumerate(sources)}
+        counts = array("q", [sm.MISSING_COUNT]) * (len(answer_ids) * len(sources))
+        errors = {}
+
+        async for (row, source_id, question_id, answer_id), result in utils.iter_completed(requests, limit):
+            if isinstance(result, Exception):
+                errors[(question_id, answer_id, source_id)] = result
+                continue
+            counts[row * len(sources) + source_pos[source_id]] = result[count_field]
+
+        return sm.AnswerDistribution(
+            question_ids=array("q", question_ids),
+            offsets=offsets,
+            answer_ids=answer_ids,
+            source_ids=array("q", sources) if source_ids is not None else None,
+            counts=counts,
+            errors=errors,
+        )
+
+
+    async def iter_conversions_many(
+            self: "SocAPIClient",
+            poll_ids: Iterable[int],
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        requests = [(p, self.get_conversions(p)) for p in dict.fromkeys(poll_ids)]
+
+        async for item in utils.iter_completed(requests, limit):
+            yield item
+
+
+    async def get_conversions_many(
+            self: "SocAPIClient",
+            poll_ids: Iterable[int],
+            limit: int = cm.MAX_CONCURRENT_STAT_REQUESTS,
+    ) -> sm.BatchResult:
+        return await sm.BatchResult.collect(self.iter_conversions_many(poll_ids, limit=limit))
+
+
     # @cm.validate_login
     # async def get_poll_target_metadata(self: "SocAPIClient", poll_id: int):
     #
@@ -0,0 +1,162 @@
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+import json
+import statistics
+import time
+
+from .models import _download_models as dm
+from .models import _metrics_models as mm
+
+# span of the stage running in the current task, request events are attributed to it
+_current_span: ContextVar[Optional[Tuple["DownloadTrace", dm.TraceSpan]]] = ContextVar("socapi_span", default=None)
+
+
+class DownloadTrace:
+    """
+    Stage spans of a download_poll batch: export submission, waiting for the export to be ready,
+    file transfer and export release, one of each per poll, plus batch level progress checks.
+    Registered as a request hook while the batch runs, so spans get their retries and bytes.
+
+        trace = DownloadTrace()
+        await client.download_poll(poll_ids, trace=trace)
+        trace.breakdown()
+        trace.to_json("trace.json")   # chrome://tracing / Perfetto
+    """
+
+    def __init__(self):
+        self.spans: List[dm.TraceSpan] = []
+        # wall clock anchor of the perf_counter timestamps
+        self._epoch_ns = time.time_ns()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, poll_id: Optional[int] = None, **attrs) -> Iterator[dm.TraceSpan]:
+        span = dm.TraceSpan(name=name, poll_id=poll_id, start=time.perf_counter(), attrs=attrs)
+        self.spans.append(span)
+        token = _current_span.set((self, span))
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+
+    def __call__(self, event: mm.RequestEvent) -> None:
+        current = _current_span.get()
+        if current is None or current[0] is not self:
+            return
+        span = current[1]
+        if event.kind == "start":
+            span.attrs["requests"] = span.attrs.get("requests", 0) + 1
+        elif event.kind == "retry":
+            span.attrs["retries"] = span.attrs.get("retries", 0) + 1
+        if event.kind != "start" and event.bytes_received:
+            span.attrs["bytes"] = span.attrs.get("bytes", 0) + event.bytes_received
+
+    def polls(self) -> Dict[int, List[dm.TraceSpan]]:
+        by_poll: Dict[int, List[dm.TraceSpan]] = {}
+        for span in self.spans:
+            if span.poll_id is not None:
+                by_poll.setdefault(span.poll_id, []).append(span)
+        return by_poll
+
+    def breakdown(self) -> Dict[str, dm.StageStats]:
+        """
+        Latency per stage over the batch, the stage with the largest total is where time went.
+        Stages come in pipeline order (DOWNLOAD_STAGES), other spans such as progress after them.
+        """
+        stages: Dict[str, List[dm.TraceSpan]] = {}
+        for span in self.spans:
+            if span.end is not None:
+                stages.setdefault(span.name, []).append(span)
+
+        pipeline = {name: i for i, name in enumerate(dm.DOWNLOAD_STAGES)}
+        result = {}
+        for name in sorted(stages, key=lambda n: pipeline.get(n, len(pipeline))):
+            spans = stages[name]
+            durations = sorted(s.duration for s in spans)
+            result[name] = dm.StageStats(
+                stage=name,
+                count=len(durations),
+                total=sum(durations),
+                mean=statistics.fmean(durations),
+                p50=durations[len(durations) // 2],
+                p90=durations[min(len(durations) - 1, int(len(durations) * 0.9))],
+                max=durations[-1],
+                errors=sum(s.error is not None for s in spans),
+                retries=sum(s.attrs.get("retries", 0) for s in spans),
+                bytes=sum(s.attrs.get("bytes", 0) for s in spans),
+            )
+        return result
+
+    def _wall_ns(self, t: float) -> int:
+        return self._epoch_ns + int((t - self._origin) * 1e9)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        events = []
+        for span in self.spans:
+            args = dict(span.attrs)
+            if span.error is not None:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": "download_poll",
+                "ph": "X",
+                "ts": self._wall_ns(span.start) / 1000,
+                "dur": span.duration * 1e6,
+                "pid": 1,
+                # one row per poll, batch level spans on row 0
+                "tid": span.poll_id if span.poll_id is not None else 0,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_json(self, path: Optional[str | Path] = None) -> str:
+        text = json.dumps(self.to_chrome_trace(), ensure_ascii=False, default=str)
+        if path is not None:
+            Path(path).write_text(text, encoding="utf-8")
+        return text
+
+    def to_opentelemetry(self, tracer=None) -> None:
+        """
+        Replays the spans into OpenTelemetry, one root span per poll with its stages as children.
+        Requires opentelemetry-api, spans go to whatever tracer provider is configured.
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("to_opentelemetry requires opentelemetry-api, pip install opentelemetry-api")
+
+        tracer = tracer or trace.get_tracer("socapi")
+        for poll_id, spans in self.polls().items():
+            root = tracer.start_span(
+                "download_poll",
+                start_time=self._wall_ns(min(s.start for s in spans)),
+                attributes={"poll_id": poll_id},
+            )
+            context = trace.set_span_in_context(root)
+            for span in spans:
+                child = tracer.start_span(
+                    span.name,
+                    context=context,
+                    start_time=self._wall_ns(span.start),
+                    attributes={k: v for k, v in span.attrs.items() if v is not None},
+                )
+                if span.error is not None:
+                    child.set_status(trace.Status(trace.StatusCode.ERROR, span.error))
+                child.end(end_time=self._wall_ns(span.end if span.end is not None else span.start))
+            root.end(end_time=self._wall_ns(max(s.end or s.start for s in spans)))
+
+
+class _NoTrace:
+    """Stands in for DownloadTrace when tracing is off."""
+
+    def span(self, name: str, poll_id: Optional[int] = None, **attrs):
+        return nullcontext()
+
+
+NO_TRACE = _NoTrace()
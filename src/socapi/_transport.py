@@ -0,0 +1,305 @@
+from typing import Dict, Any, Optional, List, Callable, AsyncIterator, AsyncContextManager, Deque
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from urllib.parse import urlsplit
+import asyncio
+import base64
+import json
+import time
+
+from . import expeptions
+
+# payload keys whose values never leave the machine in a recording
+SENSITIVE_KEYS = frozenset({"login", "password", "session_token", "token", "email", "phone"})
+MASK = "***"
+
+
+class TransportResponse(ABC):
+    """The part of aiohttp.ClientResponse the client uses."""
+
+    status: int
+    headers: Dict[str, str]
+    content_length: Optional[int]
+
+    @abstractmethod
+    async def read(self) -> bytes:
+        ...
+
+    @abstractmethod
+    def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        ...
+
+    @abstractmethod
+    def raise_for_status(self) -> None:
+        ...
+
+
+class Transport(ABC):
+    """
+    Sends the client's HTTP requests. ClientModel.transport defaults to AiohttpTransport;
+    RecordingTransport and ReplayTransport capture and serve sessions for offline testing.
+    """
+
+    @abstractmethod
+    def request(
+            self,
+            method: str,
+            url: str,
+            headers: Optional[Dict[str, str]] = None,
+            data: Optional[bytes] = None,
+            ssl: Optional[bool] = False,
+    ) -> AsyncContextManager[TransportResponse]:
+        ...
+
+
+class _AiohttpResponse(TransportResponse):
+
+    __slots__ = ("_response",)
+
+    def __init__(self, response):
+        self._response = response
+
+    @property
+    def status(self) -> int:
+        return self._response.status
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    @property
+    def content_length(self) -> Optional[int]:
+        return self._response.content_length
+
+    async def read(self) -> bytes:
+        return await self._response.read()
+
+    def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        return self._response.content.iter_chunked(size)
+
+    def raise_for_status(self) -> None:
+        self._response.raise_for_status()
+
+
+class AiohttpTransport(Transport):
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, data=None, ssl=False):
+        import aiohttp
+        async with aiohttp.request(method=method, url=url, headers=headers, data=data, ssl=ssl) as response:
+            yield _AiohttpResponse(response)
+
+
+def sanitize(value: Any) -> Any:
+    """Masks SENSITIVE_KEYS at any depth of a decoded json value."""
+    if isinstance(value, dict):
+        return {k: MASK if k in SENSITIVE_KEYS else sanitize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v) for v in value]
+    return value
+
+
+def _decode_json(data: Optional[bytes]) -> Any:
+    if not data:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def exchange_key(method: str, url: str, data: Optional[bytes], sanitizer: Callable[[Any], Any] = sanitize) -> str:
+    # host independent and stable over payload key order, so a recording replays against any platform
+    body = sanitizer(_decode_json(data))
+    return f"{str(method).upper()} {urlsplit(url).path} {json.dumps(body, sort_keys=True, ensure_ascii=False)}"
+
+
+@dataclass
+class Exchange:
+    """One recorded request/response. `at` and `duration` are seconds from the recording start."""
+    key: str
+    at: float
+    duration: float
+    status: int
+    content_type: str
+    body: Optional[str]
+    # base64 for binary bodies, json text otherwise
+    binary: bool
+    size: int
+    # transport error that cut the body, raised again after it on replay
+    error: Optional[str] = None
+
+
+class _RecordingResponse(TransportResponse):
+
+    def __init__(self, response: TransportResponse):
+        self._response = response
+        self.chunks: List[bytes] = []
+        self.error: Optional[BaseException] = None
+        self.status = response.status
+        self.headers = response.headers
+        self.content_length = response.content_length
+
+    async def read(self) -> bytes:
+        try:
+            body = await self._response.read()
+        except Exception as e:
+            self.error = e
+            raise
+        self.chunks.append(body)
+        return body
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._response.iter_chunked(size):
+                self.chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self.error = e
+            raise
+
+    def raise_for_status(self) -> None:
+        self._response.raise_for_status()
+
+
+class RecordingTransport(Transport):
+    """
+    Passes requests to `inner` and appends every exchange to a jsonl file. Request and response
+    json bodies are sanitized and no headers are stored. Bodies larger than `max_body` bytes
+    (statistics files) are stored by size only and replayed as zero bytes of that size.
+    """
+
+    def __init__(
+            self,
+            path: str | Path,
+            inner: Optional[Transport] = None,
+            max_body: int = 1024 * 1024,
+            sanitizer: Callable[[Any], Any] = sanitize,
+    ):
+        self.path = Path(path)
+        self.inner = inner or AiohttpTransport()
+        self.max_body = max_body
+        self.sanitizer = sanitizer
+        self._started = time.perf_counter()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, data=None, ssl=False):
+        started = time.perf_counter()
+        async with self.inner.request(method, url, headers=headers, data=data, ssl=ssl) as response:
+            recorded = _RecordingResponse(response)
+            try:
+                yield recorded
+            finally:
+                # also when the caller raised on the status or the body was cut, replays of
+                # retries and re-logins need those answers
+                self._write(method, url, data, recorded, started)
+
+    def _write(self, method, url, data, response: _RecordingResponse, started: float) -> None:
+        body = b"".join(response.chunks)
+        content_type = response.headers.get("Content-Type", "")
+        is_json = "application/json" in content_type
+        stored, binary = None, False
+        if is_json:
+            decoded = _decode_json(body)
+            stored = json.dumps(self.sanitizer(decoded), ensure_ascii=False) if decoded is not None else None
+        elif body and len(body) <= self.max_body:
+            stored, binary = base64.b64encode(body).decode("ascii"), True
+
+        exchange = Exchange(
+            key=exchange_key(method, url, data, self.sanitizer),
+            at=started - self._started,
+            duration=time.perf_counter() - started,
+            status=response.status,
+            content_type=content_type,
+            body=stored,
+            binary=binary,
+            size=len(body),
+            error=type(response.error).__name__ if response.error is not None else None,
+        )
+        self._file.write(json.dumps(asdict(exchange), ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ReplayResponse(TransportResponse):
+
+    def __init__(self, exchange: Exchange, method: str, url: str):
+        self._method = str(method).upper()
+        self._url = url
+        self._error = exchange.error
+        self.status = exchange.status
+        self.headers = {"Content-Type": exchange.content_type} if exchange.content_type else {}
+        self.content_length = exchange.size
+        if exchange.body is None:
+            self._body = bytes(exchange.size)
+        elif exchange.binary:
+            self._body = base64.b64decode(exchange.body)
+        else:
+            self._body = exchange.body.encode("utf-8")
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            import aiohttp
+            from multidict import CIMultiDict, CIMultiDictProxy
+            from yarl import URL
+            # same error as a live response, callers may log or inspect its request_info
+            url = URL(self._url)
+            request_info = aiohttp.RequestInfo(url, self._method, CIMultiDictProxy(CIMultiDict()), url)
+            raise aiohttp.ClientResponseError(
+                request_info, (), status=self.status, message=f"replayed status {self.status}"
+            )
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            import aiohttp
+            raise aiohttp.ClientPayloadError(f"replayed {self._error}")
+
+    async def read(self) -> bytes:
+        self._raise_error()
+        return self._body
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        for i in range(0, len(self._body), size):
+            yield self._body[i:i + size]
+        self._raise_error()
+
+
+class ReplayTransport(Transport):
+    """
+    Serves a recording made by RecordingTransport. Requests are matched by method, path and
+    sanitized json body; repeated requests get the recorded answers in order, the last one
+    again once they run out (progress polling). Each answer takes its recorded duration
+    divided by `speed`, speed=None answers at once. Unmatched requests raise ReplayMismatchError.
+    """
+
+    def __init__(self, path: str | Path, speed: Optional[float] = 1.0, sanitizer: Callable[[Any], Any] = sanitize):
+        self.speed = speed
+        self.sanitizer = sanitizer
+        self.exchanges: Dict[str, Deque[Exchange]] = {}
+        self.served = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    exchange = Exchange(**json.loads(line))
+                    self.exchanges.setdefault(exchange.key, deque()).append(exchange)
+
+    def _next(self, key: str) -> Exchange:
+        queue = self.exchanges.get(key)
+        if not queue:
+            raise expeptions.ReplayMismatchError(key)
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, data=None, ssl=False):
+        exchange = self._next(exchange_key(method, url, data, self.sanitizer))
+        if self.speed:
+            await asyncio.sleep(exchange.duration / self.speed)
+        self.served += 1
+        yield _ReplayResponse(exchange, method, url)
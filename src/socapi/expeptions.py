@@ -50,3 +50,29 @@ class FailedDownloadPolls(AppError):
 
 
 
+
+
+
+class DependencyFailedError(AppError):
+    """Raised when an item was not created because its parent failed."""
+    def __init__(self, key: str, parent_key: str):
+        message = f"{key} skipped, parent {parent_key} was not created."
+        self.parent_key = parent_key
+        super().__init__(message)
+
+
+class ShortLinksChunkError(AppError):
+    """Raised when the platform answered a links request with another number of links."""
+    def __init__(self, requested: int, received: int):
+        message = f"Requested {requested} links, received {received}."
+        self.requested = requested
+        self.received = received
+        super().__init__(message)
+
+
+class ReplayMismatchError(AppError):
+    """Raised when a replayed session has no recorded answer for a request."""
+    def __init__(self, key: str):
+        message = f"No recorded exchange for {key}."
+        self.key = key
+        super().__init__(message)
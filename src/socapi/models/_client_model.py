@@ -1,22 +1,48 @@
 from typing import List, Literal, Union, get_args, Iterable, Dict, Optional, Any
-from typing import Callable, Awaitable, Optional, Dict, Any, Union, ClassVar
+from typing import Callable, Awaitable, Optional, Dict, Any, Union, ClassVar, AsyncIterator, TYPE_CHECKING
 
-from pydantic import BaseModel, field_validator, Field, ConfigDict, model_validator, computed_field
+from pydantic import BaseModel, field_validator, Field, ConfigDict, model_validator, computed_field, PrivateAttr
+# aiohttp is imported lazily by the transport and the request methods, it is the heaviest import of the package
 from enum import Enum
-import aiohttp
 from http import HTTPStatus, HTTPMethod
 import asyncio
 from pydantic import validate_call, ValidationError
 import inspect
+import dataclasses
+import time
+import warnings
+from datetime import timezone, timedelta
 from pathlib import Path
 
 from .. import expeptions
-from .. import utils
+from .. import _codec
+from .. import _loop_monitor
+from .. import _transport
+from . import _metrics_models as mm
+
+if TYPE_CHECKING:
+    from .._metrics import MetricsCollector
 
 RETRIES_NUM = 3
 REQUEST_RETRIE_INTERVAL = 1
 MAX_CONCURRENT_DOWNLOAD_REQUESTS = 5
+MAX_CONCURRENT_SCHEMA_REQUESTS = 5
+MAX_CONCURRENT_STAT_REQUESTS = 5
+STAT_CACHE_TTL = 60
+# distinct statistics filters kept at most
+STAT_CACHE_SIZE = 1024
+# statistics of closed series buckets kept at most
+CLOSED_WINDOW_CACHE_SIZE = 8192
+# platform time (UTC+3), days and weeks of statistics series start at its midnight
+PLATFORM_TIMEZONE = timezone(timedelta(hours=3))
+# cached poll schemas older than this are revalidated in full
+SCHEMA_CACHE_MAX_AGE = 3600
+QUOTA_WATCH_MAX_BACKOFF = 8
+MAX_LINKS_PER_REQUEST = 1000
+MAX_CONCURRENT_LINK_REQUESTS = 3
+MAX_CONCURRENT_CONSTRUCT_REQUESTS = 5
 DOWNLOAD_CHUNK_SIZE = 1024
+STREAM_CHUNK_SIZE = 64 * 1024
 DEFAULT_DOMAIN_IDS = [1]
 
 
@@ -83,6 +109,23 @@ class RequestNames(str, Enum):
     EXPORT_DONE = "Done"
     STATISTIC = "Statistics"
     PERSONAL_LINKS = "Links"
+    BLOCK_CREATE = "Create block"
+    QUESTION_CREATE = "Create question"
+    ANSWER_CREATE = "Create answer"
+
+
+def raise_for_platform_status(status: int, request_name: RequestNames) -> None:
+    match status:
+        case HTTPStatus.OK:
+            return
+        case HTTPStatus.LOCKED:
+            raise expeptions.AuthError
+        case HTTPStatus.UNAUTHORIZED:
+            raise expeptions.TokenError
+        case HTTPStatus.INTERNAL_SERVER_ERROR:
+            raise expeptions.PlatformError(request_name)
+        case _:
+            raise ValueError("UNCACHED STATUS", status)
 
 
 class InitSource(Enum):
@@ -91,12 +134,16 @@ class InitSource(Enum):
 
 
 def validate_login(func):
+    name = func.__name__.lstrip("_")
+
     async def wrapper(self, *args, **kwargs):
-        try:
-            return await func(self, *args, **kwargs)
-        except expeptions.TokenError as e:
-            await self._login()
-            return await func(self, *args, **kwargs)
+        with _loop_monitor.operation(name):
+            token = self.token
+            try:
+                return await func(self, *args, **kwargs)
+            except expeptions.TokenError as e:
+                await self._relogin(token)
+                return await func(self, *args, **kwargs)
     return wrapper
 
 
@@ -112,20 +159,54 @@ class ClientModel(BaseModel):
     headers: Optional[dict[str, str]] = None
     progress_status: Optional[list[str]] = None
     semaphore: asyncio.Semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOAD_REQUESTS)
+    codec: _codec.JsonCodec = Field(default_factory=_codec.default_codec, exclude=True)
+    hooks: List[mm.RequestHook] = Field(default_factory=list, exclude=True)
+    # serves both admin and root endpoints from one host, e.g. a local stand-in of the platform
+    url_override: Optional[str] = Field(default=None, exclude=True)
+    # sends every request, swapped for a RecordingTransport or ReplayTransport to capture or replay a session
+    transport: _transport.Transport = Field(default_factory=_transport.AiohttpTransport, exclude=True)
+
+    _stat_memo: "utils.AsyncMemo" = PrivateAttr(default_factory=lambda: utils.AsyncMemo(ttl=STAT_CACHE_TTL, max_size=STAT_CACHE_SIZE))
+    # statistics of closed time windows never change
+    _closed_window_memo: "utils.AsyncMemo" = PrivateAttr(default_factory=lambda: utils.AsyncMemo(ttl=None, max_size=CLOSED_WINDOW_CACHE_SIZE))
+    # PollSchema of cached polls by poll id, with the structure it was built from
+    _poll_schemas: Dict[int, tuple] = PrivateAttr(default_factory=dict)
+    _login_task: Optional[asyncio.Task] = PrivateAttr(default=None)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
     @classmethod
-    async def from_credentials(cls, platform: str, login: str, password: str) -> "ClientModel":
-        inst = cls(platform=platform, login=login, password=password, init_source=InitSource.from_credentials)
+    async def from_credentials(
+            cls,
+            platform: str,
+            login: str,
+            password: str,
+            url_override: Optional[str] = None,
+            transport: Optional[_transport.Transport] = None,
+    ) -> "ClientModel":
+        inst = cls(
+            platform=platform, login=login, password=password,
+            init_source=InitSource.from_credentials, url_override=url_override,
+            transport=transport or _transport.AiohttpTransport(),
+        )
         await inst._login()
         return inst
 
 
     @classmethod
-    async def from_token(cls, platform: str, token: str) -> "ClientModel":
-        inst = cls(platform=platform, login=None, password=None, init_source=InitSource.from_token)
+    async def from_token(
+            cls,
+            platform: str,
+            token: str,
+            url_override: Optional[str] = None,
+            transport: Optional[_transport.Transport] = None,
+    ) -> "ClientModel":
+        inst = cls(
+            platform=platform, login=None, password=None,
+            init_source=InitSource.from_token, url_override=url_override,
+            transport=transport or _transport.AiohttpTransport(),
+        )
         inst.set_auth(token)
         await inst.profile_user()
         return inst
@@ -142,38 +223,83 @@ class ClientModel(BaseModel):
     @computed_field
     @property
     def admin_url(self) -> str:
+        if self.url_override is not None:
+            return self.url_override.rstrip("/")
         return PlatformsAdmin[self.platform.name].value
 
     @computed_field
     @property
     def base_url(self) -> str:
+        if self.url_override is not None:
+            return self.url_override.rstrip("/")
         return PlatformsRoot[self.platform.name].value
 
 
 
 
 
+    def add_hook(self, hook: mm.RequestHook) -> mm.RequestHook:
+        """Registers a callable receiving a RequestEvent for every request attempt."""
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook: mm.RequestHook) -> None:
+        self.hooks.remove(hook)
+
+    def enable_metrics(self) -> "MetricsCollector":
+        from .._metrics import MetricsCollector
+        collector = MetricsCollector()
+        self.add_hook(collector)
+        return collector
+
+    def _emit(self, event: mm.RequestEvent, kind: mm.EventKind, **changes) -> None:
+        for hook in self.hooks:
+            try:
+                hook(dataclasses.replace(event, kind=kind, **changes))
+            except Exception as e:
+                # observers must not break requests
+                warnings.warn(f"request hook {hook!r} failed: {e!r}", RuntimeWarning)
+
     async def _make_request_with_retries(
             self,
-            request_func: Callable[[], Awaitable[Any]],
+            request_func: Callable[[mm.RequestEvent], Awaitable[Any]],
             request_name: RequestNames,
             attempts: int,
-            sleep: int
+            sleep: int,
+            endpoint: str = "",
+            host: str = "",
+            retry_on: tuple[type[BaseException], ...] = (expeptions.PlatformError,),
     ) -> Any:
         for attempt in range(attempts):
+            # request_func fills status and byte counts of the event
+            event = mm.RequestEvent("start", RequestNames(request_name).value, endpoint, host, attempt)
+            queued = time.perf_counter()
+            started = None
             try:
                 async with self.semaphore:
-                    return await request_func()
-            except Exception as e:
-                if isinstance(e, expeptions.PlatformError):
-                    if attempt < attempts - 1:
-                        await asyncio.sleep(sleep)
-                        continue
+                    started = time.perf_counter()
+                    event.wait = started - queued
+                    if self.hooks: self._emit(event, "start")
+                    try:
+                        result = await request_func(event)
+                    finally:
+                        event.elapsed = time.perf_counter() - started
+                if self.hooks: self._emit(event, "end")
+                return result
+            except BaseException as e:
+                if started is None:
+                    # cancelled while waiting for a slot, the attempt never started
+                    raise
+                # BaseException so that cancelled attempts are closed by an event too
+                will_retry = isinstance(e, retry_on) and attempt < attempts - 1
+                if self.hooks: self._emit(event, "retry" if will_retry else "error", error=e)
+                if will_retry:
+                    await asyncio.sleep(sleep)
+                    continue
                 raise
         raise expeptions.MaxRetriesExceededError(request_name)
 
 
-    @validate_call
     async def _download_request(
             self,
             endpoint: Endpoints,
@@ -184,25 +310,49 @@ class ClientModel(BaseModel):
             request_name: RequestNames = RequestNames.GENERIC,
             attempts: Optional[int] = RETRIES_NUM,
             sleep: Optional[int] = REQUEST_RETRIE_INTERVAL,
+            on_chunk: Optional[Callable[[int, Optional[int]], Any]] = None,
     ):
-        request_url = f"{getattr(self, host)}/{endpoint.value}/{server_filename.name}"
-
-        async def request_func():
-            async with aiohttp.request(method=HTTPMethod.GET, url=request_url, ssl=ssl) as response:
+        """on_chunk(bytes_received, content_length) is called after every chunk written."""
+        # internal fast path: callers pass prepared values, only cheap coercions here
+        if not isinstance(server_filename, FileInput):
+            server_filename = FileInput(name=server_filename)
+        endpoint, root = Endpoints(endpoint), getattr(self, host)
+        request_url = f"{root}/{endpoint.value}/{server_filename.name}"
+        dest_path = Path(dest_path)
+
+        async def request_func(event: mm.RequestEvent):
+            async with self.transport.request(HTTPMethod.GET, request_url, ssl=ssl) as response:
+                event.status = response.status
                 response.raise_for_status()
-                utils.create_sub_dirs(dest_path)
-                with open(dest_path, 'wb') as f:
-                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
-                        f.write(chunk)
+                # file io runs on the loop, timed for the loop lag monitor when one is running
+                monitor = _loop_monitor.active_monitor()
+                with _loop_monitor.blocking_section("file open"):
+                    utils.create_sub_dirs(dest_path)
+                    f = open(dest_path, 'wb')
+                with f:
+                    async for chunk in response.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        event.bytes_received += len(chunk)
+                        if monitor is None:
+                            f.write(chunk)
+                        else:
+                            started = time.perf_counter()
+                            f.write(chunk)
+                            monitor.section("file write", started)
+                        if on_chunk is not None:
+                            on_chunk(event.bytes_received, response.content_length)
                 return None
 
-        return await self._make_request_with_retries(request_func, request_name, attempts, sleep)
+        import aiohttp
+        # a GET of a finished export is safe to repeat after a dropped or cut connection
+        retry_on = (expeptions.PlatformError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+        return await self._make_request_with_retries(
+            request_func, request_name, attempts, sleep, endpoint.value, root, retry_on
+        )
 
 
-    @validate_call
     async def _request(
             self,
-            endpoint: Endpoints,
+            endpoint: Union[Endpoints, str],
             method: HTTPMethod,
             host: Literal["admin_url", "base_url"] = "admin_url",
             headers: Optional[dict[str, str]] = None,
@@ -213,48 +363,120 @@ class ClientModel(BaseModel):
             sleep: Optional[int] = REQUEST_RETRIE_INTERVAL,
             extract_result: bool = False,
     ) -> Union[Dict[Any, Any], bytes, None, List[Any]]:
-        request_url = f"{getattr(self, host)}/{endpoint.value}"
-
-        async def request_func():
-            async with aiohttp.request(
-                    method=method,
-                    url=request_url,
-                    headers=headers,
-                    json=payload,
-                    ssl=ssl
-            ) as response:
-                match response.status:
-                    case HTTPStatus.LOCKED:
-                        raise expeptions.AuthError
-                    case HTTPStatus.UNAUTHORIZED:
-                        raise expeptions.TokenError
-                    case HTTPStatus.OK:
-                        if "application/json" in response.headers.get("Content-Type", ""):
-                            resp_json = await response.json()
-                            return resp_json.get("result") if extract_result else resp_json
-                        else:
-                            # Handle non-JSON response
-                            return None
-
-                        # # TBD
-                        # match response.headers.get("Content-Type", ""):
-                        #     case "application/json":
-                        #         resp_json = await response.json()
-                        #         return resp_json.get("result") if extract_result else resp_json
-                        #     case _:
-                        #         return None
-                    case HTTPStatus.INTERNAL_SERVER_ERROR:
-                        raise expeptions.PlatformError(request_name)
-                    case _:
-                        raise ValueError("UNCACHED STATUS", response.status)
-
-        return await self._make_request_with_retries(request_func, request_name, attempts, sleep)
+        # plain paths are sent as given, e.g. the create paths passed to build_questionnaire
+        path = endpoint.value if isinstance(endpoint, Endpoints) else endpoint
+        root = getattr(self, host)
+        request_url = f"{root}/{path}"
+        headers, data = self._encode_body(headers, payload)
+
+        async def request_func(event: mm.RequestEvent):
+            event.bytes_sent = len(data) if data else 0
+            async with self.transport.request(method, request_url, headers=headers, data=data, ssl=ssl) as response:
+                event.status = response.status
+                raise_for_platform_status(response.status, request_name)
+
+                if "application/json" in response.headers.get("Content-Type", ""):
+                    body = await response.read()
+                    event.bytes_received = len(body)
+                    with _loop_monitor.blocking_section("json decode"):
+                        resp_json = self.codec.loads(body)
+                    return resp_json.get("result") if extract_result else resp_json
+                else:
+                    # Handle non-JSON response
+                    return None
+
+        return await self._make_request_with_retries(request_func, request_name, attempts, sleep, path, root)
+
+
+    async def _request_iter(
+            self,
+            endpoint: Endpoints,
+            method: HTTPMethod,
+            host: Literal["admin_url", "base_url"] = "admin_url",
+            headers: Optional[dict[str, str]] = None,
+            payload: Optional[dict] = None,
+            ssl: Optional[bool] = False,
+            request_name: RequestNames = RequestNames.GENERIC,
+            attempts: Optional[int] = RETRIES_NUM,
+            sleep: Optional[int] = REQUEST_RETRIE_INTERVAL,
+            key: str = "result",
+    ) -> AsyncIterator[Any]:
+        """
+        Streaming variant of _request for list-shaped results: yields the items of the list
+        under `key` while the body is still arriving, without decoding the whole document.
+        Platform errors are retried before the body is read. The concurrency slot is held
+        until the list is consumed.
+        """
+        endpoint, root = Endpoints(endpoint), getattr(self, host)
+        request_url = f"{root}/{endpoint.value}"
+        headers, data = self._encode_body(headers, payload)
+
+        for attempt in range(attempts):
+            event = mm.RequestEvent("start", RequestNames(request_name).value, endpoint.value, root, attempt)
+            event.bytes_sent = len(data) if data else 0
+            queued = time.perf_counter()
+            async with self.semaphore:
+                started = time.perf_counter()
+                event.wait = started - queued
+                if self.hooks: self._emit(event, "start")
+                try:
+                    async with self.transport.request(method, request_url, headers=headers, data=data, ssl=ssl) as response:
+                        event.status = response.status
+                        if response.status != HTTPStatus.INTERNAL_SERVER_ERROR or attempt == attempts - 1:
+                            raise_for_platform_status(response.status, request_name)
+
+                            parser = _codec.JsonArrayItems(self.codec.loads, key)
+                            async for chunk in response.iter_chunked(STREAM_CHUNK_SIZE):
+                                event.bytes_received += len(chunk)
+                                for item in parser.feed(chunk):
+                                    yield item
+                            parser.close()
+                            event.elapsed = time.perf_counter() - started
+                            if self.hooks: self._emit(event, "end")
+                            return
+                except GeneratorExit:
+                    # the consumer stopped early
+                    event.elapsed = time.perf_counter() - started
+                    if self.hooks: self._emit(event, "end")
+                    raise
+                except BaseException as e:
+                    event.elapsed = time.perf_counter() - started
+                    if self.hooks: self._emit(event, "error", error=e)
+                    raise
+                event.elapsed = time.perf_counter() - started
+                if self.hooks: self._emit(event, "retry")
+            await asyncio.sleep(sleep)
+
+
+    def _encode_body(
+            self,
+            headers: Optional[dict[str, str]],
+            payload: Optional[dict]
+    ) -> tuple[Optional[dict[str, str]], Optional[bytes]]:
+        if payload is None:
+            return headers, None
+        return {**(headers or {}), "Content-Type": "application/json"}, self.codec.dumps(payload)
 
     def set_auth(self, t: str) -> None:
         if t is None: raise ValueError("Auth token is missing")
         self.token = t
         self.headers = {"Authorization": self.token}
 
+    async def _relogin(self, stale_token: Optional[str]) -> None:
+        """
+        Logs in again after a TokenError, once for all requests that failed with the same token:
+        a login already in flight is awaited, and a token refreshed since is used as it is.
+        """
+        if self.token != stale_token:
+            return
+        if asyncio.current_task() is self._login_task:
+            # profile_user of the login itself was refused
+            await self._login()
+            return
+        if self._login_task is None or self._login_task.done():
+            self._login_task = asyncio.ensure_future(self._login())
+        await asyncio.shield(self._login_task)
+
     async def _login(self) -> None:
         class LoginPayload(BaseModel):
             login: str
@@ -294,4 +516,9 @@ class ClientModel(BaseModel):
 
         self.user_id = r.get("id")
         self.login = r.get("login")
-        self.meta = r.get("meta")
\ No newline at end of file
+        self.meta = r.get("meta")
+
+
+# utils imports the model modules, which import this one: bound last so that either side
+# can be imported first
+from .. import utils
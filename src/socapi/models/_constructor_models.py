@@ -0,0 +1,83 @@
+from typing import List, Union, Dict, Any, Optional
+from pydantic import BaseModel, field_validator, Field, ConfigDict, model_validator
+from dataclasses import dataclass, field
+
+from . import _meta_parser_models as mpm
+
+
+class AnswerSpec(BaseModel):
+    key: str
+    title: str
+    has_input: bool = False
+
+    model_config = ConfigDict(extra="allow")
+
+
+class QuestionSpec(BaseModel):
+    key: str
+    title: str
+    type: str
+    # local key of a block in the same plan or id of an existing block
+    block: Union[int, str]
+    answers: List[AnswerSpec] = []
+
+    model_config = ConfigDict(extra="allow")
+
+    @field_validator("type")
+    @classmethod
+    def validate_type(cls, v: str) -> str:
+        if v not in mpm.QuestionTypes.__members__:
+            raise ValueError(f"Invalid question type: {v!r}")
+        return v
+
+    @property
+    def type_id(self) -> int:
+        return mpm.QuestionTypes[self.type].type_id
+
+
+class BlockSpec(BaseModel):
+    key: str
+    title: str
+    name: Optional[str] = None
+
+    model_config = ConfigDict(extra="allow")
+
+
+class CreateEndpoints(BaseModel):
+    """
+    Paths of the platform's create requests, relative to admin_url, and the key of the new id
+    in their result. They are not in cm.Endpoints: the platform does not document them, take
+    them from the requests its own editor sends.
+    """
+    block: str
+    question: str
+    answer: str
+    id_key: str = "id"
+
+
+class ConstructionPlan(BaseModel):
+    blocks: List[BlockSpec] = []
+    questions: List[QuestionSpec] = []
+
+    @model_validator(mode="after")
+    def check_keys(self) -> "ConstructionPlan":
+        keys = [b.key for b in self.blocks] + [q.key for q in self.questions] \
+            + [a.key for q in self.questions for a in q.answers]
+        if len(keys) != len(set(keys)):
+            raise ValueError("keys must be unique within a plan")
+
+        block_keys = {b.key for b in self.blocks}
+        for q in self.questions:
+            if isinstance(q.block, str) and q.block not in block_keys:
+                raise ValueError(f"Question {q.key!r} refers to unknown block {q.block!r}")
+        return self
+
+
+@dataclass
+class ConstructionResult:
+    ids: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
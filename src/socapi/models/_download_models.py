@@ -2,7 +2,7 @@ from typing import List, Literal, Union, get_args, Iterable, Dict, Optional, Any
 from pydantic import BaseModel, field_validator, Field, ConfigDict, model_validator, computed_field
 from datetime import datetime, timezone
 from enum import Enum
-import pytz
+from dataclasses import dataclass, field
 
 from . import _client_model as cm
 
@@ -98,6 +98,15 @@ class ExportPayload(BaseModel):
 
 
 
+def export_payload(poll_id: int, export_format: ExportFileFormat, filter_payload: Dict[str, Any]) -> Dict[str, Any]:
+    # same layout as ExportPayload.model_dump, for a filter dumped once per batch
+    return {
+        "poll_id": poll_id,
+        "format_id": export_format.value,
+        "filter": filter_payload,
+    }
+
+
 class DownloadPayload(BaseModel):
     poll_id: Union[int, Set[int], List[int]]
     export_dir: Optional[str]=None
@@ -172,3 +181,66 @@ class ExportStatuses(str, Enum):
     in_progress="in_progress"
     done="done"
     error="error"
+
+
+# stages of one poll in download_poll, in pipeline order
+DOWNLOAD_STAGES = ("export", "wait", "transfer", "done")
+
+
+@dataclass(slots=True)
+class TraceSpan:
+    """A timed stage of the download pipeline. start/end are perf_counter seconds."""
+    name: str
+    poll_id: Optional[int]
+    start: float
+    end: Optional[float] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+
+@dataclass
+class StageStats:
+    stage: str
+    count: int
+    total: float
+    mean: float
+    p50: float
+    p90: float
+    max: float
+    errors: int = 0
+    retries: int = 0
+    bytes: int = 0
+
+
+class PollState(str, Enum):
+    queued = "queued"
+    exporting = "exporting"
+    waiting = "waiting"
+    transferring = "transferring"
+    done = "done"
+    failed = "failed"
+
+
+@dataclass(slots=True)
+class ProgressEvent:
+    """
+    kind "state": poll_id moved to state. kind "bytes": bytes_received of poll_id out of
+    content_length (None when the server does not send it). kind "batch": batch totals,
+    rates are per second since the batch started, eta in seconds from the poll completion rate.
+    """
+    kind: Literal["state", "bytes", "batch"]
+    elapsed: float
+    poll_id: Optional[int] = None
+    state: Optional[PollState] = None
+    bytes_received: int = 0
+    content_length: Optional[int] = None
+    polls_total: int = 0
+    polls_finished: int = 0
+    polls_failed: int = 0
+    states: Optional[Dict[str, int]] = None
+    throughput: float = 0.0
+    eta: Optional[float] = None
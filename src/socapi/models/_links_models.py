@@ -0,0 +1,47 @@
+from typing import List, Optional, Dict, Any
+from dataclasses import dataclass, field
+
+
+def extract_links(result: Any) -> List[str]:
+    # the platform answers with a list of links, of link records, or a dict holding them
+    if isinstance(result, dict):
+        result = result.get("links") or result.get("result") or []
+    if not isinstance(result, list):
+        return []
+    links = (
+        item if isinstance(item, str) else item.get("link") or item.get("url")
+        for item in result
+        if isinstance(item, (str, dict))
+    )
+    # records without a link are not links
+    return [link for link in links if link]
+
+
+@dataclass
+class LinksChunk:
+    index: int
+    requested: int
+    links: List[str] = field(default_factory=list)
+    # also set for a chunk answered with fewer or more links than requested
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def missing(self) -> int:
+        return max(self.requested - len(self.links), 0)
+
+
+@dataclass
+class LinksBatch:
+    poll_id: int
+    requested: int
+    links: List[str] = field(default_factory=list)
+    created: int = 0
+    failed_chunks: Dict[int, LinksChunk] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> int:
+        return sum(c.missing for c in self.failed_chunks.values())
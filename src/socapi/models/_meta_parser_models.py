@@ -1,8 +1,9 @@
 
-from typing import List, Literal, Union, get_args, Iterable, Dict
+from typing import List, Literal, Union, get_args, Iterable, Dict, Any
 from pydantic import BaseModel, field_validator, Field, ConfigDict, computed_field
 from enum import Enum
 from dataclasses import dataclass
+from functools import lru_cache
 
 from . import _client_model as cm
 
@@ -96,6 +97,33 @@ class QuestionsPayload(BaseModel):
 
 
 
+@lru_cache(maxsize=4096)
+def _block_payload(poll_id: int, includes: Union[str, tuple]) -> Dict[str, Any]:
+    includes = includes if isinstance(includes, str) else list(includes)
+    return BlockPayload(poll_id=poll_id, includes=includes).model_dump()
+
+
+@lru_cache(maxsize=4096)
+def _questions_payload(parent_id: int, how: str, includes: Union[str, tuple]) -> Dict[str, Any]:
+    includes = includes if isinstance(includes, str) else list(includes)
+    p = QuestionsPayload(parent_id=parent_id, how=how, includes=includes)
+    return p.model_dump(exclude={"how"}, exclude_none=True)
+
+
+def block_payload(poll_id: int, includes: Union[Literal["all"], List[str]] = "all") -> Dict[str, Any]:
+    # validated once per distinct request, the returned dict is shared and must not be mutated
+    return _block_payload(poll_id, includes if isinstance(includes, str) else tuple(includes))
+
+
+def questions_payload(
+        parent_id: int,
+        how: Union[str, QuestionExportHow],
+        includes: Union[Literal["all"], List[str]] = "all"
+) -> Dict[str, Any]:
+    how = how.value if isinstance(how, QuestionExportHow) else how
+    return _questions_payload(parent_id, how, includes if isinstance(includes, str) else tuple(includes))
+
+
 class QuestionTypes(Enum):
     singlepunch = (1, "singlepunch")
     droplist = (2, "droplist")
@@ -125,3 +153,30 @@ class AnswerTypes(Enum):
 
 
 
+class CachedSchema(BaseModel):
+    poll_id: int
+    blocks: List[Dict[str, Any]]
+    questions: Dict[int, List[Dict[str, Any]]]
+    block_fingerprints: Dict[int, str]
+    question_fingerprints: Dict[int, str]
+    validated_at: float
+
+    @property
+    def ordered_questions(self) -> List[List[Dict[str, Any]]]:
+        return [self.questions.get(b["id"], []) for b in self.blocks]
+
+
+class SchemaDiff(BaseModel):
+    added_blocks: List[int] = []
+    removed_blocks: List[int] = []
+    moved_blocks: List[int] = []
+    added_questions: List[int] = []
+    removed_questions: List[int] = []
+    changed_questions: List[int] = []
+
+    @property
+    def changed(self) -> bool:
+        return any(getattr(self, field) for field in type(self).model_fields)
+
+    def __bool__(self) -> bool:
+        return self.changed
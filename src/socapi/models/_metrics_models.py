@@ -0,0 +1,51 @@
+from typing import Optional, Literal, Callable, Any, Dict, Tuple
+from dataclasses import dataclass
+
+EventKind = Literal["start", "end", "retry", "error"]
+
+
+@dataclass(slots=True)
+class RequestEvent:
+    """
+    One attempt of a platform request. `start` is emitted once the concurrency slot is taken,
+    then exactly one of `end`, `retry` (a PlatformError that will be retried) or `error`.
+    Times are in seconds, `wait` is the time spent waiting for the client semaphore.
+    """
+    kind: EventKind
+    request_name: str
+    endpoint: str
+    host: str
+    attempt: int = 0
+    status: Optional[int] = None
+    wait: float = 0.0
+    elapsed: float = 0.0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    error: Optional[BaseException] = None
+
+
+RequestHook = Callable[[RequestEvent], Any]
+
+# upper bounds of the latency histogram buckets, seconds
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, float("inf"),
+)
+
+
+@dataclass(slots=True)
+class BlockedInterval:
+    """
+    The event loop was late by `lag` seconds at `at` (perf_counter). `sections` are the timed
+    synchronous sections of the client that ran in that window, with their durations;
+    `operations` the client operations in flight when no section accounts for the stall.
+    """
+    at: float
+    lag: float
+    sections: Dict[str, float]
+    operations: Tuple[str, ...]
+
+    @property
+    def source(self) -> str:
+        if self.sections:
+            return max(self.sections, key=self.sections.get)
+        return ",".join(self.operations) or "external"
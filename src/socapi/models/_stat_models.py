@@ -1,4 +1,187 @@
+from typing import Dict, Any, Hashable, AsyncIterator, Tuple, Optional, List
+from dataclasses import dataclass, field
+from array import array
+
 from . import _download_models as dm
 
 class StatFilter(dm.ExportFilter):
-    pass
\ No newline at end of file
+    pass
+
+
+@dataclass
+class BatchResult:
+    results: Dict[Hashable, Any] = field(default_factory=dict)
+    errors: Dict[Hashable, Exception] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @classmethod
+    async def collect(cls, items: AsyncIterator[Tuple[Hashable, Any]]) -> "BatchResult":
+        batch = cls()
+        async for key, result in items:
+            if isinstance(result, Exception):
+                batch.errors[key] = result
+            else:
+                batch.results[key] = result
+        return batch
+
+
+@dataclass
+class QuotaDelta:
+    poll_id: int
+    quota_id: int
+    name: str
+    hits: int
+    quota: int
+    hits_delta: int
+    quota_delta: int
+    is_new: bool = False
+    is_removed: bool = False
+    # quota was open on the previous snapshot and is full now
+    closed: bool = False
+
+    @property
+    def left(self) -> int:
+        return self.quota - self.hits
+
+    @property
+    def left_delta(self) -> int:
+        return self.quota_delta - self.hits_delta
+
+
+@dataclass
+class ActivityDelta:
+    poll_id: int
+    counters: Dict[str, int]
+    deltas: Dict[str, int]
+    first_seen: bool = False
+
+
+@dataclass
+class ActivityScan:
+    active: Dict[int, ActivityDelta] = field(default_factory=dict)
+    errors: Dict[int, Exception] = field(default_factory=dict)
+    checked: int = 0
+
+
+@dataclass
+class StatisticsSeries:
+    poll_id: int
+    # bucket starts as UTC epoch seconds
+    bucket_starts: array
+    counts: array
+    errors: Dict[float, Exception] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+    def to_pandas(self):
+        import pandas as pd
+
+        index = pd.to_datetime(list(self.bucket_starts), unit="s", utc=True)
+        return pd.Series(list(self.counts), index=index, name=self.poll_id)
+
+
+# marks a cell whose request failed, see AnswerDistribution.errors
+MISSING_COUNT = -1
+
+
+@dataclass
+class AnswerDistribution:
+    """
+    Counts per (question, answer, source) cell.
+
+    Answers of all questions are laid out back to back in `answer_ids`, question i owning
+    answer_ids[offsets[i]:offsets[i + 1]]. `counts` holds one row per answer and one column
+    per source (a single column when no sources were requested), flattened row by row.
+    """
+    question_ids: array
+    offsets: array
+    answer_ids: array
+    source_ids: Optional[array]
+    counts: array
+    errors: Dict[Tuple[int, int, Optional[int]], Exception] = field(default_factory=dict)
+
+    @property
+    def width(self) -> int:
+        return len(self.source_ids) if self.source_ids is not None else 1
+
+
+    def counts_for(self, question_id: int, source_id: Optional[int] = None) -> Dict[int, int]:
+        i = list(self.question_ids).index(question_id)
+        col = 0 if source_id is None else list(self.source_ids).index(source_id)
+        return {
+            self.answer_ids[row]: self.counts[row * self.width + col]
+            for row in range(self.offsets[i], self.offsets[i + 1])
+        }
+
+
+    def to_frame(self):
+        import pandas as pd
+
+        rows = []
+        for i, question_id in enumerate(self.question_ids):
+            for row in range(self.offsets[i], self.offsets[i + 1]):
+                rows.append((question_id, self.answer_ids[row]))
+
+        index = pd.MultiIndex.from_tuples(rows, names=["question_id", "answer_id"])
+        columns = list(self.source_ids) if self.source_ids is not None else ["count"]
+        values = [list(self.counts[r * self.width:(r + 1) * self.width]) for r in range(len(rows))]
+        return pd.DataFrame(values, index=index, columns=columns)
+
+
+@dataclass
+class QuotaTable:
+    """Quotas of many polls as parallel columns, one row per quota."""
+    poll_id: array = field(default_factory=lambda: array("q"))
+    quota_id: array = field(default_factory=lambda: array("q"))
+    name: List[str] = field(default_factory=list)
+    hits: array = field(default_factory=lambda: array("q"))
+    quota: array = field(default_factory=lambda: array("q"))
+    left: array = field(default_factory=lambda: array("q"))
+    source_ids: List[Tuple[int, ...]] = field(default_factory=list)
+    source_labels: List[Tuple[Optional[str], ...]] = field(default_factory=list)
+    errors: Dict[int, Exception] = field(default_factory=dict)
+
+    COLUMNS = ("poll_id", "quota_id", "name", "hits", "quota", "left", "source_ids", "source_labels")
+
+    def __len__(self) -> int:
+        return len(self.quota_id)
+
+
+    def extend(self, poll_id: int, quotas: List[Dict[str, Any]], sources_labels: Dict[int, str]) -> None:
+        for q in quotas:
+            self.poll_id.append(poll_id)
+            self.quota_id.append(q["id"])
+            self.name.append(q["name"])
+            self.hits.append(q["hits"])
+            self.quota.append(q["quota"])
+            self.left.append(q["quota"] - q["hits"])
+            self.source_ids.append(tuple(q["source_ids"]))
+            self.source_labels.append(tuple(sources_labels.get(s) for s in q["source_ids"]))
+
+
+    def columns(self) -> Dict[str, Any]:
+        return {c: getattr(self, c) for c in self.COLUMNS}
+
+
+    def to_pandas(self):
+        import pandas as pd
+        import numpy as np
+
+        return pd.DataFrame({
+            c: np.frombuffer(v, dtype=np.int64) if isinstance(v, array) else v
+            for c, v in self.columns().items()
+        })
+
+
+    def to_arrow(self):
+        import pyarrow as pa
+
+        return pa.table({
+            c: pa.array(v, type=pa.int64()) if isinstance(v, array) else pa.array(v)
+            for c, v in self.columns().items()
+        })
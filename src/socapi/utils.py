@@ -1,18 +1,24 @@
 from datetime import datetime, timezone, timedelta
-import aiohttp
-from typing import List, Literal, Union, get_args, Iterable, Dict, Optional, Set
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import List, Literal, Union, get_args, Iterable, Dict, Optional, Set, Awaitable, Any, Hashable, Deque
+from typing import AsyncIterator, Tuple, Callable
 import inspect
 from pathlib import Path
 
-from typing import ClassVar
+from typing import ClassVar, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiohttp
 
 from pydantic import validate_call, BaseModel, ConfigDict, field_validator
 from .models import _client_model as cm
 from .models import _meta_parser_models as mpm
-from .models._download_models import ExportFileFormat
 
 
-async def _parse_json_result(result: aiohttp.ClientResponse, context: cm.RequestNames) -> dict:
+async def _parse_json_result(result: "aiohttp.ClientResponse", context: "cm.RequestNames") -> dict:
     try:
         result_json = await result.json()
     except Exception as e:
@@ -105,6 +111,161 @@ async def find_last_item(
 
 
 
+async def gather_limited(
+        aws: Iterable[Awaitable[Any]],
+        limit: int,
+        return_exceptions: bool = False
+) -> List[Any]:
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+async def iter_completed(
+        keyed_aws: Iterable[Tuple[Hashable, Awaitable[Any]]],
+        limit: int,
+) -> AsyncIterator[Tuple[Hashable, Any]]:
+    """
+    Run keyed awaitables with at most `limit` at once, yielding (key, result) in completion order.
+    An exception is yielded in place of the result of the awaitable that raised it.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(key: Hashable, aw: Awaitable[Any]) -> Tuple[Hashable, Any]:
+        async with semaphore:
+            try:
+                return key, await aw
+            except Exception as e:
+                return key, e
+
+    tasks = [asyncio.create_task(run(key, aw)) for key, aw in keyed_aws]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class AsyncMemo:
+    """
+    Shares one in-flight call per key and keeps its result for `ttl` seconds (forever if None).
+    Failed calls are not kept. Expired entries are evicted when new ones are added, and the
+    oldest entries once there are more than `max_size`.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        # in creation order, so the expired and the oldest entries are at the front
+        self._entries: Dict[Hashable, Tuple[float, asyncio.Future]] = {}
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry is None or self._expired(entry, now):
+            self._entries.pop(key, None)
+            self._evict(now)
+            future = asyncio.ensure_future(factory())
+            future.add_done_callback(lambda f: self._drop_failed(key, f))
+            entry = self._entries[key] = (now, future)
+
+        # shield so one cancelled waiter does not cancel the call for the others
+        return await asyncio.shield(entry[1])
+
+
+    def _expired(self, entry: Tuple[float, asyncio.Future], now: float) -> bool:
+        return self.ttl is not None and now - entry[0] >= self.ttl
+
+
+    def _evict(self, now: float) -> None:
+        # makes room for one new entry, waiters of an evicted call still get its result
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._expired(entry, now) and (self.max_size is None or len(self._entries) < self.max_size):
+                break
+            del self._entries[key]
+
+
+    def _drop_failed(self, key: Hashable, future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            if key in self._entries and self._entries[key][1] is future:
+                del self._entries[key]
+
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+class FairLimiter:
+    """
+    Concurrency limiter shared by many keys (e.g. poll ids).
+
+    Freed slots are handed out round-robin across keys with waiters, so one key
+    with many queued requests can not starve the others.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._waiters: Dict[Hashable, Deque[asyncio.Future]] = {}
+
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: Hashable):
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(key, deque()).append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # the slot may have been handed over right before cancellation
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+
+    def _release(self) -> None:
+        while self._waiters:
+            key = next(iter(self._waiters))
+            queue = self._waiters.pop(key)
+            waiter = queue.popleft()
+            if queue:
+                # re-insert at the end to rotate keys
+                self._waiters[key] = queue
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+
+async def run_in_slot(aw: Awaitable[Any], limiter: Optional[FairLimiter], key: Hashable) -> Any:
+    if limiter is None:
+        return await aw
+    async with limiter.slot(key):
+        return await aw
+
+
 def create_sub_dirs(path: Path) -> None:
     if path.suffix:  # it's a file path, so make parent dirs
         path.parent.mkdir(parents=True, exist_ok=True)
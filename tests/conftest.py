@@ -0,0 +1,21 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from socapi import SocAPIClient
+from mock_socpanel import MockSocpanel, MockConfig
+
+
+@asynccontextmanager
+async def _socpanel(config=None, **client_kwargs):
+    async with MockSocpanel(config or MockConfig()) as server:
+        client = await SocAPIClient.from_credentials(
+            "online-sociology", "u", "p", url_override=server.url, **client_kwargs
+        )
+        yield server, client
+
+
+@pytest.fixture
+def socpanel():
+    """`async with socpanel(config, **client_kwargs) as (server, client)`: a client logged in to a running stand-in."""
+    return _socpanel
@@ -0,0 +1,37 @@
+from socapi._activity import ActivityState, counters_delta, extract_counters
+
+STATISTICS = {"ended_count": 5, "started_count": 8, "disqualified_count": None, "conversion": 0.4, "poll_id": 1}
+
+
+def test_extract_every_integer_count():
+    assert extract_counters(STATISTICS) == {"ended_count": 5, "started_count": 8}
+
+
+def test_extract_named_counters():
+    assert extract_counters(STATISTICS, ["ended_count", "disqualified_count", "missing_count"]) == {
+        "ended_count": 5, "disqualified_count": 0, "missing_count": 0,
+    }
+
+
+def test_first_counters_are_a_delta():
+    delta = counters_delta(1, None, {"ended_count": 5, "started_count": 0})
+    assert delta.first_seen
+    # zero counters did not move
+    assert delta.deltas == {"ended_count": 5}
+    assert delta.counters == {"ended_count": 5, "started_count": 0}
+
+
+def test_only_moved_counters_are_reported():
+    delta = counters_delta(1, {"ended_count": 5, "started_count": 8}, {"ended_count": 7, "started_count": 8})
+    assert not delta.first_seen
+    assert delta.deltas == {"ended_count": 2}
+
+
+def test_unchanged_counters_are_no_delta():
+    assert counters_delta(1, {"ended_count": 5}, {"ended_count": 5}) is None
+
+
+def test_state_round_trip(tmp_path):
+    state = ActivityState(tmp_path / "state.json")
+    state.commit([counters_delta(1, None, {"ended_count": 5})])
+    assert ActivityState(tmp_path / "state.json").counters(1) == {"ended_count": 5}
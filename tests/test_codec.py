@@ -0,0 +1,82 @@
+import json
+import random
+
+import pytest
+
+from socapi._codec import JsonArrayItems
+
+
+def parse(document: bytes, sizes, key: str = "result"):
+    parser = JsonArrayItems(json.loads, key)
+    items, pos = [], 0
+    for size in sizes:
+        items.extend(parser.feed(document[pos:pos + size]))
+        pos += size
+    items.extend(parser.feed(document[pos:]))
+    parser.close()
+    return items
+
+
+def every_split(document: bytes):
+    # two chunks split at every byte, then single bytes
+    for i in range(len(document) + 1):
+        yield [i]
+    yield [1] * len(document)
+
+
+ITEMS = [
+    {"id": 1, "title": "quote \" and backslash \\ inside", "tags": ["a", "b"]},
+    {"id": 2, "title": "unicode é中 and escape \\u0041", "nested": [[1, [2, 3]], {"x": [{}]}]},
+    "plain string with ] and } and ,",
+    "ends with backslash \\",
+    -12.5e3,
+    0,
+    True,
+    False,
+    None,
+    [],
+    {},
+]
+
+
+@pytest.mark.parametrize("item", ITEMS, ids=range(len(ITEMS)))
+def test_items_survive_every_split(item):
+    document = json.dumps({"error": "", "result": [item, item]}).encode()
+    for sizes in every_split(document):
+        assert parse(document, sizes) == [item, item]
+
+
+def test_randomized_chunking_matches_json_loads():
+    rnd = random.Random(7)
+    document = json.dumps({"error": "", "count": 3, "result": ITEMS * 5, "tail": {"result": [1]}}).encode()
+    for _ in range(200):
+        sizes = [rnd.randint(1, 16) for _ in range(len(document) // 4)]
+        assert parse(document, sizes) == ITEMS * 5
+
+
+def test_only_the_top_level_key_is_read():
+    document = b'{"meta": {"result": [1, 2]}, "results": [3], "result": [4, 5]}'
+    assert parse(document, [7, 7, 7]) == [4, 5]
+
+
+def test_unspaced_scalars_and_empty_list():
+    assert parse(b'{"result":[1,-2,3.5,true,null,"x"]}', [3] * 20) == [1, -2, 3.5, True, None, "x"]
+    assert parse(b'{"result": []}', [5]) == []
+
+
+def test_missing_key_raises_on_close():
+    with pytest.raises(ValueError, match="no list"):
+        parse(b'{"error": "", "items": [1, 2]}', [4, 4])
+
+
+def test_truncated_list_raises_on_close():
+    with pytest.raises(ValueError, match="ended"):
+        parse(b'{"result": [1, 2', [4])
+
+
+def test_consumed_bytes_are_dropped():
+    parser = JsonArrayItems(json.loads)
+    parser.feed(b'{"result": [')
+    for i in range(1000):
+        assert parser.feed(json.dumps({"i": i, "pad": "x" * 100}).encode() + b",") == [{"i": i, "pad": "x" * 100}]
+    assert len(parser._buf) < 200
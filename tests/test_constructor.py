@@ -0,0 +1,79 @@
+import asyncio
+
+from socapi import expeptions
+from mock_socpanel import MockConfig, CREATE_ENDPOINTS
+
+PLAN = {
+    "blocks": [{"key": "b1", "title": "new block"}, {"key": "b2", "title": "second new block"}],
+    "questions": [
+        {
+            "key": "q1", "title": "in new block", "type": "singlepunch", "block": "b1",
+            "answers": [{"key": "q1a1", "title": "yes"}, {"key": "q1a2", "title": "no", "has_input": True}],
+        },
+        {"key": "q2", "title": "also in new block", "type": "multipunch", "block": "b1"},
+        {"key": "q3", "title": "in existing block", "type": "singlepunch", "block": 100},
+        {
+            "key": "q4", "title": "in missing block", "type": "singlepunch", "block": 999,
+            "answers": [{"key": "q4a1", "title": "never created"}],
+        },
+    ],
+}
+
+
+def build(socpanel, plan, endpoints=CREATE_ENDPOINTS):
+    async def run():
+        async with socpanel(MockConfig(questions_per_block=3)) as (server, client):
+            return server, await client.build_questionnaire(1, plan, endpoints)
+    return asyncio.run(run())
+
+
+def test_keys_map_to_created_ids(socpanel):
+    server, result = build(socpanel, PLAN)
+
+    assert set(result.ids) == {"b1", "b2", "q1", "q2", "q3", "q1a1", "q1a2"}
+    blocks = {b["title"]: b for b in server.created_blocks[1]}
+    assert blocks["new block"]["id"] == result.ids["b1"]
+    questions = {q["title"]: q for qs in server.created_questions.values() for q in qs}
+    assert questions["in new block"]["id"] == result.ids["q1"]
+    answers = {a["title"]: a["id"] for a in questions["in new block"]["answers"]}
+    assert answers == {"yes": result.ids["q1a1"], "no": result.ids["q1a2"]}
+
+
+def test_children_are_created_under_their_parents(socpanel):
+    server, result = build(socpanel, PLAN)
+
+    questions = {q["title"]: q for qs in server.created_questions.values() for q in qs}
+    assert questions["in new block"]["block_id"] == result.ids["b1"]
+    assert questions["also in new block"]["block_id"] == result.ids["b1"]
+    assert questions["in existing block"]["block_id"] == 100
+    assert {a["question_id"] for a in questions["in new block"]["answers"]} == {result.ids["q1"]}
+
+
+def test_orders_follow_existing_structure(socpanel):
+    server, result = build(socpanel, PLAN)
+
+    # the mock poll has blocks 0..4 and questions 0..2 per block
+    assert [b["order"] for b in server.created_blocks[1]] == [5, 6]
+    questions = {q["title"]: q for qs in server.created_questions.values() for q in qs}
+    assert questions["in new block"]["order"] == 1
+    assert questions["also in new block"]["order"] == 2
+    assert questions["in existing block"]["order"] == 3
+    answers = {a["title"]: a for a in questions["in new block"]["answers"]}
+    assert answers["yes"]["order"] == 1 and answers["no"]["order"] == 2
+
+
+def test_failed_parent_skips_children(socpanel):
+    _, result = build(socpanel, PLAN)
+
+    assert isinstance(result.errors["q4"], ValueError)
+    assert isinstance(result.errors["q4a1"], expeptions.DependencyFailedError)
+    assert result.errors["q4a1"].parent_key == "q4"
+    assert not result.ok
+
+
+def test_missing_id_key_fails_the_item(socpanel):
+    endpoints = CREATE_ENDPOINTS.model_copy(update={"id_key": "block_id"})
+    _, result = build(socpanel, {"blocks": PLAN["blocks"][:1]}, endpoints=endpoints)
+
+    assert isinstance(result.errors["b1"], ValueError)
+    assert not result.ids
@@ -0,0 +1,99 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from socapi._crosstab import LocalCrosstab
+from socapi._schema import PollSchema, iter_poll_columns, TECHNICAL_COLUMNS
+
+QUESTIONS = [[
+    {"id": 1, "type_id": 1, "answers": [
+        {"id": 100, "question_id": 1, "has_input": False},
+        {"id": 101, "question_id": 1, "has_input": True},
+    ]},
+    {"id": 2, "type_id": 4, "answers": [
+        {"id": 200, "question_id": 2, "has_input": False},
+        {"id": 201, "question_id": 2, "has_input": False},
+    ]},
+]]
+# the tuple list map_question_ids returns
+TUPLES = list(iter_poll_columns(QUESTIONS))
+
+# question 1, its "other" text, multipunch answers 200 and 201
+ANSWERS = np.array([
+    [100, np.nan, 1, np.nan],
+    [100, np.nan, 1, 1],
+    [101, 7, np.nan, 1],
+    [100, np.nan, 0, np.nan],
+    [np.nan, np.nan, np.nan, np.nan],
+])
+DATA = np.hstack([np.full((len(ANSWERS), len(TECHNICAL_COLUMNS)), np.nan), ANSWERS])
+
+
+@pytest.fixture(params=["tuples", "questions"])
+def crosstab(request):
+    schema = TUPLES if request.param == "tuples" else PollSchema.from_questions(QUESTIONS)
+    return LocalCrosstab(DATA, schema)
+
+
+def test_single_column_distribution(crosstab):
+    distribution = crosstab.distribution(1)
+    assert distribution.to_dict() == {100: 3, 101: 1}
+    assert distribution.base == 4
+
+
+def test_multicolumn_distribution(crosstab):
+    distribution = crosstab.distribution(2)
+    assert distribution.to_dict() == {200: 2, 201: 2}
+    # zeros and blanks are not answers
+    assert distribution.base == 3
+
+
+def test_tuple_schema_answers_come_from_data_columns():
+    schema = PollSchema(TUPLES)
+    assert schema.answers_of(1) == ()
+    assert schema.answers_of(2) == (200, 201)
+
+
+def test_weighted_distribution():
+    crosstab = LocalCrosstab(DATA, TUPLES, weights=[1, 2, 3, 4, 5])
+    distribution = crosstab.distribution(2)
+    assert distribution.weighted.tolist() == [3.0, 5.0]
+    assert distribution.weighted_base == 6.0
+    assert distribution.shares.tolist() == pytest.approx([0.5, 5 / 6])
+
+
+def test_answer_codes():
+    data = DATA.copy()
+    data[:, len(TECHNICAL_COLUMNS)] = [1, 1, 2, 1, np.nan]
+    schema = PollSchema.from_questions(QUESTIONS)
+    crosstab = LocalCrosstab(data, schema, answer_codes={100: 1, 101: 2})
+    assert crosstab.distribution(1).to_dict() == {100: 3, 101: 1}
+
+
+def test_mask_ands_filters_and_ors_answers(crosstab):
+    assert crosstab.mask([{"question_id": 1, "answer_ids": [100]}]).tolist() == [True, True, False, True, False]
+    assert crosstab.mask([{"question_id": 2, "answer_ids": [200, 201]}]).tolist() == [True, True, True, False, False]
+    both = crosstab.mask([
+        {"question_id": 1, "answer_ids": [100]},
+        {"question_id": 2, "answer_ids": [201]},
+    ])
+    assert both.tolist() == [False, True, False, False, False]
+
+
+def test_distribution_where(crosstab):
+    where = crosstab.mask([{"question_id": 2, "answer_ids": [201]}])
+    assert crosstab.distribution(1, where).to_dict() == {100: 1, 101: 1}
+
+
+def test_cell_counts(crosstab):
+    cells = {
+        ("100", "200"): [{"question_id": 1, "answer_ids": [100]}, {"question_id": 2, "answer_ids": [200]}],
+        ("101", "201"): [{"question_id": 1, "answer_ids": [101]}, {"question_id": 2, "answer_ids": [201]}],
+        "nobody": [{"question_id": 1, "answer_ids": [101]}, {"question_id": 2, "answer_ids": [200]}],
+    }
+    assert crosstab.cell_counts(cells) == {("100", "200"): (2, 2.0), ("101", "201"): (1, 1.0), "nobody": (0, 0.0)}
+
+
+def test_width_mismatch():
+    with pytest.raises(ValueError):
+        LocalCrosstab(DATA[:, :-1], TUPLES)
@@ -0,0 +1,98 @@
+import asyncio
+
+from socapi.utils import FairLimiter, run_in_slot
+
+
+def test_keys_are_served_round_robin():
+    async def run():
+        limiter = FairLimiter(1)
+        order = []
+
+        async def job(key, i):
+            async with limiter.slot(key):
+                order.append(key)
+                await asyncio.sleep(0)
+
+        tasks = [asyncio.create_task(job("a", i)) for i in range(10)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(job("b", i)) for i in range(3)]
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(run())
+    # "b" queued behind ten "a" requests is served every other slot, not last
+    served_b = [i for i, key in enumerate(order) if key == "b"]
+    assert len(served_b) == 3
+    assert served_b[-1] < 8
+    assert [j - i for i, j in zip(served_b, served_b[1:])] == [2, 2]
+
+
+def test_limit_is_never_exceeded():
+    async def run():
+        limiter = FairLimiter(3)
+        active = peak = 0
+
+        async def job(key):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+
+        await asyncio.gather(*(run_in_slot(job(i % 4), limiter, i % 4) for i in range(40)))
+        return peak, limiter
+
+    peak, limiter = asyncio.run(run())
+    assert peak == 3
+    assert limiter._active == 0 and not limiter._waiters
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        limiter = FairLimiter(1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot("a"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(limiter.slot("b").__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await asyncio.gather(holder, waiter, return_exceptions=True)
+
+        await asyncio.wait_for(run_in_slot(asyncio.sleep(0), limiter, "c"), 1)
+        return limiter, waiter
+
+    limiter, waiter = asyncio.run(run())
+    assert waiter.cancelled()
+    assert limiter._active == 0 and not limiter._waiters
+
+
+def test_slot_handed_over_to_a_cancelled_waiter_is_released():
+    async def run():
+        limiter = FairLimiter(1)
+        entered = []
+
+        async def job(key):
+            async with limiter.slot(key):
+                entered.append(key)
+
+        cm = limiter.slot("a")
+        await cm.__aenter__()
+        waiter = asyncio.create_task(job("b"))
+        await asyncio.sleep(0)
+        # the release hands the slot to "b", which is cancelled before it runs
+        await cm.__aexit__(None, None, None)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        await asyncio.wait_for(job("c"), 1)
+        return limiter, entered
+
+    limiter, entered = asyncio.run(run())
+    assert entered == ["c"]
+    assert limiter._active == 0 and not limiter._waiters
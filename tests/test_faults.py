@@ -0,0 +1,78 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+from socapi import expeptions
+from socapi.models import _client_model as cm
+from mock_socpanel import MockConfig, Faults
+
+PROGRESS = cm.Endpoints.EXPORT_PROGRESS.value
+EXPORT = cm.Endpoints.EXPORT_START.value
+DOWNLOAD = cm.Endpoints.DOWNLOAD_POLL.value
+FILE_SIZE = 8 * 1024
+
+
+def download(socpanel, faults, polls=10, timeout=30.0):
+    """Runs download_poll against the stand-in, returns (complete poll ids, failed poll ids)."""
+    async def run():
+        config = MockConfig(export_latency=0.1, file_size=FILE_SIZE, file_chunk=1024, faults=faults, seed=1)
+        async with socpanel(config) as (_, client):
+            with tempfile.TemporaryDirectory() as export_dir:
+                failed = set()
+                try:
+                    await asyncio.wait_for(client.download_poll(list(range(1, polls + 1)), export_dir=export_dir), timeout)
+                except expeptions.FailedDownloadPolls as e:
+                    failed = set(e.failed_ids)
+                complete = {
+                    p for p in range(1, polls + 1)
+                    if (f := Path(export_dir, f"poll_{p}.sav")).exists() and f.stat().st_size == FILE_SIZE
+                }
+                return complete, failed
+    return asyncio.run(run())
+
+
+def test_cut_and_stalled_transfers_are_retried(socpanel):
+    complete, failed = download(socpanel, {DOWNLOAD: Faults(truncate_rate=0.3, stall_rate=0.2, stall=0.2)})
+    assert complete == set(range(1, 11))
+    assert not failed
+
+
+def test_failed_exports_are_reported(socpanel):
+    complete, failed = download(socpanel, {EXPORT: Faults(error_rate=1.0)}, polls=3)
+    assert not complete
+    assert failed == {1, 2, 3}
+
+
+def test_failed_progress_checks_do_not_stall_the_batch(socpanel):
+    # bursts longer than the request retries, so whole progress checks fail
+    complete, failed = download(socpanel, {PROGRESS: Faults(error_rate=0.3, error_burst=4)})
+    assert complete | failed == set(range(1, 11))
+    assert complete
+
+
+def test_relogins_are_coalesced(socpanel):
+    async def run():
+        async with socpanel() as (server, client):
+            server.token = "revoked-in-flight"
+            await asyncio.gather(*(client.get_statistics(p) for p in range(1, 21)))
+            return server.hits[f"/{cm.Endpoints.LOGIN.value}"]
+
+    assert asyncio.run(run()) == 2
+
+
+def test_relogins_of_question_streams_are_coalesced(socpanel):
+    async def run():
+        async with socpanel() as (server, client):
+            server.token = "revoked-in-flight"
+
+            async def stream(poll_id):
+                return [q async for q in client.iter_questions(poll_id, "poll")]
+
+            # within the client's request slots, their semaphore is shared by all clients and binds to one loop
+            polls = range(1, cm.MAX_CONCURRENT_DOWNLOAD_REQUESTS + 1)
+            streamed = await asyncio.gather(*(stream(p) for p in polls))
+            return streamed, server.hits[f"/{cm.Endpoints.LOGIN.value}"]
+
+    streamed, logins = asyncio.run(run())
+    assert all(streamed)
+    assert logins == 2
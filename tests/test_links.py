@@ -0,0 +1,49 @@
+import asyncio
+
+from socapi import expeptions
+from socapi._links import split_link_count
+from socapi.models import _client_model as cm
+from socapi.models._links_models import extract_links
+from mock_socpanel import MockConfig, Faults
+
+
+def test_split_link_count():
+    assert split_link_count(2500, 1000) == [1000, 1000, 500]
+    assert split_link_count(2000, 1000) == [1000, 1000]
+    assert split_link_count(0, 1000) == []
+
+
+def test_extract_links_shapes():
+    assert extract_links(["a", "b"]) == ["a", "b"]
+    assert extract_links([{"link": "a"}, {"url": "b"}, {"id": 3}, None, ""]) == ["a", "b"]
+    assert extract_links({"links": ["a"]}) == ["a"]
+    assert extract_links(None) == []
+
+
+def create(socpanel, config, link_count=2500, **kwargs):
+    async def run():
+        async with socpanel(config) as (_, client):
+            delivered = []
+            batch = await client.create_links(1, link_count, consumer=delivered.extend, chunk_size=1000, **kwargs)
+            return batch, delivered
+    return asyncio.run(run())
+
+
+def test_short_chunks_are_reported_and_delivered(socpanel):
+    batch, delivered = create(socpanel, MockConfig(links_short=10))
+
+    assert batch.created == len(delivered) == len(batch.links) == 2470
+    assert sorted(batch.failed_chunks) == [0, 1, 2]
+    chunk = batch.failed_chunks[2]
+    assert isinstance(chunk.error, expeptions.ShortLinksChunkError)
+    assert (chunk.requested, chunk.missing) == (500, 10)
+    assert batch.failed == 30
+
+
+def test_failed_chunks_are_reported(socpanel):
+    faults = {cm.Endpoints.PERSONAL_LINKS.value: Faults(error_rate=1.0)}
+    batch, delivered = create(socpanel, MockConfig(faults=faults), attempts=1)
+
+    assert batch.created == 0 and not delivered
+    assert batch.failed == 2500
+    assert all(isinstance(c.error, expeptions.PlatformError) for c in batch.failed_chunks.values())
@@ -0,0 +1,66 @@
+import asyncio
+
+from socapi.utils import AsyncMemo
+
+
+def calls_of(memo, keys, sleep=0.0):
+    async def run():
+        calls = []
+
+        async def factory(key):
+            calls.append(key)
+            return key
+
+        for key in keys:
+            await memo.get(key, lambda: factory(key))
+            await asyncio.sleep(sleep)
+        return calls
+    return asyncio.run(run())
+
+
+def test_concurrent_gets_share_one_call():
+    async def run():
+        memo, calls = AsyncMemo(), []
+
+        async def factory():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(memo.get("k", factory) for _ in range(5)))
+        return results, calls
+
+    results, calls = asyncio.run(run())
+    assert results == ["value"] * 5
+    assert calls == [1]
+
+
+def test_failed_calls_are_not_kept():
+    async def run():
+        memo, calls = AsyncMemo(), []
+
+        async def factory():
+            calls.append(1)
+            raise ValueError
+
+        for _ in range(2):
+            try:
+                await memo.get("k", factory)
+            except ValueError:
+                pass
+        return calls, len(memo)
+
+    assert asyncio.run(run()) == ([1, 1], 0)
+
+
+def test_expired_entries_are_evicted():
+    memo = AsyncMemo(ttl=0.01)
+    assert calls_of(memo, ["a", "b", "a", "c"], sleep=0.02) == ["a", "b", "a", "c"]
+    # each new entry evicts the ones that expired before it
+    assert len(memo) == 1
+
+
+def test_size_is_bounded():
+    memo = AsyncMemo(max_size=2)
+    assert calls_of(memo, ["a", "b", "c", "b", "a"]) == ["a", "b", "c", "a"]
+    assert len(memo) == 2
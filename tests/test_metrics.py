@@ -0,0 +1,65 @@
+import asyncio
+
+from socapi import MetricsCollector, RequestEvent
+from socapi._metrics import LatencyHistogram
+from socapi.models import _client_model as cm
+from mock_socpanel import MockConfig, Faults
+
+
+def event(kind, name="Quotas", elapsed=0.02, **kwargs):
+    return RequestEvent(kind, name, "api/counter/list", "http://mock", elapsed=elapsed, **kwargs)
+
+
+def test_attempts_are_accounted():
+    metrics = MetricsCollector()
+    for kind in ("start", "retry", "start", "end", "start"):
+        metrics(event(kind, status=200 if kind == "end" else 500, bytes_received=10))
+    metrics(event("start", name="Login"))
+    metrics(event("error", name="Login", status=None))
+
+    quotas = metrics.requests["Quotas"]
+    assert (quotas.requests, quotas.ok, quotas.retries, quotas.errors, quotas.in_flight) == (3, 1, 1, 0, 1)
+    assert quotas.statuses == {500: 1, 200: 1}
+    assert quotas.bytes_received == 20
+    assert quotas.latency.count == 2
+    assert metrics.requests["Login"].errors == 1
+    assert not metrics.requests["Login"].statuses
+
+
+def test_histogram_quantiles():
+    histogram = LatencyHistogram((0.1, 1.0, float("inf")))
+    for value in (0.05, 0.05, 0.5, 3.0):
+        histogram.observe(value)
+    assert list(histogram.counts) == [2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    # the open bucket reports the largest value seen
+    assert histogram.quantile(1.0) == 3.0
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_prometheus_exposition():
+    metrics = MetricsCollector()
+    metrics(event("start"))
+    metrics(event("end", status=200))
+    text = metrics.to_prometheus()
+    assert 'socapi_ok_total{request="Quotas"} 1' in text
+    assert 'socapi_latency_seconds_bucket{request="Quotas",le="+Inf"} 1' in text
+    assert 'socapi_latency_seconds_count{request="Quotas"} 1' in text
+
+
+def test_client_events_balance(socpanel):
+    faults = {cm.Endpoints.QUOTAS.value: Faults(error_rate=0.5)}
+
+    async def run():
+        async with socpanel(MockConfig(faults=faults, seed=3)) as (_, client):
+            metrics = client.enable_metrics()
+            results = await asyncio.gather(*(client._get_quota_values(p) for p in range(1, 5)), return_exceptions=True)
+            return metrics.requests[cm.RequestNames.QUOTAS.value], results
+
+    quotas, results = asyncio.run(run())
+    failed = sum(isinstance(r, Exception) for r in results)
+    assert quotas.in_flight == 0
+    assert quotas.requests == quotas.ok + quotas.retries + quotas.errors
+    assert quotas.ok == len(results) - failed
+    assert quotas.retries > 0
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from socapi import DownloadProgress
+from socapi import _progress
+from socapi.models import _download_models as dm
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(_progress.time, "monotonic", clock)
+    return clock
+
+
+def recorded(min_interval=1.0):
+    events = []
+    return DownloadProgress(events.append, min_interval=min_interval), events
+
+
+def test_bytes_are_coalesced(clock):
+    progress, events = recorded()
+    progress.start([1])
+    events.clear()
+
+    for received in (10, 20, 30):
+        progress.on_bytes(1, received, 100)
+        clock.now += 0.3
+    clock.now += 0.5
+    progress.on_bytes(1, 40, 100)
+    # the last chunk is reported however soon it follows
+    progress.on_bytes(1, 100, 100)
+
+    assert [e.bytes_received for e in events if e.kind == "bytes"] == [10, 40, 100]
+    assert progress.bytes_total == 100
+
+
+def test_states_are_always_reported(clock):
+    progress, events = recorded()
+    progress.start([1, 2])
+    for state in (dm.PollState.exporting, dm.PollState.waiting, dm.PollState.transferring):
+        progress.set_state(1, state)
+    assert [e.state for e in events if e.kind == "state"] == [
+        dm.PollState.exporting, dm.PollState.waiting, dm.PollState.transferring,
+    ]
+
+
+def test_eta_from_the_completion_rate(clock):
+    progress, events = recorded()
+    progress.start([1, 2, 3, 4])
+    clock.now += 10
+    progress.set_state(1, dm.PollState.done)
+    progress.on_bytes(3, 500, None)
+    clock.now += 10
+    progress.set_state(2, dm.PollState.failed)
+
+    batch = [e for e in events if e.kind == "batch"][-1]
+    assert (batch.polls_finished, batch.polls_failed, batch.polls_total) == (2, 1, 4)
+    # two polls in 20 s, two left
+    assert batch.eta == pytest.approx(20.0)
+    assert batch.throughput == pytest.approx(25.0)
+    assert batch.states == {"done": 1, "failed": 1, "queued": 2}
+
+
+def test_last_poll_forces_a_batch_event(clock):
+    progress, events = recorded(min_interval=60)
+    progress.start([1, 2])
+    clock.now += 1
+    progress.set_state(1, dm.PollState.done)
+    progress.set_state(2, dm.PollState.done)
+    # repeated terminal states do not count twice
+    progress.set_state(2, dm.PollState.done)
+
+    batches = [e for e in events if e.kind == "batch"]
+    assert [b.polls_finished for b in batches] == [0, 2, 2]
+    assert batches[-1].eta == 0
+
+
+def test_event_stream_ends_on_close(clock):
+    async def run():
+        progress = DownloadProgress()
+        stream = aiter(progress)
+        progress.start([1])
+        progress.set_state(1, dm.PollState.done)
+        progress.close()
+        return [e.kind async for e in stream]
+
+    assert asyncio.run(run()) == ["batch", "state", "batch", "batch"]
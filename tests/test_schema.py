@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from socapi import PollSchema, SchemaCache
+from socapi._meta_parser import get_multiindex_from_questions
+from socapi._schema import NO_ID, TECHNICAL_COLUMNS
+from socapi.models import _meta_parser_models as mpm
+
+QUESTIONS = [
+    [
+        {"id": 1, "type_id": 1, "answers": [
+            {"id": 100, "question_id": 1, "has_input": False},
+            {"id": 101, "question_id": 1, "has_input": True},
+        ]},
+        {"id": 2, "type_id": 4, "answers": [
+            {"id": 200, "question_id": 2, "has_input": True},
+            {"id": 201, "question_id": 2, "has_input": False},
+        ]},
+    ],
+    [{"id": 3, "type_id": 7, "answers": []}],
+]
+TECH = len(TECHNICAL_COLUMNS)
+
+
+def test_columns_for_question():
+    schema = PollSchema.from_questions(QUESTIONS)
+    # single column question with its "other" input, multipunch columns then their inputs, open end
+    assert schema.columns_for_question(1) == range(TECH, TECH + 2)
+    assert schema.columns_for_question(2) == range(TECH + 2, TECH + 5)
+    assert schema.columns_for_question(3) == range(TECH + 5, TECH + 6)
+    assert schema.columns_for_question(99) == range(0)
+    assert schema.question_order == (1, 2, 3)
+    assert len(schema) == TECH + 6
+
+
+def test_columns_for_answer():
+    schema = PollSchema.from_questions(QUESTIONS)
+    assert schema.columns_for_answer(101) == (TECH + 1,)
+    # data and input column of the same answer
+    assert schema.columns_for_answer(200) == (TECH + 2, TECH + 4)
+    assert schema.columns_for_answer(100) == ()
+
+
+def test_columns_round_trip():
+    columns = get_multiindex_from_questions(QUESTIONS)
+    schema = PollSchema(columns)
+    assert schema.to_tuples() == columns
+    assert schema.technical_columns() == dict(enumerate(TECHNICAL_COLUMNS))
+    assert schema.question_ids[0] == NO_ID
+    assert schema.column(TECH + 4) == (2, 200, mpm.AnswerTypes.input.value)
+
+
+def test_answers_and_types():
+    schema = PollSchema.from_questions(QUESTIONS)
+    assert schema.answers_of(1) == (100, 101)
+    assert schema.question_type(2) is mpm.QuestionTypes.multipunch
+    assert schema.question_type(99) is None
+
+
+def test_multiindex_matches_the_tuples():
+    pd = pytest.importorskip("pandas")
+    columns = get_multiindex_from_questions(QUESTIONS)
+    expected = pd.MultiIndex.from_tuples(columns, names=("question_id", "answer_id", "answer_type"))
+    index = PollSchema.from_questions(QUESTIONS).to_multiindex()
+    pd.testing.assert_index_equal(index, expected)
+
+
+def test_cached_schema_is_built_once(socpanel, tmp_path):
+    async def run():
+        async with socpanel() as (server, client):
+            cache = SchemaCache(tmp_path)
+            first = await client.get_poll_schema(1, cache=cache)
+            second = await client.get_poll_schema(1, cache=cache)
+            server.config.answers_per_question += 1
+            edited = await client.get_poll_schema(1, cache=cache, revalidate="full")
+            return first, second, edited
+
+    first, second, edited = asyncio.run(run())
+    assert second is first
+    assert edited is not first and len(edited) > len(first)
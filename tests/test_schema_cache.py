@@ -0,0 +1,95 @@
+import asyncio
+import copy
+
+from socapi import SchemaCache
+from socapi._schema_cache import build_cached_schema, diff_cached_schemas
+from socapi.models import _client_model as cm
+
+BLOCKS = [{"id": 10, "order": 1, "title": "first"}, {"id": 20, "order": 2, "title": "second"}]
+QUESTIONS = {
+    10: [
+        {"id": 1, "type_id": 1, "order": 1, "answers": [{"id": 100, "question_id": 1, "has_input": False}]},
+        {"id": 2, "type_id": 4, "order": 2, "answers": []},
+    ],
+    20: [{"id": 3, "type_id": 3, "order": 1, "answers": [], "children": [{"id": 4, "type_id": 1, "order": 1}]}],
+}
+
+
+def schema(blocks=BLOCKS, questions=QUESTIONS):
+    return build_cached_schema(1, copy.deepcopy(blocks), copy.deepcopy(questions))
+
+
+def test_new_entry_adds_everything():
+    diff = diff_cached_schemas(None, schema())
+    assert diff.added_blocks == [10, 20]
+    assert diff.added_questions == [1, 2, 3]
+
+
+def test_same_structure_is_no_change():
+    diff = diff_cached_schemas(schema(), schema())
+    assert not diff
+
+
+def test_block_changes():
+    blocks = [BLOCKS[1], BLOCKS[0], {"id": 30, "order": 3}]
+    diff = diff_cached_schemas(schema(), schema(blocks, {**QUESTIONS, 30: []}))
+    assert diff.added_blocks == [30]
+    assert diff.moved_blocks == [20, 10]
+
+    diff = diff_cached_schemas(schema(), schema(BLOCKS[:1], {10: QUESTIONS[10]}))
+    assert diff.removed_blocks == [20]
+    assert diff.removed_questions == [3]
+
+
+def test_question_changes():
+    questions = copy.deepcopy(QUESTIONS)
+    questions[10][0]["answers"].append({"id": 101, "question_id": 1, "has_input": True})
+    questions[10][1]["type_id"] = 1
+    questions[20][0]["children"][0]["order"] = 2
+    questions[20].append({"id": 5, "type_id": 7, "order": 2})
+    diff = diff_cached_schemas(schema(), schema(questions=questions))
+    assert diff.changed_questions == [1, 2, 3]
+    assert diff.added_questions == [5]
+    assert not diff.added_blocks and not diff.removed_questions
+
+
+def test_titles_do_not_count_as_changes():
+    questions = copy.deepcopy(QUESTIONS)
+    questions[10][0]["title"] = "renamed"
+    assert not diff_cached_schemas(schema(), schema(questions=questions))
+
+
+def test_question_moved_between_blocks():
+    questions = copy.deepcopy(QUESTIONS)
+    questions[20].append(questions[10].pop(1))
+    diff = diff_cached_schemas(schema(), schema(questions=questions))
+    assert diff.changed_questions == [2]
+    assert not diff.added_questions and not diff.removed_questions
+
+
+def map_twice(socpanel, tmp_path, **revalidation):
+    """Maps poll 1 through the cache, adds answers to every question, maps it again."""
+    async def run():
+        async with socpanel() as (server, client):
+            cache = SchemaCache(tmp_path)
+            before = await client.map_question_ids(1, cache=cache)
+            server.config.answers_per_question += 2
+            server.hits.clear()
+            after = await client.map_question_ids(1, cache=cache, **revalidation)
+            hits = dict(server.hits)
+            return len(before), len(after), len(await client.map_question_ids(1)), hits
+    return asyncio.run(run())
+
+
+def test_warm_cache_fetches_only_the_blocks(socpanel, tmp_path):
+    before, after, uncached, hits = map_twice(socpanel, tmp_path)
+    assert hits == {f"/{cm.Endpoints.BLOCKS_IN_POLL.value}": 1}
+    # edits inside unchanged blocks wait for the next full check
+    assert after == before != uncached
+
+
+def test_full_check_sees_edits_inside_blocks(socpanel, tmp_path):
+    before, after, uncached, _ = map_twice(socpanel, tmp_path, revalidate="full")
+    assert after == uncached != before
+    before, after, uncached, _ = map_twice(socpanel, tmp_path / "aged", max_age=0)
+    assert after == uncached != before
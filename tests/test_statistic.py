@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from socapi._statistic import iter_windows, diff_quota_snapshot
+from socapi.models import _client_model as cm
+
+STATISTIC = f"/{cm.Endpoints.STATISTIC.value}"
+
+
+def quota(quota_id, hits, size, name="q"):
+    return {"id": quota_id, "name": name, "hits": hits, "quota": size}
+
+
+def test_first_snapshot_reports_every_quota_as_new():
+    snapshot, deltas = diff_quota_snapshot(1, None, [quota(1, 3, 10), quota(2, 0, 5)])
+    assert snapshot == {1: (3, 10), 2: (0, 5)}
+    assert [(d.quota_id, d.is_new, d.hits_delta, d.quota_delta) for d in deltas] == [(1, True, 3, 10), (2, True, 0, 5)]
+
+
+def test_unchanged_quotas_are_skipped():
+    previous, _ = diff_quota_snapshot(1, None, [quota(1, 3, 10)])
+    assert diff_quota_snapshot(1, previous, [quota(1, 3, 10)]) == (previous, [])
+
+
+def test_quota_deltas():
+    previous = {1: (3, 10), 2: (9, 10), 3: (5, 5)}
+    _, deltas = diff_quota_snapshot(1, previous, [quota(1, 5, 12), quota(2, 10, 10), quota(3, 6, 5)])
+    by_id = {d.quota_id: d for d in deltas}
+
+    assert (by_id[1].hits_delta, by_id[1].quota_delta, by_id[1].left_delta, by_id[1].left) == (2, 2, 0, 7)
+    assert not by_id[1].closed and not by_id[1].is_new
+    # closed only when it fills up between the snapshots, not when it was full already
+    assert by_id[2].closed and by_id[2].left == 0
+    assert not by_id[3].closed
+
+
+def test_removed_quota():
+    _, deltas = diff_quota_snapshot(7, {1: (3, 10)}, [])
+    assert len(deltas) == 1
+    removed = deltas[0]
+    assert removed.is_removed and removed.poll_id == 7
+    assert (removed.hits_delta, removed.quota_delta, removed.left_delta) == (-3, -10, -7)
+
+
+def test_windows_follow_the_platform_grid():
+    start = datetime(2026, 10, 19, 13, 30, tzinfo=timezone.utc)
+    windows = list(iter_windows(start, start + timedelta(days=2), timedelta(days=1)))
+
+    # platform midnight is 21:00 UTC, only the first and last windows are clipped
+    assert [w[0].hour for w in windows] == [21, 21, 21]
+    assert windows[0][1] == start
+    assert [w[1] for w in windows[1:]] == [w[0] for w in windows[1:]]
+    assert windows[-1][2] == start + timedelta(days=2)
+    assert all(w[2] - w[0] == timedelta(days=1) for w in windows[:-1])
+
+
+def test_weeks_start_on_monday():
+    start = datetime(2026, 10, 22, tzinfo=timezone.utc)
+    bucket_start, _, _ = next(iter(iter_windows(start, start + timedelta(days=1), timedelta(weeks=1))))
+    assert bucket_start.astimezone(cm.PLATFORM_TIMEZONE).strftime("%a %H:%M") == "Mon 00:00"
+
+
+def test_sliding_refresh_requests_only_the_edges(socpanel):
+    async def run():
+        async with socpanel() as (server, client):
+            hits = []
+            for _ in range(2):
+                server.hits.clear()
+                start = datetime.now(timezone.utc) - timedelta(hours=24)
+                series = await client.get_statistics_series(1, start, bucket="hour")
+                hits.append(server.hits[STATISTIC])
+            return hits, series
+
+    hits, series = asyncio.run(run())
+    assert hits[0] == len(series) >= 24
+    # the clipped first bucket and the open last one, one more if an hour closed in between
+    assert hits[1] <= 3
@@ -0,0 +1,133 @@
+import asyncio
+import json
+from dataclasses import asdict
+
+import aiohttp
+import pytest
+
+from socapi import SocAPIClient, RecordingTransport, ReplayTransport, expeptions
+from socapi._transport import Exchange, MASK, exchange_key, sanitize
+from mock_socpanel import TOKEN
+
+REPLAY_URL = "http://replay.invalid"
+
+
+async def session(client):
+    return (
+        await client.get_statistics(1),
+        await client.map_question_ids(2),
+        await client.get_statistics(1),
+    )
+
+
+def write_recording(path, *exchanges):
+    with open(path, "w", encoding="utf-8") as f:
+        for exchange in exchanges:
+            f.write(json.dumps(asdict(exchange)) + "\n")
+
+
+def exchange(key, status=200, body=None, **kwargs):
+    return Exchange(
+        key=key, at=0.0, duration=0.0, status=status, content_type="application/json",
+        body=json.dumps(body), binary=False, size=0, **kwargs,
+    )
+
+
+def test_replay_matches_the_recorded_session(socpanel, tmp_path):
+    path = tmp_path / "session.jsonl"
+
+    async def run():
+        recorder = RecordingTransport(path)
+        async with socpanel(transport=recorder) as (_, client):
+            live = await session(client)
+        recorder.close()
+
+        replayer = ReplayTransport(path, speed=None)
+        client = await SocAPIClient.from_credentials(
+            "online-sociology", "u", "p", url_override=REPLAY_URL, transport=replayer
+        )
+        return live, await session(client), replayer.served
+
+    live, replayed, served = asyncio.run(run())
+    assert replayed == live
+    assert served == len(path.read_text().splitlines())
+
+
+def test_recording_masks_sensitive_keys(socpanel, tmp_path):
+    path = tmp_path / "session.jsonl"
+
+    async def run():
+        recorder = RecordingTransport(path)
+        async with socpanel(transport=recorder) as (_, client):
+            await client.get_statistics(1)
+        recorder.close()
+
+    asyncio.run(run())
+    text = path.read_text()
+    assert TOKEN not in text
+    login = json.loads(text.splitlines()[0])
+    assert f'"login": "{MASK}", "password": "{MASK}"' in login["key"]
+    assert json.loads(login["body"])["result"]["session_token"] == MASK
+
+
+def test_sanitize_masks_at_any_depth():
+    value = {"a": [{"token": "t", "b": {"password": "p", "keep": 1}}], "email": "e"}
+    assert sanitize(value) == {"a": [{"token": MASK, "b": {"password": MASK, "keep": 1}}], "email": MASK}
+
+
+def test_exchange_key_ignores_host_and_key_order():
+    first = exchange_key("post", "http://a/api/poll/get", b'{"id": 1, "session_token": "x"}')
+    second = exchange_key("POST", "http://b/api/poll/get", b'{"session_token": "y", "id": 1}')
+    assert first == second
+
+
+def test_repeated_requests_replay_in_order(tmp_path):
+    path = tmp_path / "session.jsonl"
+    key = exchange_key("POST", f"{REPLAY_URL}/api/poll/stat/export/progress", b'{"id": 1}')
+    write_recording(path, exchange(key, body={"n": 1}), exchange(key, body={"n": 2}))
+
+    async def run():
+        transport = ReplayTransport(path, speed=None)
+        bodies = []
+        for _ in range(3):
+            async with transport.request("POST", f"{REPLAY_URL}/api/poll/stat/export/progress", data=b'{"id": 1}') as r:
+                bodies.append(json.loads(await r.read()))
+        return bodies
+
+    # the last answer repeats once the recording runs out
+    assert asyncio.run(run()) == [{"n": 1}, {"n": 2}, {"n": 2}]
+
+
+def test_unrecorded_request_raises(tmp_path):
+    path = tmp_path / "session.jsonl"
+    write_recording(path)
+
+    async def run():
+        async with ReplayTransport(path, speed=None).request("POST", f"{REPLAY_URL}/api/poll/get", data=b'{"id": 1}'):
+            pass
+
+    with pytest.raises(expeptions.ReplayMismatchError):
+        asyncio.run(run())
+
+
+def test_replayed_failures_raise_like_live_responses(tmp_path):
+    path = tmp_path / "session.jsonl"
+    url = f"{REPLAY_URL}/statistics/poll_1.sav"
+    write_recording(
+        path,
+        exchange(exchange_key("GET", url, None), status=500),
+        Exchange(exchange_key("GET", url, None), 0.0, 0.0, 200, "", None, False, 4, error="ClientPayloadError"),
+    )
+
+    async def run():
+        transport = ReplayTransport(path, speed=None)
+        async with transport.request("GET", url) as r:
+            with pytest.raises(aiohttp.ClientResponseError) as failed:
+                r.raise_for_status()
+            # logging the error needs its request info
+            assert url in str(failed.value)
+        async with transport.request("GET", url) as r:
+            with pytest.raises(aiohttp.ClientPayloadError):
+                [chunk async for chunk in r.iter_chunked(2)]
+
+    asyncio.run(run())